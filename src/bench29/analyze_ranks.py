@@ -1,9 +1,19 @@
 import os
+import sys
+sys.path.append(os.path.join(os.path.dirname(os.path.abspath(__file__)), '../'))
+
 import csv
+import numpy as np
 from sqlalchemy import create_engine, func
 from sqlalchemy.orm import sessionmaker
 from sqlalchemy_models_working import Base, LlmAnalysis, Models, Prompts, LlmDiagnosis
-from math_libs import rescaled_penalized_weighted_stats
+from libs.math_libs import alpha, sweep_histogram_stats
+from libs.stats_libs import (
+    METRIC_NAMES, bootstrap_stats, rank_count_matrix, leaderboard_rows, pairwise_tests,
+    sample_weight_vectors, leaderboard_order_changes
+)
+from db.utils.snapshot_utils import snapshot_rank_counts, snapshot_case_ranks
+from db.db_queries_bench29 import get_leaderboard_rank_histograms
 
 def get_session():
     """Create and return a database session"""
@@ -13,76 +23,223 @@ def get_session():
     session = Session()
     return session
 
-def analyze_model_prompt_performance(weights=None):
+def get_case_ranks(session):
+    """
+    Get the predicted rank of every case for each model-prompt combination
+    
+    Args:
+        session: SQLAlchemy session
+        
+    Returns:
+        Dictionary mapping (model_name, model_alias, prompt_name) to {case id: [ranks]},
+        every analysis row is kept so the tests see the rows the histogram counts
+    """
+    rows = session.query(
+        Models.name,
+        Models.alias,
+        Prompts.alias,
+        LlmAnalysis.cases_bench_id,
+        LlmAnalysis.predicted_rank
+    ).join(
+        LlmDiagnosis, LlmDiagnosis.id == LlmAnalysis.llm_diagnosis_id
+    ).join(
+        Models, Models.id == LlmDiagnosis.model_id
+    ).join(
+        Prompts, Prompts.id == LlmDiagnosis.prompt_id
+    ).filter(
+        LlmAnalysis.predicted_rank.isnot(None)
+    ).all()
+    
+    case_ranks = {}
+    for model_name, model_alias, prompt_name, case_id, rank in rows:
+        case_ranks.setdefault((model_name, model_alias, prompt_name), {}).setdefault(case_id, []).append(rank)
+    return case_ranks
+
+def write_pvalue_matrix(csv_file, tests, matrix='p_adjusted'):
+    """
+    Write one matrix of pairwise_tests output as CSV, one row and column per
+    model-prompt combination
+    
+    Args:
+        csv_file: Output path
+        tests: Output of stats_libs.pairwise_tests
+        matrix: Which matrix to write ('p_adjusted', 'p_value' or 'difference')
+    """
+    labels = [f"{model_alias}/{prompt_name}" for _, model_alias, prompt_name in tests['keys']]
+    with open(csv_file, 'w', newline='') as f:
+        writer = csv.writer(f)
+        writer.writerow([''] + labels)
+        for label, row in zip(labels, tests[matrix]):
+            writer.writerow([label] + ['' if value != value else f"{value:.6g}" for value in row])
+
+def run_weight_sweep(group_keys, rank_values, counts, weights, n_vectors=1000, alphas=None, concentration=50.0):
+    """
+    Sensitivity of the leaderboard to the rank weights and alpha. Scores every
+    model-prompt combination under many weight vectors sampled around the
+    given weights and writes how the order changes to weight_sweep.csv
+    (one row per weight vector) and weight_sweep_groups.csv (one row per combination)
+    
+    Args:
+        group_keys: List of (model_name, model_alias, prompt_name)
+        rank_values: List of the distinct rank values
+        counts: (groups x ranks) count matrix
+        weights: Base dictionary mapping ranks to weights
+        n_vectors: Number of weight vectors, the base weights included
+        alphas: Penalty parameters to evaluate (default: a range around math_libs.alpha)
+        concentration: Dirichlet concentration of the sampled weights around the base weights
+    """
+    if alphas is None:
+        alphas = alpha * np.array([0.5, 0.75, 1.0, 1.25, 1.5])
+    
+    weight_matrix = sample_weight_vectors(weights, rank_values, n_vectors, concentration)
+    weighted_means, penalized = sweep_histogram_stats(rank_values, counts, weight_matrix, alphas)
+    
+    # The penalty is decreasing in the weighted mean for any alpha > 0, so the order
+    # only depends on the weights: a lower weighted mean ranks higher
+    changes = leaderboard_order_changes(-weighted_means, -weighted_means[0])
+    
+    with open('weight_sweep.csv', 'w', newline='') as f:
+        writer = csv.writer(f)
+        writer.writerow([f'w_{int(rank)}' for rank in rank_values] +
+                        ['spearman', 'top1_changed', 'top5_overlap', 'max_shift', 'top_model', 'top_prompt'])
+        for s in range(len(weight_matrix)):
+            top = group_keys[int(np.argmin(weighted_means[s]))]
+            writer.writerow([f"{w:.5f}" for w in weight_matrix[s]] + [
+                f"{changes['spearman'][s]:.4f}", int(changes['top1_changed'][s]),
+                f"{changes['top_k_overlap'][s]:.2f}", int(changes['max_shift'][s]), top[1], top[2]
+            ])
+    
+    with open('weight_sweep_groups.csv', 'w', newline='') as f:
+        writer = csv.writer(f)
+        writer.writerow(['model_name', 'model_alias', 'prompt_name', 'baseline_position', 'best_position',
+                         'worst_position', 'median_position', 'first_fraction'])
+        for i, (model_name, model_alias, prompt_name) in enumerate(group_keys):
+            writer.writerow([model_name, model_alias, prompt_name,
+                             int(changes['baseline_position'][i]), int(changes['best_position'][i]),
+                             int(changes['worst_position'][i]), f"{changes['median_position'][i]:.1f}",
+                             f"{changes['first_fraction'][i]:.3f}"])
+    
+    print(f"\nWeight sweep over {len(weight_matrix)} weight vectors:")
+    print(f"   Median Spearman correlation with the baseline order: {np.median(changes['spearman']):.4f}")
+    print(f"   Top combination changes in {changes['top1_changed'].mean():.1%} of weightings")
+    print(f"   Baseline top-5 kept on average: {changes['top_k_overlap'].mean():.1%}")
+    print("   Alpha only rescales the penalized scores, it does not change the order:")
+    for a, scores in zip(alphas, penalized):
+        print(f"   alpha {a:.3f}: penalized weighted mean of baseline between {scores[0].min():.4f} and {scores[0].max():.4f}")
+    print("   Results written to weight_sweep.csv and weight_sweep_groups.csv")
+
+def analyze_model_prompt_performance(weights=None, bootstrap_resamples=0, confidence=0.95, workers=None, snapshot_dir=None,
+                                     significance_test=None, test_iterations=10000, correction='holm',
+                                     weight_sweep=0, sweep_alphas=None, recompute=False):
     """
     Analyze performance of each model-prompt combination based on predicted ranks
     and create a CSV file with the results
     
     Args:
         weights: Optional dictionary mapping ranks to weights for the calculation
+        bootstrap_resamples: Number of bootstrap resamples over cases (each with all
+                             its analysis rows) for the confidence intervals of
+                             every metric (0 to skip)
+        confidence: Confidence level of the bootstrap intervals
+        workers: Number of processes used for bootstrapping (default: most cores)
+        snapshot_dir: Optional Parquet snapshot (db/utils/snapshot_utils.py) to
+                      read instead of the live database
+        significance_test: 'permutation' or 'bootstrap' to run paired tests of the
+                           penalized weighted mean between every pair of combinations
+                           on their shared cases, None to skip
+        test_iterations: Permutations or resamples per pair
+        correction: Multiple-comparison correction, 'holm', 'bh' or None
+        weight_sweep: Number of weight vectors for the weight/alpha sensitivity
+                      analysis (0 to skip), see run_weight_sweep
+        sweep_alphas: Penalty parameters evaluated by the sweep
+        recompute: Whether to recompute the rank histograms with a GROUP BY over
+                   all of llm_analysis instead of reading the leaderboard_rank_count
+                   aggregate the ingest pipeline maintains (see leaderboard-aggregates.py
+                   to check or rebuild it)
     """
     # Default weights if none provided
     if weights is None:
         weights = {1: 0.01, 2: 0.02, 3: 0.07, 4: 0.20, 5: 0.30, 6: 0.50}
         
-    session = get_session()
+    session = None
+    if snapshot_dir:
+        print(f"Reading rank histograms from snapshot {snapshot_dir}...")
+        rank_counts = snapshot_rank_counts(snapshot_dir)
+    elif not recompute:
+        session = get_session()
+        
+        print("Reading the maintained rank histograms per model-prompt combination...")
+        rank_counts = get_leaderboard_rank_histograms(session)
+    else:
+        session = get_session()
+        
+        print("Recomputing rank histograms per model-prompt combination...")
+        
+        # Let the database do the join and the grouping: one row per
+        # (model, prompt, rank) with its count, instead of every analysis record
+        rank_counts = session.query(
+            Models.name,
+            Models.alias,
+            Prompts.alias,
+            LlmAnalysis.predicted_rank,
+            func.count(LlmAnalysis.id)
+        ).join(
+            LlmDiagnosis, LlmDiagnosis.id == LlmAnalysis.llm_diagnosis_id
+        ).join(
+            Models, Models.id == LlmDiagnosis.model_id
+        ).join(
+            Prompts, Prompts.id == LlmDiagnosis.prompt_id
+        ).group_by(
+            Models.name,
+            Models.alias,
+            Prompts.alias,
+            LlmAnalysis.predicted_rank
+        ).all()
+        
+        # Analyses without a predicted rank cannot be scored (the former per-row
+        # path failed on them), they are left out of every statistic and reported
+        unranked = sum(count for _, _, _, rank, count in rank_counts if rank is None)
+        if unranked:
+            print(f"Excluding {unranked} analysis records without a predicted rank")
+        rank_counts = [row for row in rank_counts if row[3] is not None]
     
-    print("Querying all analysis records...")
+    # Calculate all statistics for every combination at once
+    group_keys, rank_values, counts = rank_count_matrix(rank_counts)
+    final_results = leaderboard_rows(group_keys, rank_values, counts, weights)
     
-    # Get all models
-    models = {model.id: (model.name, model.alias) for model in session.query(Models).all()}
+    # Per-case ranks of every combination, shared by the bootstrap and the paired tests
+    case_ranks = None
+    if bootstrap_resamples > 0 or significance_test:
+        case_ranks = snapshot_case_ranks(snapshot_dir) if snapshot_dir else get_case_ranks(session)
     
-    # Get all prompts
-    prompts = {prompt.id: prompt.alias for prompt in session.query(Prompts).all()}
+    if bootstrap_resamples > 0:
+        # Cases are resampled with all their analysis rows
+        groups = {key: list(case_ranks.get(key, {}).values()) for key in group_keys}
+        intervals = bootstrap_stats(groups, weights, bootstrap_resamples, confidence, workers=workers, verbose=True)
+        
+        for result, key in zip(final_results, group_keys):
+            for metric in METRIC_NAMES:
+                result[f'{metric}_ci_low'] = intervals[key][metric]['ci_low']
+                result[f'{metric}_ci_high'] = intervals[key][metric]['ci_high']
     
-    # Get all analysis records with predicted ranks
-    analyses = session.query(
-        LlmAnalysis.predicted_rank,
-        LlmAnalysis.llm_diagnosis_id
-    ).all()
+    if weight_sweep > 0:
+        run_weight_sweep(group_keys, rank_values, counts, weights, n_vectors=weight_sweep, alphas=sweep_alphas)
     
-    # Now get all diagnosis records to map to models and prompts
-    diagnosis_map = {}
-    from sqlalchemy_models_working import LlmDiagnosis
-    diagnoses = session.query(
-        LlmDiagnosis.id,
-        LlmDiagnosis.model_id,
-        LlmDiagnosis.prompt_id
-    ).all()
-    for diag_id, model_id, prompt_id in diagnoses:
-        diagnosis_map[diag_id] = (model_id, prompt_id)
-    
-    # Group by model and prompt
-    results = {}
-    for rank, diag_id in analyses:
-        if diag_id in diagnosis_map:
-            model_id, prompt_id = diagnosis_map[diag_id]
-            if model_id in models and prompt_id in prompts:
-                model_name, model_alias = models[model_id]
-                prompt_name = prompts[prompt_id]
-                
-                key = (model_name, model_alias, prompt_name)
-                if key not in results:
-                    results[key] = []
-                
-                results[key].append(rank)
-    
-    # Calculate statistics
-    final_results = []
-    for (model_name, model_alias, prompt_name), ranks in results.items():
-        # Calculate all statistics using our math library
-        mean, weighted_mean, penalized_mean, penalized_weighted_mean = rescaled_penalized_weighted_stats(ranks, weights)
+    if significance_test:
+        tests = pairwise_tests(
+            case_ranks, weights,
+            method=significance_test,
+            n_iterations=test_iterations,
+            correction=correction,
+            workers=workers,
+            verbose=True
+        )
+        write_pvalue_matrix('model_prompt_pvalues.csv', tests, 'p_adjusted')
+        write_pvalue_matrix('model_prompt_differences.csv', tests, 'difference')
         
-        final_results.append({
-            'model_name': model_name,
-            'model_alias': model_alias,
-            'prompt_name': prompt_name,
-            'sample_count': len(ranks),
-            'mean': mean,
-            'weighted_mean': weighted_mean,
-            'penalized_mean': penalized_mean,
-            'penalized_weighted_mean': penalized_weighted_mean
-        })
+        significant = int(((tests['p_adjusted'] < 0.05).sum()) // 2)
+        print(f"Paired {significance_test} tests: {significant} significant pairs at 0.05 ({correction or 'uncorrected'}), "
+              f"p-values written to model_prompt_pvalues.csv")
     
     # Sort results by penalized weighted mean (higher is better)
     final_results.sort(key=lambda x: x['penalized_weighted_mean'], reverse=True)
@@ -90,10 +247,13 @@ def analyze_model_prompt_performance(weights=None):
     # Write to CSV
     csv_file = 'model_prompt_performance.csv'
     with open(csv_file, 'w', newline='') as f:
-        writer = csv.DictWriter(f, fieldnames=[
+        fieldnames = [
             'model_name', 'model_alias', 'prompt_name', 'sample_count',
             'mean', 'weighted_mean', 'penalized_mean', 'penalized_weighted_mean'
-        ])
+        ]
+        if bootstrap_resamples > 0:
+            fieldnames += [f'{metric}_{bound}' for metric in METRIC_NAMES for bound in ('ci_low', 'ci_high')]
+        writer = csv.DictWriter(f, fieldnames=fieldnames)
         writer.writeheader()
         writer.writerows(final_results)
     
@@ -103,15 +263,32 @@ def analyze_model_prompt_performance(weights=None):
     print("\nTop 5 best performing model-prompt combinations:")
     for i, result in enumerate(final_results[:5]):
         print(f"{i+1}. {result['model_name']} ({result['model_alias']}) with {result['prompt_name']} prompt:")
-        print(f"   Penalized weighted mean: {result['penalized_weighted_mean']:.4f}")
+        if bootstrap_resamples > 0:
+            print(f"   Penalized weighted mean: {result['penalized_weighted_mean']:.4f} "
+                  f"[{result['penalized_weighted_mean_ci_low']:.4f}, {result['penalized_weighted_mean_ci_high']:.4f}]")
+        else:
+            print(f"   Penalized weighted mean: {result['penalized_weighted_mean']:.4f}")
         print(f"   Weighted mean: {result['weighted_mean']:.4f}")
         print(f"   Mean: {result['mean']:.4f}")
         print(f"   Sample count: {result['sample_count']}")
     
-    session.close()
+    if session is not None:
+        session.close()
     return final_results
 
 if __name__ == "__main__":
     # Default weights
     weights = {1: 0.01, 2: 0.02, 3: 0.07, 4: 0.20, 5: 0.30, 6: 0.50}
-    analyze_model_prompt_performance(weights)
+    bootstrap_resamples = 0  # Number of bootstrap resamples for confidence intervals, 0 to skip
+    snapshot_dir = None  # Parquet snapshot directory, None reads the live database
+    significance_test = None  # "permutation", "bootstrap" or None to skip
+    weight_sweep = 0  # Number of weight vectors for the sensitivity analysis, 0 to skip
+    recompute = False  # Recompute the rank histograms from llm_analysis instead of reading the aggregate
+    analyze_model_prompt_performance(
+        weights,
+        bootstrap_resamples=bootstrap_resamples,
+        snapshot_dir=snapshot_dir,
+        significance_test=significance_test,
+        weight_sweep=weight_sweep,
+        recompute=recompute
+    )
@@ -15,10 +15,12 @@ from db.utils.db_utils import get_session
 from db.backward_comp_models import * 
 from hoarder29.libs.parser_libs import *
 from lapin.handlers.base_handler import ModelHandler
+from bench29.libs.shard_libs import get_shard_arg, load_shard
 
 session = get_session()
 
-diagnoses = session.query(LlmDiagnosis).all()
+# Optional --shard i/N to split the work across processes or machines
+diagnoses = load_shard(session.query(LlmDiagnosis), get_shard_arg(), LlmDiagnosis.id, verbose=verbose)
 if verbose:
 	print(f"Found {len(diagnoses)} diagnoses to process")
 
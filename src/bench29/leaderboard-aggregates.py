@@ -0,0 +1,41 @@
+"""
+Maintenance command for the leaderboard rank count aggregate
+(bench29.leaderboard_rank_count).
+
+Usage:
+    python leaderboard-aggregates.py --check
+    python leaderboard-aggregates.py --rebuild
+"""
+
+import os
+import sys
+import argparse
+
+# Add the parent directory to the Python path
+sys.path.append(os.path.join(os.path.dirname(os.path.abspath(__file__)), '../'))
+
+from db.utils.db_utils import get_session
+from db.db_queries import rebuild_leaderboard_rank_counts, check_leaderboard_rank_counts
+
+def main():
+    parser = argparse.ArgumentParser(description="Check or rebuild the leaderboard rank count aggregate")
+    parser.add_argument("--rebuild", action="store_true", help="Replace the aggregate with a full recompute from llm_analysis")
+    parser.add_argument("--check", action="store_true", help="Compare the aggregate with a full recompute")
+    args = parser.parse_args()
+
+    if not args.rebuild and not args.check:
+        parser.error("Nothing to do, pass --check and/or --rebuild")
+
+    session = get_session(schema="bench29")
+    try:
+        if args.rebuild:
+            rebuild_leaderboard_rank_counts(session, verbose=True)
+        if args.check:
+            mismatches = check_leaderboard_rank_counts(session, verbose=True)
+            if mismatches:
+                sys.exit(1)
+    finally:
+        session.close()
+
+if __name__ == "__main__":
+    main()
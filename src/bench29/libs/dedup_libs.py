@@ -0,0 +1,150 @@
+"""
+Deduplication utilities for judge runs.
+Groups differential diagnoses that produce the same judge input so that each
+unique input is sent to the LLM once and the result is fanned out to every row.
+"""
+
+import re
+import hashlib
+import unicodedata
+from typing import Dict, List, Any, Optional, Callable
+
+# Precompiled patterns used by normalize_judge_input
+_HORIZONTAL_SPACE_RE = re.compile(r'[ \t\f\v]+')
+_BLANK_LINES_RE = re.compile(r'\n{2,}')
+
+def normalize_judge_input(text: Optional[str]) -> str:
+    """
+    Normalize a judge input so that texts differing only in formatting noise
+    (unicode forms, line endings, repeated spaces, blank lines, surrounding
+    whitespace) map to the same string.
+
+    Args:
+        text: Raw text sent to the judge (diagnosis or gold diagnosis)
+
+    Returns:
+        Normalized text, or an empty string for None/empty input
+    """
+    if not text:
+        return ""
+
+    text = unicodedata.normalize("NFKC", text)
+    text = text.replace("\r\n", "\n").replace("\r", "\n")
+    lines = [_HORIZONTAL_SPACE_RE.sub(" ", line).strip() for line in text.split("\n")]
+    text = "\n".join(lines)
+    text = _BLANK_LINES_RE.sub("\n", text)
+
+    return text.strip()
+
+def hash_judge_input(diagnosis_text: Optional[str], gold_diagnosis: Optional[str] = None) -> str:
+    """
+    Hash the normalized judge input.
+
+    Args:
+        diagnosis_text: The differential diagnosis text
+        gold_diagnosis: Optional gold diagnosis (relationship judging only)
+
+    Returns:
+        Hex SHA-256 digest identifying the judge input
+    """
+    parts = [normalize_judge_input(diagnosis_text)]
+    if gold_diagnosis is not None:
+        parts.append(normalize_judge_input(gold_diagnosis))
+
+    # Unit separator keeps ("a", "bc") and ("ab", "c") apart
+    payload = "\x1f".join(parts).encode("utf-8")
+    return hashlib.sha256(payload).hexdigest()
+
+def group_by_judge_input(
+    diagnoses: List[Any],
+    text_getter: Callable[[Any], Optional[str]] = lambda d: d.diagnosis,
+    gold_getter: Optional[Callable[[Any], Optional[str]]] = None,
+    verbose: bool = False
+) -> Dict[str, List[Any]]:
+    """
+    Group diagnosis records by the hash of their judge input.
+    The first record of each group is the one sent to the judge.
+
+    Args:
+        diagnoses: List of diagnosis records
+        text_getter: Function returning the diagnosis text of a record
+        gold_getter: Optional function returning the gold diagnosis of a record
+        verbose: Whether to print status information
+
+    Returns:
+        Dictionary mapping input hash to the list of records sharing it,
+        in first-seen order
+    """
+    groups = {}
+
+    for diagnosis in diagnoses:
+        gold = gold_getter(diagnosis) if gold_getter else None
+        key = hash_judge_input(text_getter(diagnosis), gold)
+        groups.setdefault(key, []).append(diagnosis)
+
+    if verbose:
+        print(f"Grouped {len(diagnoses)} diagnoses into {len(groups)} unique judge inputs")
+
+    return groups
+
+def fan_out_result(result: Dict[str, Any], diagnosis, representative) -> Dict[str, Any]:
+    """
+    Copy a judge result computed for a representative onto a duplicate row.
+
+    Args:
+        result: Result dictionary returned for the representative
+        diagnosis: The duplicate diagnosis record receiving the result
+        representative: The diagnosis record that was actually judged
+
+    Returns:
+        New result dictionary pointing at the duplicate row
+    """
+    fanned = dict(result)
+    fanned["case_id"] = diagnosis.cases_bench_id
+    fanned["diagnosis_id"] = diagnosis.id
+    fanned["deduplicated_from"] = representative.id
+
+    # Per-row artifacts belong to the representative only
+    fanned.pop("db_record_ids", None)
+    fanned.pop("filepath", None)
+
+    return fanned
+
+def build_dedup_report(groups: Dict[str, List[Any]]) -> Dict[str, Any]:
+    """
+    Summarize how many judge calls deduplication saves.
+
+    Args:
+        groups: Output of group_by_judge_input
+
+    Returns:
+        Dictionary with row, unique input and saved call counts
+    """
+    total_rows = sum(len(rows) for rows in groups.values())
+    unique_inputs = len(groups)
+    calls_saved = total_rows - unique_inputs
+
+    group_sizes = sorted((len(rows) for rows in groups.values()), reverse=True)
+
+    return {
+        "total_rows": total_rows,
+        "unique_inputs": unique_inputs,
+        "calls_saved": calls_saved,
+        "saved_fraction": (calls_saved / total_rows) if total_rows else 0.0,
+        "duplicated_inputs": sum(1 for size in group_sizes if size > 1),
+        "largest_groups": group_sizes[:5]
+    }
+
+def print_dedup_report(report: Dict[str, Any]) -> None:
+    """
+    Print a dedup report produced by build_dedup_report.
+
+    Args:
+        report: Dedup report dictionary
+    """
+    print("Judge input deduplication:")
+    print(f"  Rows: {report['total_rows']}")
+    print(f"  Unique inputs: {report['unique_inputs']}")
+    print(f"  Calls saved: {report['calls_saved']} ({report['saved_fraction']:.1%})")
+    if report["duplicated_inputs"]:
+        print(f"  Inputs shared by several rows: {report['duplicated_inputs']} (largest groups: {report['largest_groups']})")
@@ -130,6 +130,7 @@ def run_severity_judge(
             "diagnosis_id": llm_diagnosis_id,
             "model_alias": model_alias,
             "error": str(e),
+            "error_class": type(e).__name__,
             "elapsed_time": elapsed_time
         }
         
@@ -0,0 +1,78 @@
+"""
+Failure replay utilities for bench29 runners.
+Reads the summary written by a previous run and builds the work list of
+diagnoses that failed, so transient failures can be retried without
+re-scanning the whole diagnosis set.
+"""
+
+import json
+from collections import Counter
+from typing import Dict, Any
+
+FAILED_STATUSES = ("error", "worker_error")
+
+def load_failed_items(summary_path: str, verbose: bool = False) -> Dict[int, Dict[str, Any]]:
+    """
+    Load the failed items of a run summary.
+    A diagnosis that also has a successful result in the same summary is skipped.
+
+    Args:
+        summary_path: Path to a severity_summary_*.json file (per-shard or merged)
+        verbose: Whether to print status information
+
+    Returns:
+        Dictionary mapping diagnosis id to its failure (status, error, error_class)
+    """
+    with open(summary_path, 'r', encoding='utf-8') as f:
+        summary = json.load(f)
+
+    failed = {}
+    succeeded = set()
+
+    for result in summary.get("results", []):
+        diagnosis_id = result.get("diagnosis_id")
+        if diagnosis_id is None:
+            continue
+
+        if result.get("status") in FAILED_STATUSES:
+            failed[diagnosis_id] = {
+                "status": result.get("status"),
+                "error": result.get("error"),
+                # Summaries written before error classes were recorded
+                "error_class": result.get("error_class", "unknown")
+            }
+        else:
+            succeeded.add(diagnosis_id)
+
+    for diagnosis_id in succeeded:
+        failed.pop(diagnosis_id, None)
+
+    if verbose:
+        print(f"Loaded {len(failed)} failed diagnoses from {summary_path} ({len(succeeded)} succeeded)")
+
+    return failed
+
+def count_error_classes(failures: Dict[int, Dict[str, Any]]) -> Dict[str, int]:
+    """
+    Count failures per error class.
+
+    Args:
+        failures: Output of load_failed_items
+
+    Returns:
+        Dictionary mapping error class to count, most frequent first
+    """
+    counts = Counter(failure["error_class"] for failure in failures.values())
+    return dict(counts.most_common())
+
+def print_replay_plan(failures: Dict[int, Dict[str, Any]], summary_path: str) -> None:
+    """
+    Print what a replay run is going to retry.
+
+    Args:
+        failures: Output of load_failed_items
+        summary_path: Summary the failures were read from
+    """
+    print(f"Replaying {len(failures)} failed diagnoses from {summary_path}")
+    for error_class, count in count_error_classes(failures).items():
+        print(f"  {error_class}: {count}")
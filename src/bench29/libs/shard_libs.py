@@ -0,0 +1,283 @@
+"""
+Sharding utilities for bench29 runners.
+Splits the diagnosis set deterministically so N independent processes or
+machines can work against the same database without overlapping, each with
+its own progress checkpoint and summary file.
+"""
+
+import os
+import sys
+import json
+import hashlib
+import argparse
+from typing import Dict, List, Any, Optional, Tuple, Callable, Set
+
+def parse_shard(spec: Optional[str]) -> Optional[Tuple[int, int]]:
+    """
+    Parse a shard specification of the form "i/N".
+
+    Args:
+        spec: Shard specification (e.g. "0/4"), or None for no sharding
+
+    Returns:
+        Tuple of (shard_index, shard_count), or None if spec is empty
+
+    Raises:
+        ValueError: If the specification is malformed or out of range
+    """
+    if not spec:
+        return None
+
+    try:
+        index_str, count_str = spec.split("/")
+        index, count = int(index_str), int(count_str)
+    except ValueError:
+        raise ValueError(f"Invalid shard '{spec}', expected the form i/N (e.g. 0/4)")
+
+    if count < 1 or not 0 <= index < count:
+        raise ValueError(f"Invalid shard '{spec}', index must satisfy 0 <= i < N")
+
+    return index, count
+
+def shard_argument(spec: str) -> Tuple[int, int]:
+    """
+    argparse type wrapper around parse_shard.
+
+    Args:
+        spec: Shard specification from the command line
+
+    Returns:
+        Tuple of (shard_index, shard_count)
+    """
+    try:
+        return parse_shard(spec)
+    except ValueError as e:
+        raise argparse.ArgumentTypeError(str(e))
+
+def get_shard_arg(argv: Optional[List[str]] = None) -> Optional[Tuple[int, int]]:
+    """
+    Read an optional --shard i/N argument for scripts without an argument parser.
+
+    Args:
+        argv: Argument list (defaults to sys.argv[1:])
+
+    Returns:
+        Tuple of (shard_index, shard_count), or None if not given
+    """
+    parser = argparse.ArgumentParser(add_help=False)
+    parser.add_argument("--shard", type=shard_argument, default=None)
+    args, _ = parser.parse_known_args(sys.argv[1:] if argv is None else argv)
+    return args.shard
+
+def shard_of(item_id: int, shard_count: int) -> int:
+    """
+    Deterministically map an id to a shard.
+    Uses a stable hash so every process and machine agrees, unlike hash().
+
+    Args:
+        item_id: Diagnosis id
+        shard_count: Total number of shards
+
+    Returns:
+        Shard index in [0, shard_count)
+    """
+    digest = hashlib.blake2b(str(item_id).encode("ascii"), digest_size=8).digest()
+    return int.from_bytes(digest, "big") % shard_count
+
+def filter_shard(
+    items: List[Any],
+    shard: Optional[Tuple[int, int]],
+    key: Callable[[Any], int] = lambda d: d.id,
+    verbose: bool = False
+) -> List[Any]:
+    """
+    Keep only the items that belong to the given shard.
+
+    Args:
+        items: Records to filter
+        shard: Tuple of (shard_index, shard_count), or None to keep everything
+        key: Function returning the id used for sharding
+        verbose: Whether to print status information
+
+    Returns:
+        List of items in the shard
+    """
+    if shard is None:
+        return items
+
+    index, count = shard
+    selected = [item for item in items if shard_of(key(item), count) == index]
+
+    if verbose:
+        print(f"Shard {index}/{count}: {len(selected)} of {len(items)} items")
+
+    return selected
+
+def load_shard(
+    query,
+    shard: Optional[Tuple[int, int]],
+    id_column,
+    limit: Optional[int] = None,
+    batch_size: int = 1000,
+    verbose: bool = False
+) -> List[Any]:
+    """
+    Load the records of a query that belong to the given shard.
+    The stable hash of shard_of cannot be evaluated in SQL, so only the ids of
+    the filtered set are read to pick the shard, and the full rows are loaded
+    for the shard's ids alone, in id order and in batches.
+
+    Args:
+        query: SQLAlchemy query of the records, with its filters applied
+        shard: Tuple of (shard_index, shard_count), or None to load everything
+        id_column: Column holding the id used for sharding (e.g. LlmDiagnosis.id)
+        limit: Optional limit on the number of records, applied after sharding
+               so a shard does not depend on it
+        batch_size: Ids per IN (...) query
+        verbose: Whether to print status information
+
+    Returns:
+        List of records in the shard
+    """
+    if shard is None:
+        if limit is not None:
+            query = query.limit(limit)
+        return query.all()
+
+    ids = [item_id for item_id, in query.with_entities(id_column).order_by(id_column)]
+    ids = filter_shard(ids, shard, key=lambda item_id: item_id, verbose=verbose)
+    if limit is not None:
+        ids = ids[:limit]
+
+    records = []
+    for start in range(0, len(ids), batch_size):
+        batch = ids[start:start + batch_size]
+        records.extend(query.filter(id_column.in_(batch)).order_by(id_column).all())
+    return records
+
+def shard_suffix(shard: Optional[Tuple[int, int]]) -> str:
+    """
+    File name suffix identifying a shard.
+
+    Args:
+        shard: Tuple of (shard_index, shard_count), or None
+
+    Returns:
+        Suffix such as "_shard0of4", or an empty string when not sharded
+    """
+    if shard is None:
+        return ""
+    index, count = shard
+    return f"_shard{index}of{count}"
+
+def get_checkpoint_path(output_dir: str, shard: Optional[Tuple[int, int]] = None, name: str = "severity") -> str:
+    """
+    Path of the progress checkpoint for a run (one file per shard).
+
+    Args:
+        output_dir: Directory where run outputs are stored
+        shard: Tuple of (shard_index, shard_count), or None
+        name: Runner name used as file prefix
+
+    Returns:
+        Path to the JSONL checkpoint file
+    """
+    return os.path.join(output_dir, f"{name}_progress{shard_suffix(shard)}.jsonl")
+
+def load_checkpoint(checkpoint_path: str, verbose: bool = False) -> Set[int]:
+    """
+    Load the ids of diagnoses already completed successfully.
+
+    Args:
+        checkpoint_path: Path to the JSONL checkpoint file
+        verbose: Whether to print status information
+
+    Returns:
+        Set of completed diagnosis ids
+    """
+    completed = set()
+
+    if not os.path.exists(checkpoint_path):
+        return completed
+
+    with open(checkpoint_path, 'r', encoding='utf-8') as f:
+        for line in f:
+            line = line.strip()
+            if not line:
+                continue
+            try:
+                entry = json.loads(line)
+            except json.JSONDecodeError:
+                # A run killed mid-write can leave a truncated last line
+                continue
+            if entry.get("status") not in ("error", "worker_error"):
+                completed.add(entry["diagnosis_id"])
+
+    if verbose:
+        print(f"Loaded {len(completed)} completed diagnoses from {checkpoint_path}")
+
+    return completed
+
+def append_checkpoint(checkpoint_path: str, result: Dict[str, Any]) -> None:
+    """
+    Record a finished diagnosis in the checkpoint file.
+
+    Args:
+        checkpoint_path: Path to the JSONL checkpoint file
+        result: Result dictionary with diagnosis_id and status
+    """
+    entry = {
+        "diagnosis_id": result.get("diagnosis_id"),
+        "status": result.get("status", "success")
+    }
+    with open(checkpoint_path, 'a', encoding='utf-8') as f:
+        f.write(json.dumps(entry) + '\n')
+
+def merge_shard_summaries(summary_paths: List[str], verbose: bool = False) -> Dict[str, Any]:
+    """
+    Merge the summary files written by the shards of a run.
+    If a diagnosis appears in several summaries, a successful result wins.
+
+    Args:
+        summary_paths: Paths to the per-shard summary JSON files
+        verbose: Whether to print status information
+
+    Returns:
+        Merged summary dictionary
+    """
+    results_by_id = {}
+    merged = {
+        "shards": [],
+        "model_alias": None,
+        "total_diagnoses": 0,
+        "dedup": {"total_rows": 0, "unique_inputs": 0, "calls_saved": 0}
+    }
+
+    for path in summary_paths:
+        with open(path, 'r', encoding='utf-8') as f:
+            summary = json.load(f)
+
+        merged["shards"].append(summary.get("shard"))
+        merged["model_alias"] = merged["model_alias"] or summary.get("model_alias")
+        merged["total_diagnoses"] += summary.get("total_diagnoses", 0)
+
+        for key in merged["dedup"]:
+            merged["dedup"][key] += (summary.get("dedup") or {}).get(key, 0)
+
+        for result in summary.get("results", []):
+            diagnosis_id = result.get("diagnosis_id")
+            previous = results_by_id.get(diagnosis_id)
+            if previous is None or previous.get("status") in ("error", "worker_error"):
+                results_by_id[diagnosis_id] = result
+
+        if verbose:
+            print(f"Merged {path}")
+
+    results = list(results_by_id.values())
+    errors = sum(1 for r in results if r.get("status") in ("error", "worker_error"))
+
+    merged["successful"] = len(results) - errors
+    merged["errors"] = errors
+    merged["results"] = results
+
+    return merged
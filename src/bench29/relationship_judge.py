@@ -15,10 +15,14 @@ from db.utils.db_utils import get_session
 from db.backward_comp_models import * 
 from hoarder29.libs.parser_libs import *
 from lapin.handlers.base_handler import ModelHandler
+from bench29.libs.shard_libs import get_shard_arg, load_shard
+from libs.progress_libs import ProgressReporter, estimate_tokens
+from bench29.libs.dedup_libs import group_by_judge_input, build_dedup_report, print_dedup_report
 
 session = get_session()
 
-diagnoses = session.query(LlmDiagnosis).all()
+# Optional --shard i/N to split the work across processes or machines
+diagnoses = load_shard(session.query(LlmDiagnosis), get_shard_arg(), LlmDiagnosis.id, verbose=verbose)
 if verbose:
 	print(f"Found {len(diagnoses)} diagnoses to process")
 
@@ -72,19 +76,30 @@ Please structure your response as a JSON object with the following format:
 Provide only the JSON response without additional text."""
 
 
-for diagnosis in diagnoses:
+def get_correct_diagnosis(diagnosis):
+	# For this script, you would also need the correct diagnosis
+	# This is just a placeholder - you'll need to modify how you get the correct diagnosis
+	return diagnosis.correct_diagnosis if hasattr(diagnosis, 'correct_diagnosis') else "Unknown"
+
+
+# Judge each unique (diagnosis text, correct diagnosis) pair only once
+groups = group_by_judge_input(diagnoses, gold_getter=get_correct_diagnosis, verbose=verbose)
+print_dedup_report(build_dedup_report(groups))
+
+progress = ProgressReporter("relationship-judge", total=len(diagnoses))
+
+for group in groups.values():
+	diagnosis = group[0]
 	print("high")
 	# Check if diagnosis has text
 	dtext = diagnosis.diagnosis
-	
-	# For this script, you would also need the correct diagnosis
-	# This is just a placeholder - you'll need to modify how you get the correct diagnosis
-	correct_diagnosis = diagnosis.correct_diagnosis if hasattr(diagnosis, 'correct_diagnosis') else "Unknown"
+	correct_diagnosis = get_correct_diagnosis(diagnosis)
 	
 	if not dtext:
 		if verbose:
 			print(f"  Diagnosis ID {diagnosis.id} has empty text, skipping")
-		diagnoses_processed += 1
+		diagnoses_processed += len(group)
+		progress.update(len(group))
 		continue
 
 	print("\n")
@@ -103,15 +118,21 @@ for diagnosis in diagnoses:
 	response = handler.get_response(model, query)
 	print(response)
 	
+	# Fan the response out to every diagnosis sharing this input
+	if verbose and len(group) > 1:
+		print(f"  Reusing response for diagnosis IDs {[d.id for d in group[1:]]}")
+	
 	# Uncomment to process just the first diagnosis
 	# exit()
 	
-	diagnoses_processed += 1
+	diagnoses_processed += len(group)
+	progress.update(len(group), tokens=estimate_tokens(str(response)))
 	
 	# Add a break condition if needed
 	# if diagnoses_processed >= 10:
 	#     break
 
+progress.close()
 print(f"Processed {diagnoses_processed} diagnoses")
 print(f"Added {ranks_added} ranks")
 print(f"Had {parse_failures} parse failures")
@@ -15,6 +15,7 @@ sys.path.append(os.path.join(os.path.dirname(os.path.abspath(__file__)), '../../
 
 from db.utils.db_utils import get_session
 from db.bench29.bench29_models import LlmDifferentialDiagnosis
+from db.bench29.bench29_views import refresh_llm_analysis_view
 from db.llm.llm_models import Models
 from bench29.libs.parser_libs import (
     load_differential_diagnosis_from_file, 
@@ -23,11 +24,30 @@ from bench29.libs.parser_libs import (
 )
 from bench29.libs.severity_judge_libs import (
     run_severity_judge,
-    load_severity_prompt_template
+    load_severity_prompt_template,
+    save_severity_to_database
 )
 from bench29.libs.judge_libs import get_max_threads
+from libs.paralell_libs import get_alias_limiter
+from libs.progress_libs import ProgressReporter, estimate_tokens
+from bench29.libs.dedup_libs import (
+    group_by_judge_input,
+    fan_out_result,
+    build_dedup_report,
+    print_dedup_report
+)
+from bench29.libs.replay_libs import load_failed_items, print_replay_plan
+from bench29.libs.shard_libs import (
+    shard_argument,
+    load_shard,
+    shard_suffix,
+    get_checkpoint_path,
+    load_checkpoint,
+    append_checkpoint,
+    merge_shard_summaries
+)
 
-def load_differential_diagnoses(session, case_ids=None, model_id=None, prompt_id=None, limit=None, verbose=False):
+def load_differential_diagnoses(session, case_ids=None, model_id=None, prompt_id=None, limit=None, diagnosis_ids=None, shard=None, verbose=False):
     """
     Load differential diagnoses from database.
     
@@ -36,7 +56,9 @@ def load_differential_diagnoses(session, case_ids=None, model_id=None, prompt_id
         case_ids: Optional list of case IDs to filter by
         model_id: Optional model ID to filter by
         prompt_id: Optional prompt ID to filter by
-        limit: Optional limit on number of diagnoses to retrieve
+        limit: Optional limit on number of diagnoses to retrieve, applied after sharding
+        diagnosis_ids: Optional list of diagnosis IDs to filter by
+        shard: Optional (shard_index, shard_count) tuple, see shard_libs
         verbose: Whether to print status information
         
     Returns:
@@ -51,21 +73,24 @@ def load_differential_diagnoses(session, case_ids=None, model_id=None, prompt_id
     # Apply filters
     if case_ids:
         query = query.filter(LlmDifferentialDiagnosis.cases_bench_id.in_(case_ids))
+    if diagnosis_ids is not None:
+        query = query.filter(LlmDifferentialDiagnosis.id.in_(diagnosis_ids))
     if model_id is not None:
         query = query.filter(LlmDifferentialDiagnosis.model_id == model_id)
     if prompt_id is not None:
         query = query.filter(LlmDifferentialDiagnosis.prompt_id == prompt_id)
-    if limit is not None:
-        query = query.limit(limit)
-        
-    # Execute query
-    diagnoses = query.all()
+    # Shard the full filtered set in id order, then limit, so a shard does not
+    # depend on --limit and the shards of different runs line up
+    diagnoses = load_shard(query, shard, LlmDifferentialDiagnosis.id, limit=limit, verbose=verbose)
     
     if verbose:
         print(f"Loaded {len(diagnoses)} differential diagnoses")
         
     return diagnoses
 
+# Ceiling for adaptive concurrency when --threads is not given
+DEFAULT_MAX_CONCURRENCY = 64
+
 def process_diagnoses_parallel(
     diagnoses, 
     model_alias, 
@@ -73,30 +98,57 @@ def process_diagnoses_parallel(
     prompt_id=None,
     max_workers=None, 
     save_to_db=True,
+    dedup=True,
+    checkpoint_path=None,
+    adaptive=True,
+    progress_events=None,
     verbose=False
 ):
     """
     Process differential diagnoses in parallel.
     
+    When dedup is enabled, diagnoses with the same normalized judge input are
+    judged once and the result is fanned out to every diagnosis in the group.
+    When adaptive is enabled, the number of in-flight requests for the model
+    alias is driven by an AIMD controller (up to max_workers) instead of
+    being fixed at the pool size.
+    
     Args:
         diagnoses: List of differential diagnosis records
         model_alias: Alias of the model to use for severity judgments
         output_dir: Directory to save results
         prompt_id: Optional ID of a prompt to use
-        max_workers: Maximum number of parallel workers (default: 75% of CPU cores)
+        max_workers: Maximum number of parallel workers (default: 75% of CPU cores,
+                     or DEFAULT_MAX_CONCURRENCY when adaptive)
         save_to_db: Whether to save results to database
+        dedup: Whether to judge each unique input only once
+        checkpoint_path: Optional JSONL file where finished diagnoses are recorded
+        adaptive: Whether to adapt concurrency to provider latency and errors
+        progress_events: Optional NDJSON file for progress events ("-" for stdout)
         verbose: Whether to print status information
         
     Returns:
-        List of result dictionaries
+        Tuple of (list of result dictionaries, dedup report or None, concurrency metrics or None)
     """
     import concurrent.futures
     
     if max_workers is None:
-        max_workers = get_max_threads(0.75)
+        max_workers = DEFAULT_MAX_CONCURRENCY if adaptive else get_max_threads(0.75)
+    
+    # The pool only bounds concurrency; the limiter decides how many requests are in flight
+    limiter = get_alias_limiter(model_alias, max_limit=max_workers) if adaptive else None
+    
+    # Group diagnoses sharing the same judge input
+    if dedup:
+        groups = group_by_judge_input(diagnoses, verbose=verbose)
+        dedup_report = build_dedup_report(groups)
+        print_dedup_report(dedup_report)
+    else:
+        groups = {d.id: [d] for d in diagnoses}
+        dedup_report = None
         
     if verbose:
-        print(f"Processing {len(diagnoses)} diagnoses with {max_workers} workers")
+        print(f"Processing {len(groups)} diagnoses with {max_workers} workers")
         
     # Create handler
     from lapin.handlers.base_handler import ModelHandler
@@ -107,11 +159,30 @@ def process_diagnoses_parallel(
     
     results = []
     
+    # Progress is counted per diagnosis row, fanned-out duplicates included
+    progress = ProgressReporter(
+        "severity-judge",
+        total=sum(len(rows) for rows in groups.values()),
+        events_path=progress_events,
+        extra=limiter.metrics if limiter is not None else None,
+        extra_prefix="limiter_"
+    )
+    
+    def record(result):
+        results.append(result)
+        if checkpoint_path:
+            append_checkpoint(checkpoint_path, result)
+    
     # Define worker function
     def process_diagnosis(diagnosis):
         if verbose:
             print(f"Processing diagnosis {diagnosis.id} for case {diagnosis.cases_bench_id}")
             
+        if limiter is not None:
+            limiter.acquire()
+        progress.start_item()
+        start_time = time.time()
+        
         try:
             # Run severity judge
             result = run_severity_judge(
@@ -125,63 +196,141 @@ def process_diagnoses_parallel(
                 save_to_db=save_to_db,
                 verbose=verbose
             )
-            
-            return result
         except Exception as e:
             if verbose:
                 print(f"Error processing diagnosis {diagnosis.id}: {str(e)}")
                 
-            return {
+            result = {
                 "status": "error",
                 "case_id": diagnosis.cases_bench_id,
                 "diagnosis_id": diagnosis.id,
-                "error": str(e)
+                "error": str(e),
+                "error_class": type(e).__name__
             }
+        
+        if limiter is not None:
+            limiter.release(result.get("elapsed_time", time.time() - start_time), error=result.get("error"))
+            result["concurrency"] = limiter.metrics()["concurrency"]
+        
+        progress.finish_item(
+            error=result.get("status") == "error",
+            tokens=estimate_tokens(result.get("raw_response"))
+        )
+            
+        return result
     
-    # Process in parallel
-    with concurrent.futures.ThreadPoolExecutor(max_workers=max_workers) as executor:
-        future_to_diagnosis = {executor.submit(process_diagnosis, d): d for d in diagnoses}
-        
-        for future in concurrent.futures.as_completed(future_to_diagnosis):
-            diagnosis = future_to_diagnosis[future]
-            try:
-                result = future.result()
-                results.append(result)
+    # Copy a representative's result onto the rest of its group (main thread only)
+    fan_out_session = get_session() if (dedup and save_to_db) else None
+    
+    def fan_out(result, group):
+        representative = group[0]
+        for duplicate in group[1:]:
+            fanned = fan_out_result(result, duplicate, representative)
+            
+            if fan_out_session is not None and fanned.get("status") not in ("error", "worker_error"):
+                fanned["db_record_ids"] = save_severity_to_database(
+                    duplicate.cases_bench_id,
+                    duplicate.id,
+                    fanned.get("severity_evaluations", []),
+                    fan_out_session,
+                    verbose=verbose
+                )
                 
-                if verbose:
-                    print(f"Completed diagnosis {diagnosis.id} for case {diagnosis.cases_bench_id}")
-            except Exception as e:
-                if verbose:
-                    print(f"Worker error for diagnosis {diagnosis.id}: {str(e)}")
+            record(fanned)
+        
+        if len(group) > 1:
+            progress.update(len(group) - 1, errors=(len(group) - 1) if result.get("status") in ("error", "worker_error") else 0)
+    
+    # Process in parallel
+    try:
+        with concurrent.futures.ThreadPoolExecutor(max_workers=max_workers) as executor:
+            future_to_group = {executor.submit(process_diagnosis, rows[0]): rows for rows in groups.values()}
+            
+            for future in concurrent.futures.as_completed(future_to_group):
+                group = future_to_group[future]
+                diagnosis = group[0]
+                try:
+                    result = future.result()
+                    
+                    if verbose:
+                        print(f"Completed diagnosis {diagnosis.id} for case {diagnosis.cases_bench_id}")
+                except Exception as e:
+                    if verbose:
+                        print(f"Worker error for diagnosis {diagnosis.id}: {str(e)}")
+                    progress.finish_item(error=True)
+                        
+                    result = {
+                        "status": "worker_error",
+                        "case_id": diagnosis.cases_bench_id,
+                        "diagnosis_id": diagnosis.id,
+                        "error": str(e),
+                        "error_class": type(e).__name__
+                    }
                     
-                results.append({
-                    "status": "worker_error",
-                    "case_id": diagnosis.cases_bench_id,
-                    "diagnosis_id": diagnosis.id,
-                    "error": str(e)
-                })
-    
-    return results
+                record(result)
+                fan_out(result, group)
+    finally:
+        if fan_out_session is not None:
+            fan_out_session.close()
+        progress.close()
+    
+    concurrency_metrics = limiter.metrics() if limiter is not None else None
+    if concurrency_metrics and verbose:
+        print(f"Final concurrency for {model_alias}: {concurrency_metrics['concurrency']} (peak {concurrency_metrics['peak_concurrency']}, {concurrency_metrics['backoffs']} backoffs)")
+    
+    return results, dedup_report, concurrency_metrics
 
 def main():
     """Main function to run severity judge."""
     parser = argparse.ArgumentParser(description="Run severity judge on differential diagnoses")
-    parser.add_argument("--model", required=True, help="Model alias to use for severity judgments")
+    parser.add_argument("--model", help="Model alias to use for severity judgments")
     parser.add_argument("--output-dir", required=True, help="Directory to save results")
     parser.add_argument("--case-ids", type=int, nargs="+", help="Specific case IDs to process")
     parser.add_argument("--model-id", type=int, help="Filter by model ID")
     parser.add_argument("--prompt-id", type=int, help="ID of prompt to use")
-    parser.add_argument("--limit", type=int, help="Limit number of diagnoses to process")
-    parser.add_argument("--threads", type=int, help="Number of parallel threads to use")
+    parser.add_argument("--limit", type=int, help="Limit number of diagnoses to process (applied after --shard)")
+    parser.add_argument("--threads", type=int, help="Number of parallel threads to use (upper bound when concurrency is adaptive)")
+    parser.add_argument("--fixed-concurrency", action="store_true", help="Keep every thread busy instead of adapting concurrency to the provider")
     parser.add_argument("--no-save-db", action="store_true", help="Don't save results to database")
+    parser.add_argument("--no-refresh-view", action="store_true", help="Don't refresh the llm_analysis materialized view after the run")
+    parser.add_argument("--no-dedup", action="store_true", help="Judge every diagnosis even if its input duplicates another")
+    parser.add_argument("--shard", type=shard_argument, help="Only process shard i of N (hash of diagnosis id), e.g. 0/4")
+    parser.add_argument("--replay-failures", metavar="SUMMARY", help="Only re-run the diagnoses that failed in this summary file")
+    parser.add_argument("--merge-shards", nargs="+", metavar="SUMMARY", help="Merge per-shard summary files into one summary and exit")
+    parser.add_argument("--progress-events", help="Append NDJSON progress events to this file (\"-\" for stdout)")
     parser.add_argument("--verbose", action="store_true", help="Print verbose output")
     
     args = parser.parse_args()
     
+    if args.merge_shards:
+        merged = merge_shard_summaries(args.merge_shards, verbose=args.verbose)
+        merged["timestamp"] = datetime.datetime.now().isoformat()
+        
+        os.makedirs(args.output_dir, exist_ok=True)
+        summary_path = os.path.join(args.output_dir, f"severity_summary_merged_{datetime.datetime.now().strftime('%Y%m%d%H%M%S')}.json")
+        with open(summary_path, 'w', encoding='utf-8') as f:
+            json.dump(merged, f, indent=2)
+        
+        print(f"Merged {len(args.merge_shards)} shard summaries: {merged['successful']} successful, {merged['errors']} errors.")
+        print(f"Summary saved to {summary_path}")
+        return
+    
+    if not args.model:
+        parser.error("--model is required unless --merge-shards is given")
+    
     # Create database session
     session = get_session()
     
     try:
+        # Restrict the work list to previous failures when replaying
+        failures = None
+        if args.replay_failures:
+            failures = load_failed_items(args.replay_failures, verbose=args.verbose)
+            print_replay_plan(failures, args.replay_failures)
+            if not failures:
+                print("Nothing to replay")
+                return
+        
         # Load diagnoses
         diagnoses = load_differential_diagnoses(
             session,
@@ -189,24 +338,46 @@ def main():
             model_id=args.model_id,
             prompt_id=args.prompt_id,
             limit=args.limit,
+            diagnosis_ids=list(failures) if failures else None,
+            shard=args.shard,
             verbose=args.verbose
         )
         
+        # Skip the diagnoses of this shard already completed by a previous run
+        os.makedirs(args.output_dir, exist_ok=True)
+        checkpoint_path = get_checkpoint_path(args.output_dir, args.shard)
+        completed = load_checkpoint(checkpoint_path, verbose=args.verbose)
+        if completed:
+            remaining = [d for d in diagnoses if d.id not in completed]
+            print(f"Skipping {len(diagnoses) - len(remaining)} diagnoses already completed according to {checkpoint_path}")
+            diagnoses = remaining
+        
         if not diagnoses:
             print("No diagnoses found with the specified criteria")
             return
             
         # Process diagnoses in parallel
-        results = process_diagnoses_parallel(
+        results, dedup_report, concurrency_metrics = process_diagnoses_parallel(
             diagnoses,
             args.model,
             args.output_dir,
             prompt_id=args.prompt_id,
             max_workers=args.threads,
             save_to_db=not args.no_save_db,
+            dedup=not args.no_dedup,
+            checkpoint_path=checkpoint_path,
+            adaptive=not args.fixed_concurrency,
+            progress_events=args.progress_events,
             verbose=args.verbose
         )
         
+        # Keep the error class each replayed diagnosis failed with before
+        if failures:
+            for result in results:
+                previous = failures.get(result.get("diagnosis_id"))
+                if previous:
+                    result["previous_error_class"] = previous["error_class"]
+        
         # Print summary
         success_count = sum(1 for r in results if r.get("status") != "error" and r.get("status") != "worker_error")
         error_count = len(results) - success_count
@@ -217,17 +388,25 @@ def main():
         summary = {
             "timestamp": datetime.datetime.now().isoformat(),
             "model_alias": args.model,
+            "shard": list(args.shard) if args.shard else None,
+            "replayed_from": args.replay_failures,
             "total_diagnoses": len(diagnoses),
             "successful": success_count,
             "errors": error_count,
+            "dedup": dedup_report,
+            "concurrency": concurrency_metrics,
             "results": results
         }
         
-        summary_path = os.path.join(args.output_dir, f"severity_summary_{datetime.datetime.now().strftime('%Y%m%d%H%M%S')}.json")
+        summary_path = os.path.join(args.output_dir, f"severity_summary{shard_suffix(args.shard)}_{datetime.datetime.now().strftime('%Y%m%d%H%M%S')}.json")
         with open(summary_path, 'w', encoding='utf-8') as f:
             json.dump(summary, f, indent=2)
             
         print(f"Summary saved to {summary_path}")
+        
+        # Make the new severities visible to analysis queries
+        if success_count and not args.no_save_db and not args.no_refresh_view:
+            refresh_llm_analysis_view(session, verbose=args.verbose)
             
     finally:
         # Close database session
@@ -13,10 +13,13 @@ from db.utils.db_utils import get_session
 from db.backward_comp_models import * 
 from hoarder29.libs.parser_libs import *
 from lapin.handlers.base_handler import ModelHandler
+from bench29.libs.shard_libs import get_shard_arg, load_shard
+from libs.progress_libs import ProgressReporter, estimate_tokens
 
 session = get_session()
 
-diagnoses = session.query(LlmDiagnosis).all()
+# Optional --shard i/N to split the work across processes or machines
+diagnoses = load_shard(session.query(LlmDiagnosis), get_shard_arg(), LlmDiagnosis.id, verbose=verbose)
 if verbose:
 	print(f"Found {len(diagnoses)} diagnoses to process")
 
@@ -69,6 +72,8 @@ Please structure your response as a JSON object with the following format:
 Provide only the JSON response without additional text."""
 
 
+progress = ProgressReporter("severity-judge-script", total=len(diagnoses))
+
 for diagnosis in diagnoses:
 	print("high")
 	# Check if diagnosis has text
@@ -77,6 +82,7 @@ for diagnosis in diagnoses:
 		if verbose:
 			print(f"  Diagnosis ID {diagnosis.id} has empty text, skipping")
 		diagnoses_processed += 1
+		progress.update()
 		continue
 
 	print("\n")
@@ -104,11 +110,13 @@ for diagnosis in diagnoses:
 	# exit()
 	
 	diagnoses_processed += 1
+	progress.update(tokens=estimate_tokens(str(response)))
 	
 	# Add a break condition if needed
 	# if diagnoses_processed >= 10:
 	#     break
 
+progress.close()
 print(f"Processed {diagnoses_processed} diagnoses")
 print(f"Added {ranks_added} ranks")
 print(f"Had {parse_failures} parse failures")
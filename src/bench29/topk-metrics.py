@@ -0,0 +1,59 @@
+"""
+Top-k accuracy and MRR report per model and prompt.
+Reads ranked diagnoses and their semantic relationships from the
+llm_analysis materialized view and writes one CSV row per (model, prompt).
+
+Usage:
+    python topk-metrics.py --output topk_metrics.csv
+    python topk-metrics.py --hit-relationships "Exact Synonym" --ks 1 5
+"""
+
+import os
+import sys
+import csv
+import argparse
+
+# Add the parent directory to the Python path
+sys.path.append(os.path.join(os.path.dirname(os.path.abspath(__file__)), '../'))
+
+from db.utils.db_utils import get_session
+from db.db_queries import get_ranked_relationships
+from libs.metrics_libs import DEFAULT_HIT_RELATIONSHIPS, DEFAULT_KS, compute_group_metrics
+
+def main():
+    parser = argparse.ArgumentParser(description="Compute top-k hit rates and MRR per model and prompt")
+    parser.add_argument("--output", default="topk_metrics.csv", help="CSV file to write")
+    parser.add_argument("--hit-relationships", nargs="+", default=list(DEFAULT_HIT_RELATIONSHIPS),
+                        help="Semantic relationships counted as a correct diagnosis")
+    parser.add_argument("--ks", type=int, nargs="+", default=list(DEFAULT_KS), help="Top-k cut-offs")
+    parser.add_argument("--max-rank", type=int, default=10, help="Highest rank kept in the first-correct-rank distribution")
+    parser.add_argument("--model-id", type=int, help="Filter by model ID")
+    parser.add_argument("--prompt-id", type=int, help="Filter by prompt ID")
+    args = parser.parse_args()
+
+    session = get_session(schema="bench29")
+    try:
+        rows = get_ranked_relationships(session, model_id=args.model_id, prompt_id=args.prompt_id)
+    finally:
+        session.close()
+
+    print(f"Loaded {len(rows)} ranked diagnoses, hits: {', '.join(args.hit_relationships)}")
+    results = compute_group_metrics(rows, args.hit_relationships, args.ks, args.max_rank)
+    results.sort(key=lambda r: (r[f"top_{args.ks[0]}"], r["mrr"]), reverse=True)
+
+    if not results:
+        print("No ranked diagnoses found")
+        return
+
+    with open(args.output, 'w', newline='') as f:
+        writer = csv.DictWriter(f, fieldnames=list(results[0].keys()))
+        writer.writeheader()
+        writer.writerows(results)
+
+    print(f"Metrics written to {args.output}")
+    for result in results[:5]:
+        top = ", ".join(f"top-{k} {result[f'top_{k}']:.3f}" for k in args.ks)
+        print(f"  {result['model']} / {result['prompt']}: {top}, MRR {result['mrr']:.3f} (n={result['n']})")
+
+if __name__ == "__main__":
+    main()
@@ -9,7 +9,8 @@ import sys
 # Adjust the system path to include the parent directory
 sys.path.append(os.path.join(os.path.dirname(os.path.abspath(__file__)), '../../'))
 
-from sqlalchemy import Column, Integer, String, Text, DateTime, JSON, ForeignKeyConstraint
+from sqlalchemy import Column, Integer, BigInteger, String, Text, Date, DateTime, JSON, ForeignKeyConstraint, Index
+from sqlalchemy.dialects.postgresql import ARRAY
 from datetime import datetime
 from db.db_conf import Base
 
@@ -19,7 +20,7 @@ from db.prompts.prompts_models import Prompt  # Prompt class from prompts schema
 
     ## TODO: add sqlalchemy relationship() for foreign keys
     ## TODO: add bench table as registry.bench, add casebench_to_bench table as bench29.casebench_to_bench
-    ## TODO: add llmanalysis as a view
+    ## llmanalysis as a view: see bench29_views.py (bench29.llm_analysis_mv)
     ## TODO: add llmanalysis_computed as a view of a view that do mathematical operations on llmanalysis    
     
 
@@ -29,7 +30,11 @@ class CasesBench(Base):
     including original text and metadata.
     """
     __tablename__ = 'cases_bench'
-    __table_args__ = {'schema': 'bench29'}
+    __table_args__ = (
+        # One case per patient file, the conflict target of the per-case inserts
+        Index('cases_bench_source_file_path_idx', 'source_file_path', unique=True),
+        {'schema': 'bench29'},
+    )
     ##TODO: add bench table as registry.bench, add casebench_to_bench table as bench29.casebench_to_bench
     id = Column(Integer, primary_key=True)
     hospital = Column(String(255))
@@ -194,6 +199,147 @@ class LlmAnalysis(Base):
     differential_diagnosis_severity = Column(Integer, nullable=False)
 
 
+class LeaderboardRankCount(Base):
+    """
+    Leaderboard Rank Count table that keeps a running histogram of predicted ranks
+    per model and prompt. It is incremented in the same transaction as every
+    llm_analysis insert, so leaderboard reads only touch one row per rank and group.
+    The ingest pipeline (hoarder29/libs/ingest_libs.py run_ingest) is the only
+    supported writer of llm_analysis; rows written any other way must be followed
+    by leaderboard-aggregates.py --rebuild.
+    """
+    __tablename__ = 'leaderboard_rank_count'
+    __table_args__ = (
+        ForeignKeyConstraint(['model_id'], ['llm.models.id'], ondelete='CASCADE'),
+        ForeignKeyConstraint(['prompt_id'], ['prompts.prompt.id'], ondelete='CASCADE'),
+        {'schema': 'bench29'},
+    )
+
+    model_id = Column(Integer, primary_key=True)
+    prompt_id = Column(Integer, primary_key=True)
+    predicted_rank = Column(Integer, primary_key=True)
+    count = Column(Integer, nullable=False, default=0)
+
+
+class IngestManifest(Base):
+    """
+    Ingest Manifest table that records every result file an ingestion stage has
+    processed, with its size, modification time and content hash, so re-runs only
+    read new or modified files.
+    """
+    __tablename__ = 'ingest_manifest'
+    __table_args__ = {'schema': 'bench29'}
+
+    stage = Column(String(50), primary_key=True)
+    path = Column(String(500), primary_key=True)  # relative to the results directory
+    size = Column(BigInteger, nullable=False)
+    mtime_ns = Column(BigInteger, nullable=False)
+    content_hash = Column(String(64), nullable=False)  # sha256 hex digest
+    ingested_at = Column(DateTime, default=datetime.utcnow)
+
+
+class DxgptDiagnosis(Base):
+    """
+    DxGPT Diagnosis table that stores the differential diagnoses of the DxGPT
+    benchmark runs (data/dxgpt_testing-main/data/diagnoses_{dataset}_{model}.csv).
+    """
+    __tablename__ = 'dxgpt_diagnosis'
+    __table_args__ = {'schema': 'bench29'}
+
+    id = Column(Integer, primary_key=True)
+    source_name = Column(String(255), nullable=False, index=True)  # file name without prefix and extension
+    dataset = Column(String(100))
+    model = Column(String(100))
+    row_index = Column(Integer, nullable=False)
+    gold_diagnoses = Column(JSON)  # list of gold diagnosis names
+    diagnosis = Column(Text)
+
+
+class DxgptScore(Base):
+    """
+    DxGPT Score table that stores the judged score (P0, P1, ...) of every DxGPT
+    benchmark answer (data/dxgpt_testing-main/data/scores_{dataset}_{model}.csv).
+    """
+    __tablename__ = 'dxgpt_score'
+    __table_args__ = {'schema': 'bench29'}
+
+    id = Column(Integer, primary_key=True)
+    source_name = Column(String(255), nullable=False, index=True)
+    dataset = Column(String(100))
+    model = Column(String(100))
+    row_index = Column(Integer, nullable=False)
+    gold_diagnoses = Column(JSON)
+    score = Column(Integer)  # P<n> as n, NULL if unparseable
+
+
+class DxgptAnswer(Base):
+    """
+    DxGPT Answer table that stores the evaluated top-5 answers of the DxGPT
+    hospital cases (DxGPT_answers_eval_DxGPT.csv).
+    """
+    __tablename__ = 'dxgpt_answer'
+    __table_args__ = {'schema': 'bench29'}
+
+    id = Column(Integer, primary_key=True)
+    respondent = Column(String(100))
+    unique_key = Column(String(100), nullable=False, index=True)
+    case_id = Column(String(50), index=True)
+    variant = Column(String(50))  # Simple / Extended
+    answer_date = Column(Date)
+    attempt = Column(Integer)
+    predicted_diagnoses = Column(JSON)  # Dx1..Dx5
+    true_diagnosis = Column(Text)
+    eval_top1 = Column(Integer)
+    eval_top5 = Column(Integer)
+
+
+class DxgptCaseMetadata(Base):
+    """
+    DxGPT Case Metadata table that stores the type, gold diagnosis and complexity
+    of the DxGPT hospital cases (DxGPT_casos_metadata.csv).
+    """
+    __tablename__ = 'dxgpt_case_metadata'
+    __table_args__ = {'schema': 'bench29'}
+
+    case_id = Column(String(50), primary_key=True)
+    case_type = Column(String(100))
+    disease_type = Column(String(255))
+    diagnosis = Column(Text)
+    complexity = Column(String(50))
+
+
+class CasePhenotypeCodes(Base):
+    """
+    Case Phenotype Codes table that stores the HPO phenotypes and rare disease
+    codes of the benchmark cases (e.g. data/ramedis_paper/data/HMS.jsonl) as
+    integer arrays: HP:0001252 is stored as 1252 in phenotype_ids, OMIM:106300
+    as 106300 in omim_ids and ORPHA:91138 as 91138 in orpha_ids. GIN indexes turn
+    "cases with code X" (array @> ARRAY[X]) into index lookups. cases_bench_id
+    links a dataset case to its CasesBench row when the result tree was generated
+    from the same dataset file (see phenotype_libs.link_cases).
+    """
+    __tablename__ = 'case_phenotype_codes'
+    __table_args__ = (
+        Index('case_phenotype_codes_phenotype_gin', 'phenotype_ids', postgresql_using='gin'),
+        Index('case_phenotype_codes_omim_gin', 'omim_ids', postgresql_using='gin'),
+        Index('case_phenotype_codes_orpha_gin', 'orpha_ids', postgresql_using='gin'),
+        Index('case_phenotype_codes_dataset_case_idx', 'dataset', 'case_index', unique=True),
+        Index('case_phenotype_codes_cases_bench_idx', 'cases_bench_id'),
+        ForeignKeyConstraint(['cases_bench_id'], ['bench29.cases_bench.id'], ondelete='SET NULL'),
+        {'schema': 'bench29'},
+    )
+
+    id = Column(Integer, primary_key=True)
+    dataset = Column(String(100), nullable=False)  # source dataset, e.g. "HMS"
+    case_index = Column(Integer, nullable=False)  # line of the case in the dataset file
+    cases_bench_id = Column(Integer)  # matching CasesBench row, if any
+    phenotype_ids = Column(ARRAY(Integer), nullable=False, default=list)
+    omim_ids = Column(ARRAY(Integer), nullable=False, default=list)
+    orpha_ids = Column(ARRAY(Integer), nullable=False, default=list)
+    other_phenotype_codes = Column(ARRAY(Text), nullable=False, default=list)  # non-HP codes of Phenotype
+    other_disease_codes = Column(ARRAY(Text), nullable=False, default=list)  # non-OMIM/ORPHA codes of RareDisease, e.g. CCRD
+    department = Column(Text)
+
 if __name__ == '__main__':
     # Import get_session only when needed
     from db.utils.db_utils import get_session
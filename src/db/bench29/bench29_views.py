@@ -0,0 +1,167 @@
+"""
+Bench29 views module that defines the llm_analysis materialized view.
+It replaces the hand-maintained bench29.llm_analysis table: one row per ranked
+diagnosis with its semantic relationship, its severity and the case severity,
+computed from the rank, severity, semantic relationship and case metadata tables.
+"""
+
+import os
+import sys
+
+# Adjust the system path to include the parent directory
+sys.path.append(os.path.join(os.path.dirname(os.path.abspath(__file__)), '../../'))
+
+from sqlalchemy import Column, Integer, text
+from sqlalchemy.ext.declarative import declarative_base
+
+# Views get their own base so Base.metadata.create_all() never creates them as tables
+ViewBase = declarative_base()
+
+LLM_ANALYSIS_VIEW = "bench29.llm_analysis_mv"
+
+# Judges store one severity / semantic relationship row per ranked diagnosis,
+# in rank order, keyed only by the differential diagnosis. Rows are aligned with
+# the ranks by their position inside each differential diagnosis.
+LLM_ANALYSIS_VIEW_SQL = f"""
+CREATE MATERIALIZED VIEW IF NOT EXISTS {LLM_ANALYSIS_VIEW} AS
+WITH ranks AS (
+    SELECT
+        r.id AS single_differential_diagnosis_id,
+        r.cases_bench_id,
+        r.differential_diagnosis_id,
+        r.rank_position AS predicted_rank,
+        row_number() OVER (PARTITION BY r.differential_diagnosis_id ORDER BY r.rank_position, r.id) AS position
+    FROM bench29.differential_diagnosis_to_rank r
+),
+severities AS (
+    SELECT
+        s.differential_diagnosis_id,
+        s.severity_levels_id,
+        row_number() OVER (PARTITION BY s.differential_diagnosis_id ORDER BY s.id) AS position
+    FROM bench29.differential_diagnosis_to_severity s
+),
+relationships AS (
+    SELECT
+        sr.differential_diagnosis_id,
+        sr.differential_diagnosis_semantic_relationship_id,
+        row_number() OVER (PARTITION BY sr.differential_diagnosis_id ORDER BY sr.id) AS position
+    FROM bench29.differential_diagnosis_to_semantic_relationship sr
+),
+case_metadata AS (
+    SELECT DISTINCT ON (m.cases_bench_id)
+        m.cases_bench_id,
+        m.severity_levels_id
+    FROM bench29.cases_bench_metadata m
+    ORDER BY m.cases_bench_id, m.id DESC
+)
+SELECT
+    ranks.single_differential_diagnosis_id,
+    ranks.cases_bench_id,
+    ranks.differential_diagnosis_id,
+    d.model_id,
+    d.prompt_id,
+    ranks.predicted_rank,
+    relationships.differential_diagnosis_semantic_relationship_id,
+    case_metadata.severity_levels_id AS case_severity,
+    severities.severity_levels_id AS differential_diagnosis_severity
+FROM ranks
+JOIN bench29.llm_differential_diagnosis d
+    ON d.id = ranks.differential_diagnosis_id
+LEFT JOIN severities
+    ON severities.differential_diagnosis_id = ranks.differential_diagnosis_id
+    AND severities.position = ranks.position
+LEFT JOIN relationships
+    ON relationships.differential_diagnosis_id = ranks.differential_diagnosis_id
+    AND relationships.position = ranks.position
+LEFT JOIN case_metadata
+    ON case_metadata.cases_bench_id = ranks.cases_bench_id
+WITH DATA
+"""
+
+LLM_ANALYSIS_INDEXES_SQL = [
+    # Unique index, required by REFRESH MATERIALIZED VIEW CONCURRENTLY
+    f"CREATE UNIQUE INDEX IF NOT EXISTS llm_analysis_mv_pk ON {LLM_ANALYSIS_VIEW} (single_differential_diagnosis_id)",
+    # Leaderboard queries take the first correct rank of every diagnosis per model
+    # and prompt (get_rank_counts_by_model_prompt): covering index for that grouping
+    f"CREATE INDEX IF NOT EXISTS llm_analysis_mv_leaderboard_idx ON {LLM_ANALYSIS_VIEW} "
+    "(model_id, prompt_id, differential_diagnosis_id, predicted_rank) INCLUDE (differential_diagnosis_semantic_relationship_id)",
+    f"CREATE INDEX IF NOT EXISTS llm_analysis_mv_case_idx ON {LLM_ANALYSIS_VIEW} (cases_bench_id)",
+    f"CREATE INDEX IF NOT EXISTS llm_analysis_mv_diagnosis_idx ON {LLM_ANALYSIS_VIEW} (differential_diagnosis_id)",
+    f"CREATE INDEX IF NOT EXISTS llm_analysis_mv_relationship_idx ON {LLM_ANALYSIS_VIEW} (differential_diagnosis_semantic_relationship_id)",
+    # Base table indexes used by the window functions and joins of the refresh
+    "CREATE INDEX IF NOT EXISTS differential_diagnosis_to_rank_diagnosis_idx ON bench29.differential_diagnosis_to_rank (differential_diagnosis_id, rank_position, id)",
+    "CREATE INDEX IF NOT EXISTS differential_diagnosis_to_severity_diagnosis_idx ON bench29.differential_diagnosis_to_severity (differential_diagnosis_id, id)",
+    "CREATE INDEX IF NOT EXISTS differential_diagnosis_to_semantic_relationship_diagnosis_idx ON bench29.differential_diagnosis_to_semantic_relationship (differential_diagnosis_id, id)",
+    "CREATE INDEX IF NOT EXISTS cases_bench_metadata_case_idx ON bench29.cases_bench_metadata (cases_bench_id, id)",
+]
+
+
+class LlmAnalysisView(ViewBase):
+    """
+    Read-only mapping of the bench29.llm_analysis_mv materialized view.
+    """
+    __tablename__ = 'llm_analysis_mv'
+    __table_args__ = {'schema': 'bench29'}
+
+    single_differential_diagnosis_id = Column(Integer, primary_key=True)
+    cases_bench_id = Column(Integer)
+    differential_diagnosis_id = Column(Integer)
+    model_id = Column(Integer)
+    prompt_id = Column(Integer)
+    predicted_rank = Column(Integer)
+    differential_diagnosis_semantic_relationship_id = Column(Integer)
+    case_severity = Column(Integer)
+    differential_diagnosis_severity = Column(Integer)
+
+
+def create_llm_analysis_view(session, verbose=False):
+    """
+    Create the llm_analysis materialized view and its indexes if they do not exist.
+
+    Args:
+        session: SQLAlchemy session
+        verbose: Whether to print status information
+    """
+    session.execute(text(LLM_ANALYSIS_VIEW_SQL))
+    for index_sql in LLM_ANALYSIS_INDEXES_SQL:
+        session.execute(text(index_sql))
+    session.commit()
+
+    if verbose:
+        print(f"Created materialized view {LLM_ANALYSIS_VIEW} with {len(LLM_ANALYSIS_INDEXES_SQL)} indexes")
+
+
+def refresh_llm_analysis_view(session, concurrently=True, verbose=False):
+    """
+    Refresh the llm_analysis materialized view.
+    A concurrent refresh only writes the rows that changed and does not block
+    readers; it falls back to a plain refresh while the view is unpopulated.
+
+    Args:
+        session: SQLAlchemy session
+        concurrently: Whether to refresh without locking out readers
+        verbose: Whether to print status information
+    """
+    if concurrently:
+        populated = session.execute(
+            text("SELECT ispopulated FROM pg_matviews WHERE schemaname = 'bench29' AND matviewname = 'llm_analysis_mv'")
+        ).scalar()
+        concurrently = bool(populated)
+
+    mode = "CONCURRENTLY " if concurrently else ""
+    session.execute(text(f"REFRESH MATERIALIZED VIEW {mode}{LLM_ANALYSIS_VIEW}"))
+    session.commit()
+
+    if verbose:
+        print(f"Refreshed materialized view {LLM_ANALYSIS_VIEW}{' concurrently' if concurrently else ''}")
+
+
+if __name__ == '__main__':
+    # Import get_session only when needed
+    from db.utils.db_utils import get_session
+
+    # The view reads the bench29 tables, create them first (bench29_models.py)
+    session = get_session(schema="bench29")
+    create_llm_analysis_view(session, verbose=True)
+    session.close()
+    print("Bench29 views created successfully.")
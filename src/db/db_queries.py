@@ -2,5 +2,6 @@
 from .db_queries_llm import *
 from .db_queries_prompts import *
 from .db_queries_bench29 import *
+from .db_queries_registry import *
 
 # No need to specify __all__ as we're importing everything with *
\ No newline at end of file
@@ -32,13 +32,12 @@ def add_llm_diagnosis(session, cases_bench_id, model_id, prompt_id, diagnosis_te
     
     return llm_diagnosis
 
-def add_diagnosis_rank(session, cases_bench_id, llm_diagnosis_id, rank_position, predicted_diagnosis, reasoning=None, verbose=False):
+def diagnosis_rank_row(cases_bench_id, llm_diagnosis_id, rank_position, predicted_diagnosis, reasoning=None, verbose=False):
     """
-    Add a new rank entry for a diagnosis to the database.
+    Build the column dictionary of a DifferentialDiagnosis2Rank row.
     Handles None values from failed parsing.
     
     Args:
-        session: SQLAlchemy session
         cases_bench_id: ID of the CasesBench record
         llm_diagnosis_id: ID of the LlmDiagnosis record
         rank_position: Position in ranking (1, 2, 3, etc.) or None
@@ -47,10 +46,8 @@ def add_diagnosis_rank(session, cases_bench_id, llm_diagnosis_id, rank_position,
         verbose: Whether to print debug information
         
     Returns:
-        The created DifferentialDiagnosis2Rank instance with ID set
+        Dictionary of DifferentialDiagnosis2Rank columns
     """
-    from db.bench29.bench29_models import DifferentialDiagnosis2Rank
-    
     # Handle None values from failed parsing
     if rank_position is None:
         # Use a large value to indicate a failed parsing
@@ -69,13 +66,36 @@ def add_diagnosis_rank(session, cases_bench_id, llm_diagnosis_id, rank_position,
                 print(f"  Truncating diagnosis text from {len(predicted_diagnosis)} to 254 characters")
             predicted_diagnosis = predicted_diagnosis[:254]
     
+    return {
+        'cases_bench_id': cases_bench_id,
+        'differential_diagnosis_id': llm_diagnosis_id,
+        'rank_position': rank_position,
+        'predicted_diagnosis': predicted_diagnosis,
+        'reasoning': reasoning
+    }
+
+def add_diagnosis_rank(session, cases_bench_id, llm_diagnosis_id, rank_position, predicted_diagnosis, reasoning=None, verbose=False):
+    """
+    Add a new rank entry for a diagnosis to the database.
+    Handles None values from failed parsing.
+    
+    Args:
+        session: SQLAlchemy session
+        cases_bench_id: ID of the CasesBench record
+        llm_diagnosis_id: ID of the LlmDiagnosis record
+        rank_position: Position in ranking (1, 2, 3, etc.) or None
+        predicted_diagnosis: Text of the predicted diagnosis or None
+        reasoning: Optional reasoning text
+        verbose: Whether to print debug information
+        
+    Returns:
+        The created DifferentialDiagnosis2Rank instance with ID set
+    """
+    from db.bench29.bench29_models import DifferentialDiagnosis2Rank
+    
     # Create the rank entry
     rank_entry = DifferentialDiagnosis2Rank(
-        cases_bench_id=cases_bench_id,
-        differential_diagnosis_id=llm_diagnosis_id,
-        rank_position=rank_position,
-        predicted_diagnosis=predicted_diagnosis,
-        reasoning=reasoning
+        **diagnosis_rank_row(cases_bench_id, llm_diagnosis_id, rank_position, predicted_diagnosis, reasoning, verbose=verbose)
     )
     
     session.add(rank_entry)
@@ -100,4 +120,367 @@ def get_diagnosis_ranks(session, llm_diagnosis_id):
         DifferentialDiagnosis2Rank.differential_diagnosis_id == llm_diagnosis_id
     ).order_by(DifferentialDiagnosis2Rank.rank_position).all()
     
-    return ranks
\ No newline at end of file
+    return ranks
+
+def iter_unranked_diagnoses(session, model_id=None, prompt_id=None, limit=None, batch_size=1000):
+    """
+    Stream the diagnoses that have text but no DifferentialDiagnosis2Rank rows yet.
+    The work list is a single anti-join query read through a server-side cursor,
+    so a fully ranked database costs one query that returns nothing.
+    
+    Args:
+        session: SQLAlchemy session
+        model_id: Optional model ID to filter by
+        prompt_id: Optional prompt ID to filter by
+        limit: Optional limit on number of diagnoses
+        batch_size: Rows fetched from the server per batch
+        
+    Yields:
+        Lists of (llm_diagnosis_id, cases_bench_id, diagnosis_text) tuples
+    """
+    from db.bench29.bench29_models import LlmDifferentialDiagnosis, DifferentialDiagnosis2Rank
+    
+    has_ranks = session.query(DifferentialDiagnosis2Rank.id).filter(
+        DifferentialDiagnosis2Rank.differential_diagnosis_id == LlmDifferentialDiagnosis.id
+    ).exists()
+    
+    query = session.query(
+        LlmDifferentialDiagnosis.id,
+        LlmDifferentialDiagnosis.cases_bench_id,
+        LlmDifferentialDiagnosis.diagnosis
+    ).filter(
+        ~has_ranks,
+        LlmDifferentialDiagnosis.diagnosis.isnot(None),
+        LlmDifferentialDiagnosis.diagnosis != ''
+    )
+    
+    if model_id is not None:
+        query = query.filter(LlmDifferentialDiagnosis.model_id == model_id)
+    if prompt_id is not None:
+        query = query.filter(LlmDifferentialDiagnosis.prompt_id == prompt_id)
+    query = query.order_by(LlmDifferentialDiagnosis.id)
+    if limit is not None:
+        query = query.limit(limit)
+    
+    result = session.execute(query.statement.execution_options(stream_results=True, yield_per=batch_size))
+    try:
+        for rows in result.partitions(batch_size):
+            yield [tuple(row) for row in rows]
+    finally:
+        result.close()
+
+def get_ranked_relationships(session, model_id=None, prompt_id=None):
+    """
+    Get every ranked diagnosis with its semantic relationship from the
+    llm_analysis materialized view.
+    
+    Args:
+        session: SQLAlchemy session
+        model_id: Optional model ID to filter by
+        prompt_id: Optional prompt ID to filter by
+        
+    Returns:
+        List of (model_alias, prompt_alias, differential_diagnosis_id, rank_position,
+        semantic_relationship) tuples
+    """
+    from db.bench29.bench29_views import LlmAnalysisView
+    from db.registry.registry_models import DiagnosisSemanticRelationship
+    from db.llm.llm_models import Models
+    from db.prompts.prompts_models import Prompt
+    
+    query = session.query(
+        Models.alias,
+        Prompt.alias,
+        LlmAnalysisView.differential_diagnosis_id,
+        LlmAnalysisView.predicted_rank,
+        DiagnosisSemanticRelationship.semantic_relationship
+    ).join(
+        Models, Models.id == LlmAnalysisView.model_id
+    ).join(
+        Prompt, Prompt.id == LlmAnalysisView.prompt_id
+    ).outerjoin(
+        DiagnosisSemanticRelationship,
+        DiagnosisSemanticRelationship.id == LlmAnalysisView.differential_diagnosis_semantic_relationship_id
+    )
+    
+    if model_id is not None:
+        query = query.filter(LlmAnalysisView.model_id == model_id)
+    if prompt_id is not None:
+        query = query.filter(LlmAnalysisView.prompt_id == prompt_id)
+    
+    return query.all()
+
+def get_rank_counts_by_model_prompt(session, hit_relationships=None, model_id=None, prompt_id=None):
+    """
+    Count first correct ranks per model and prompt from the llm_analysis materialized view.
+    The first correct rank of a differential diagnosis is its best ranked entry
+    whose semantic relationship counts as a hit; diagnoses without a hit are left out.
+    
+    Args:
+        session: SQLAlchemy session
+        hit_relationships: Semantic relationship names counted as a hit
+                           (default: metrics_libs.DEFAULT_HIT_RELATIONSHIPS)
+        model_id: Optional model ID to filter by
+        prompt_id: Optional prompt ID to filter by
+        
+    Returns:
+        List of (model_id, prompt_id, first_correct_rank, count) tuples
+    """
+    from sqlalchemy import func
+    from db.bench29.bench29_views import LlmAnalysisView
+    from db.registry.registry_models import DiagnosisSemanticRelationship
+    from libs.metrics_libs import DEFAULT_HIT_RELATIONSHIPS
+    
+    if hit_relationships is None:
+        hit_relationships = DEFAULT_HIT_RELATIONSHIPS
+    
+    first_ranks = session.query(
+        LlmAnalysisView.model_id,
+        LlmAnalysisView.prompt_id,
+        func.min(LlmAnalysisView.predicted_rank).label('first_rank')
+    ).join(
+        DiagnosisSemanticRelationship,
+        DiagnosisSemanticRelationship.id == LlmAnalysisView.differential_diagnosis_semantic_relationship_id
+    ).filter(
+        DiagnosisSemanticRelationship.semantic_relationship.in_(list(hit_relationships))
+    )
+    
+    if model_id is not None:
+        first_ranks = first_ranks.filter(LlmAnalysisView.model_id == model_id)
+    if prompt_id is not None:
+        first_ranks = first_ranks.filter(LlmAnalysisView.prompt_id == prompt_id)
+    
+    first_ranks = first_ranks.group_by(
+        LlmAnalysisView.model_id,
+        LlmAnalysisView.prompt_id,
+        LlmAnalysisView.differential_diagnosis_id
+    ).subquery()
+    
+    return session.query(
+        first_ranks.c.model_id,
+        first_ranks.c.prompt_id,
+        first_ranks.c.first_rank,
+        func.count()
+    ).group_by(
+        first_ranks.c.model_id,
+        first_ranks.c.prompt_id,
+        first_ranks.c.first_rank
+    ).all()
+
+def increment_leaderboard_rank_count(session, model_id, prompt_id, predicted_rank, n=1):
+    """
+    Add n to the leaderboard rank histogram of a model and prompt.
+    Does not commit: call it before committing the llm_analysis insert it
+    accounts for, so both land in the same transaction. run_ingest
+    (hoarder29/libs/ingest_libs.py) is its only caller and the only supported
+    writer of llm_analysis.
+    
+    Args:
+        session: SQLAlchemy session
+        model_id: ID of the Model
+        prompt_id: ID of the Prompt
+        predicted_rank: Rank to count
+        n: Amount to add (negative when analysis rows are deleted)
+    """
+    from sqlalchemy.dialects.postgresql import insert
+    from db.bench29.bench29_models import LeaderboardRankCount
+    
+    statement = insert(LeaderboardRankCount).values(
+        model_id=model_id,
+        prompt_id=prompt_id,
+        predicted_rank=predicted_rank,
+        count=n
+    )
+    statement = statement.on_conflict_do_update(
+        index_elements=['model_id', 'prompt_id', 'predicted_rank'],
+        set_={'count': LeaderboardRankCount.count + statement.excluded.count}
+    )
+    session.execute(statement)
+
+def compute_leaderboard_rank_counts(session):
+    """
+    Recompute the leaderboard rank histograms from the llm_analysis table.
+    
+    Args:
+        session: SQLAlchemy session
+        
+    Returns:
+        Dictionary mapping (model_id, prompt_id, predicted_rank) to count
+    """
+    from sqlalchemy import func
+    from db.bench29.bench29_models import LlmAnalysis, LlmDifferentialDiagnosis
+    
+    rows = session.query(
+        LlmDifferentialDiagnosis.model_id,
+        LlmDifferentialDiagnosis.prompt_id,
+        LlmAnalysis.predicted_rank,
+        func.count()
+    ).join(
+        LlmDifferentialDiagnosis, LlmDifferentialDiagnosis.id == LlmAnalysis.differential_diagnosis_id
+    ).filter(
+        LlmAnalysis.predicted_rank.isnot(None)
+    ).group_by(
+        LlmDifferentialDiagnosis.model_id,
+        LlmDifferentialDiagnosis.prompt_id,
+        LlmAnalysis.predicted_rank
+    ).all()
+    
+    return {(model_id, prompt_id, rank): count for model_id, prompt_id, rank, count in rows}
+
+def get_leaderboard_rank_counts(session):
+    """
+    Read the maintained leaderboard rank histograms.
+    
+    Args:
+        session: SQLAlchemy session
+        
+    Returns:
+        Dictionary mapping (model_id, prompt_id, predicted_rank) to count
+    """
+    from db.bench29.bench29_models import LeaderboardRankCount
+    
+    rows = session.query(LeaderboardRankCount).filter(LeaderboardRankCount.count != 0).all()
+    return {(row.model_id, row.prompt_id, row.predicted_rank): row.count for row in rows}
+
+def get_leaderboard_rank_histograms(session):
+    """
+    Read the maintained leaderboard rank histograms keyed by model and prompt
+    aliases, in the row format of the leaderboard (see rank_count_matrix).
+
+    Args:
+        session: SQLAlchemy session
+
+    Returns:
+        List of (model_name, model_alias, prompt_alias, predicted_rank, count) tuples
+    """
+    from db.bench29.bench29_models import LeaderboardRankCount
+    from db.llm.llm_models import Models
+    from db.prompts.prompts_models import Prompt
+
+    return session.query(
+        Models.name,
+        Models.alias,
+        Prompt.alias,
+        LeaderboardRankCount.predicted_rank,
+        LeaderboardRankCount.count
+    ).join(
+        Models, Models.id == LeaderboardRankCount.model_id
+    ).join(
+        Prompt, Prompt.id == LeaderboardRankCount.prompt_id
+    ).filter(
+        LeaderboardRankCount.count != 0
+    ).order_by(
+        Models.name,
+        Prompt.alias,
+        LeaderboardRankCount.predicted_rank
+    ).all()
+
+def rebuild_leaderboard_rank_counts(session, verbose=False):
+    """
+    Replace the leaderboard rank histograms with a full recompute, in one transaction.
+    
+    Args:
+        session: SQLAlchemy session
+        verbose: Whether to print status information
+        
+    Returns:
+        Number of (model, prompt, rank) rows written
+    """
+    from db.bench29.bench29_models import LeaderboardRankCount
+    
+    counts = compute_leaderboard_rank_counts(session)
+    
+    session.query(LeaderboardRankCount).delete(synchronize_session=False)
+    session.bulk_insert_mappings(LeaderboardRankCount, [
+        {'model_id': model_id, 'prompt_id': prompt_id, 'predicted_rank': rank, 'count': count}
+        for (model_id, prompt_id, rank), count in counts.items()
+    ])
+    session.commit()
+    
+    if verbose:
+        print(f"Rebuilt leaderboard rank counts: {len(counts)} rows, {sum(counts.values())} analyses")
+    
+    return len(counts)
+
+def check_leaderboard_rank_counts(session, verbose=False):
+    """
+    Compare the maintained leaderboard rank histograms with a full recompute.
+    
+    Args:
+        session: SQLAlchemy session
+        verbose: Whether to print status information
+        
+    Returns:
+        List of (model_id, prompt_id, predicted_rank, stored_count, expected_count)
+        tuples that differ; empty if the aggregate is consistent
+    """
+    stored = get_leaderboard_rank_counts(session)
+    expected = compute_leaderboard_rank_counts(session)
+    
+    mismatches = [
+        (*key, stored.get(key, 0), expected.get(key, 0))
+        for key in sorted(set(stored) | set(expected))
+        if stored.get(key, 0) != expected.get(key, 0)
+    ]
+    
+    if verbose:
+        if mismatches:
+            print(f"Leaderboard rank counts are inconsistent in {len(mismatches)} rows:")
+            for model_id, prompt_id, rank, stored_count, expected_count in mismatches[:20]:
+                print(f"  model {model_id}, prompt {prompt_id}, rank {rank}: stored {stored_count}, expected {expected_count}")
+        else:
+            print(f"Leaderboard rank counts are consistent ({len(expected)} rows)")
+    
+    return mismatches
+
+def get_cases_with_phenotype(session, hpo_code, dataset=None):
+    """
+    Get the cases annotated with an HPO phenotype, using the GIN index on
+    case_phenotype_codes.phenotype_ids.
+    
+    Args:
+        session: SQLAlchemy session
+        hpo_code: HPO code ("HP:0001252") or its integer identifier (1252)
+        dataset: Optional dataset name to filter by
+        
+    Returns:
+        List of CasePhenotypeCodes instances
+    """
+    from db.bench29.bench29_models import CasePhenotypeCodes
+    from hoarder29.libs.phenotype_libs import parse_code
+    
+    if isinstance(hpo_code, str):
+        _, hpo_code = parse_code(hpo_code)
+    
+    query = session.query(CasePhenotypeCodes).filter(CasePhenotypeCodes.phenotype_ids.contains([hpo_code]))
+    if dataset is not None:
+        query = query.filter(CasePhenotypeCodes.dataset == dataset)
+    
+    return query.order_by(CasePhenotypeCodes.dataset, CasePhenotypeCodes.case_index).all()
+
+def get_cases_with_disease(session, disease_code, dataset=None):
+    """
+    Get the cases annotated with an OMIM or ORPHA disease, using the GIN
+    indexes on case_phenotype_codes.omim_ids and orpha_ids.
+    
+    Args:
+        session: SQLAlchemy session
+        disease_code: Disease code such as "OMIM:106300" or "ORPHA:91138"
+        dataset: Optional dataset name to filter by
+        
+    Returns:
+        List of CasePhenotypeCodes instances, empty for unsupported code prefixes
+    """
+    from db.bench29.bench29_models import CasePhenotypeCodes
+    from hoarder29.libs.phenotype_libs import parse_code
+    
+    prefix, identifier = parse_code(disease_code)
+    columns = {"OMIM": CasePhenotypeCodes.omim_ids, "ORPHA": CasePhenotypeCodes.orpha_ids}
+    if prefix not in columns or identifier is None:
+        return []
+    
+    query = session.query(CasePhenotypeCodes).filter(columns[prefix].contains([identifier]))
+    if dataset is not None:
+        query = query.filter(CasePhenotypeCodes.dataset == dataset)
+    
+    return query.order_by(CasePhenotypeCodes.dataset, CasePhenotypeCodes.case_index).all()
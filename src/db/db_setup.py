@@ -12,6 +12,7 @@ create_registry_tables = True
 create_llm_tables = True
 create_prompts_tables = True
 create_bench29_tables = True
+create_bench29_views = True
 verbose = True
 
 # Get the absolute path to the db directory
@@ -60,5 +61,15 @@ if create_bench29_tables:
         print(f"Command: {command}")
     os.system(command)
 
+# Bench29 views (need the bench29 tables)
+if create_bench29_views:
+    bench29_views_script = os.path.join(db_dir, "bench29", "bench29_views.py")
+    command = f"{python_exe} {bench29_views_script}"
+    if verbose:
+        print("Creating bench29 views...")
+        print(f"Script path: {bench29_views_script}")
+        print(f"Command: {command}")
+    os.system(command)
+
 if verbose:
     print("Database setup completed successfully.")
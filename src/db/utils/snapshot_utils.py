@@ -0,0 +1,345 @@
+"""
+Snapshot utilities that export the bench29 schema and its registries to
+Parquet for local analytics, and read the snapshot back.
+Rows are streamed from the server in batches, so no table is ever held in
+memory, and the diagnosis tables are partitioned by model_id and prompt_id.
+"""
+
+import os
+import sys
+import shutil
+
+# Adjust the system path to include the parent directory
+sys.path.append(os.path.join(os.path.dirname(os.path.abspath(__file__)), '../../'))
+
+from sqlalchemy import text
+
+# Tables exported as a single file: (snapshot name, query)
+SNAPSHOT_TABLES = {
+    "severity_levels": "SELECT * FROM registry.severity_levels",
+    "complexity_levels": "SELECT * FROM registry.complexity_levels",
+    "diagnosis_semantic_relationship": "SELECT * FROM registry.diagnosis_semantic_relationship",
+    "models": "SELECT * FROM llm.models",
+    "prompts": "SELECT id, alias FROM prompts.prompt",
+    "cases_bench": "SELECT * FROM bench29.cases_bench",
+    "cases_bench_metadata": "SELECT * FROM bench29.cases_bench_metadata",
+    "cases_bench_gold_diagnosis": "SELECT * FROM bench29.cases_bench_gold_diagnosis",
+}
+
+# Tables exported partitioned by model and prompt: (snapshot name, query)
+# The differential_diagnosis_to_* tables get model_id/prompt_id from their diagnosis
+PARTITIONED_TABLES = {
+    "llm_differential_diagnosis": "SELECT * FROM bench29.llm_differential_diagnosis",
+    "differential_diagnosis_to_rank": """
+        SELECT t.*, d.model_id, d.prompt_id
+        FROM bench29.differential_diagnosis_to_rank t
+        JOIN bench29.llm_differential_diagnosis d ON d.id = t.differential_diagnosis_id
+    """,
+    "differential_diagnosis_to_severity": """
+        SELECT t.*, d.model_id, d.prompt_id
+        FROM bench29.differential_diagnosis_to_severity t
+        JOIN bench29.llm_differential_diagnosis d ON d.id = t.differential_diagnosis_id
+    """,
+    "differential_diagnosis_to_semantic_relationship": """
+        SELECT t.*, d.model_id, d.prompt_id
+        FROM bench29.differential_diagnosis_to_semantic_relationship t
+        JOIN bench29.llm_differential_diagnosis d ON d.id = t.differential_diagnosis_id
+    """,
+    "llm_analysis": """
+        SELECT t.*, d.model_id, d.prompt_id
+        FROM bench29.llm_analysis t
+        JOIN bench29.llm_differential_diagnosis d ON d.id = t.differential_diagnosis_id
+    """,
+}
+
+PARTITION_COLUMNS = ["model_id", "prompt_id"]
+
+
+def _import_pyarrow():
+    """
+    Import pyarrow lazily, it is only needed for snapshots.
+
+    Returns:
+        Tuple of (pyarrow, pyarrow.parquet) modules
+    """
+    try:
+        import pyarrow as pa
+        import pyarrow.parquet as pq
+    except ImportError as e:
+        raise ImportError(f"Parquet snapshots need the 'pyarrow' package ({e}). Install it using: pip install pyarrow")
+    return pa, pq
+
+
+# Postgres type OIDs (cursor.description type_code) -> Arrow type name.
+# Every other type, JSON included, is exported as text.
+PG_ARROW_TYPES = {
+    16: "bool",          # boolean
+    20: "int64",         # bigint
+    21: "int16",         # smallint
+    23: "int32",         # integer
+    700: "float32",      # real
+    701: "float64",      # double precision
+    1700: "float64",     # numeric
+    1082: "date32",      # date
+    1114: "timestamp",   # timestamp
+    1184: "timestamptz", # timestamp with time zone
+}
+
+
+def _arrow_type(pa, type_name):
+    """Arrow type of a PG_ARROW_TYPES name (string for None)."""
+    if type_name == "timestamp":
+        return pa.timestamp("us")
+    if type_name == "timestamptz":
+        return pa.timestamp("us", tz="UTC")
+    if type_name is None:
+        return pa.string()
+    return getattr(pa, type_name)()
+
+
+def _result_schema(pa, result):
+    """
+    Build the Arrow schema of a query result from its column types.
+    Every batch is written with this schema, so a column that is all NULL in
+    one batch is typed the same as in the others.
+
+    Args:
+        pa: pyarrow module
+        result: SQLAlchemy CursorResult
+
+    Returns:
+        pyarrow.Schema with one field per result column
+    """
+    return pa.schema([
+        pa.field(column[0], _arrow_type(pa, PG_ARROW_TYPES.get(column[1])))
+        for column in result.cursor.description
+    ])
+
+
+def _rows_to_table(pa, schema, rows):
+    """Build an Arrow table with the given schema from a batch of result rows."""
+    import json
+
+    data = {}
+    for i, field in enumerate(schema):
+        values = [row[i] for row in rows]
+        if pa.types.is_string(field.type):
+            # JSON columns as JSON text, any other non-text value as its string
+            values = [
+                v if v is None or isinstance(v, str)
+                else json.dumps(v) if isinstance(v, (dict, list))
+                else str(v)
+                for v in values
+            ]
+        elif pa.types.is_floating(field.type):
+            values = [float(v) if v is not None else None for v in values]
+        data[field.name] = values
+    return pa.Table.from_pydict(data, schema=schema)
+
+
+def export_table(session, name, query, output_dir, partition_cols=None, batch_size=50000, verbose=False):
+    """
+    Stream one query result into Parquet.
+
+    Args:
+        session: SQLAlchemy session
+        name: Snapshot table name (directory or file name)
+        query: SQL query producing the rows
+        output_dir: Snapshot root directory
+        partition_cols: Columns to partition by, or None for a single file
+        batch_size: Rows fetched from the server and written per batch
+        verbose: Whether to print status information
+
+    Returns:
+        int: Number of rows exported
+    """
+    pa, pq = _import_pyarrow()
+
+    # Server-side cursor: rows arrive batch by batch instead of all at once
+    result = session.connection().execution_options(stream_results=True, yield_per=batch_size).execute(text(query))
+    schema = _result_schema(pa, result)
+
+    target = os.path.join(output_dir, name if partition_cols else f"{name}.parquet")
+    if os.path.isdir(target):
+        shutil.rmtree(target)
+    elif os.path.exists(target):
+        os.remove(target)
+
+    writer = None
+    row_count = 0
+    try:
+        for batch_number, rows in enumerate(result.partitions(batch_size)):
+            table = _rows_to_table(pa, schema, rows)
+            if partition_cols:
+                pq.write_to_dataset(
+                    table,
+                    root_path=target,
+                    partition_cols=partition_cols,
+                    schema=schema,
+                    basename_template=f"part-{batch_number}-{{i}}.parquet"
+                )
+            else:
+                if writer is None:
+                    writer = pq.ParquetWriter(target, schema)
+                writer.write_table(table)
+            row_count += len(rows)
+    finally:
+        if writer is not None:
+            writer.close()
+        result.close()
+
+    if verbose:
+        print(f"Exported {row_count} rows to {target}")
+
+    return row_count
+
+
+def export_snapshot(session, output_dir, batch_size=50000, verbose=False):
+    """
+    Export the bench29 schema and its registries to a Parquet snapshot.
+
+    Args:
+        session: SQLAlchemy session
+        output_dir: Snapshot root directory
+        batch_size: Rows fetched from the server and written per batch
+        verbose: Whether to print status information
+
+    Returns:
+        Dictionary mapping snapshot table name to exported row count
+    """
+    os.makedirs(output_dir, exist_ok=True)
+    counts = {}
+
+    for name, query in SNAPSHOT_TABLES.items():
+        counts[name] = export_table(session, name, query, output_dir, batch_size=batch_size, verbose=verbose)
+
+    for name, query in PARTITIONED_TABLES.items():
+        counts[name] = export_table(
+            session, name, query, output_dir,
+            partition_cols=PARTITION_COLUMNS, batch_size=batch_size, verbose=verbose
+        )
+
+    if verbose:
+        print(f"Snapshot written to {output_dir}: {sum(counts.values())} rows in {len(counts)} tables")
+
+    return counts
+
+
+def read_snapshot_table(snapshot_dir, name, columns=None, filters=None):
+    """
+    Read a snapshot table into a DataFrame.
+    Partition filters on model_id/prompt_id only read the matching files.
+
+    Args:
+        snapshot_dir: Snapshot root directory
+        name: Snapshot table name
+        columns: Optional list of columns to read
+        filters: Optional pyarrow filters, e.g. [("model_id", "=", 3)]
+
+    Returns:
+        pandas.DataFrame with the table rows
+    """
+    _, pq = _import_pyarrow()
+
+    path = os.path.join(snapshot_dir, name)
+    if not os.path.isdir(path):
+        path = f"{path}.parquet"
+
+    return pq.read_table(path, columns=columns, filters=filters).to_pandas()
+
+
+def snapshot_rank_counts(snapshot_dir):
+    """
+    Count predicted ranks per model and prompt from a snapshot.
+
+    Args:
+        snapshot_dir: Snapshot root directory
+
+    Returns:
+        List of (model_name, model_alias, prompt_alias, predicted_rank, count) tuples
+    """
+    ranks = read_snapshot_table(snapshot_dir, "llm_analysis", columns=["predicted_rank", *PARTITION_COLUMNS])
+    models = read_snapshot_table(snapshot_dir, "models", columns=["id", "name", "alias"])
+    prompts = read_snapshot_table(snapshot_dir, "prompts", columns=["id", "alias"])
+
+    ranks = ranks.dropna(subset=["predicted_rank"])
+    # Partition columns come back as categories
+    for column in PARTITION_COLUMNS:
+        ranks[column] = ranks[column].astype(int)
+
+    counts = ranks.groupby(PARTITION_COLUMNS + ["predicted_rank"]).size().reset_index(name="count")
+    counts = counts.merge(models.rename(columns={"id": "model_id", "name": "model_name", "alias": "model_alias"}), on="model_id")
+    counts = counts.merge(prompts.rename(columns={"id": "prompt_id", "alias": "prompt_alias"}), on="prompt_id")
+
+    return [
+        (row.model_name, row.model_alias, row.prompt_alias, int(row.predicted_rank), int(row.count))
+        for row in counts.itertuples(index=False)
+    ]
+
+
+def snapshot_case_ranks(snapshot_dir):
+    """
+    Read the per-case predicted ranks of every model and prompt from a snapshot.
+
+    Args:
+        snapshot_dir: Snapshot root directory
+
+    Returns:
+        Dictionary mapping (model_name, model_alias, prompt_alias) to {cases_bench_id: [predicted_rank, ...]},
+        every row is kept as in snapshot_rank_counts
+    """
+    ranks = read_snapshot_table(snapshot_dir, "llm_analysis", columns=["cases_bench_id", "predicted_rank", *PARTITION_COLUMNS])
+    models = read_snapshot_table(snapshot_dir, "models", columns=["id", "name", "alias"])
+    prompts = read_snapshot_table(snapshot_dir, "prompts", columns=["id", "alias"])
+
+    ranks = ranks.dropna(subset=["predicted_rank"])
+    for column in PARTITION_COLUMNS:
+        ranks[column] = ranks[column].astype(int)
+
+    ranks = ranks.merge(models.rename(columns={"id": "model_id", "name": "model_name", "alias": "model_alias"}), on="model_id")
+    ranks = ranks.merge(prompts.rename(columns={"id": "prompt_id", "alias": "prompt_alias"}), on="prompt_id")
+
+    case_ranks = {}
+    for row in ranks.itertuples(index=False):
+        group = case_ranks.setdefault((row.model_name, row.model_alias, row.prompt_alias), {})
+        group.setdefault(row.cases_bench_id, []).append(int(row.predicted_rank))
+
+    return case_ranks
+
+
+def snapshot_performance_frame(snapshot_dir, weights=None):
+    """
+    Compute the model-prompt leaderboard (the columns of
+    model_prompt_performance.csv) from a snapshot.
+
+    Args:
+        snapshot_dir: Snapshot root directory
+        weights: Dictionary mapping ranks to weights (default: analyze_ranks weights)
+
+    Returns:
+        pandas.DataFrame with one row per model-prompt combination
+    """
+    import pandas as pd
+    from libs.stats_libs import rank_count_matrix, leaderboard_rows
+
+    if weights is None:
+        weights = {1: 0.01, 2: 0.02, 3: 0.07, 4: 0.20, 5: 0.30, 6: 0.50}
+
+    group_keys, rank_values, counts = rank_count_matrix(snapshot_rank_counts(snapshot_dir))
+    return pd.DataFrame(leaderboard_rows(group_keys, rank_values, counts, weights))
+
+
+if __name__ == '__main__':
+    import argparse
+    from db.utils.db_utils import get_session
+
+    parser = argparse.ArgumentParser(description="Export the bench29 schema to a Parquet snapshot")
+    parser.add_argument("--output-dir", required=True, help="Snapshot root directory")
+    parser.add_argument("--batch-size", type=int, default=50000, help="Rows fetched and written per batch")
+    args = parser.parse_args()
+
+    session = get_session()
+    try:
+        export_snapshot(session, args.output_dir, batch_size=args.batch_size, verbose=True)
+    finally:
+        session.close()
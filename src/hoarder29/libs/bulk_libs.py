@@ -0,0 +1,212 @@
+"""
+Bulk ingestion helpers for the hoarder29 parsers.
+Reads and decodes JSON result files across a process pool and writes rows in
+batches (multi-row INSERT or Postgres COPY) inside the caller's transaction,
+instead of one query and one commit per file.
+"""
+
+import io
+import os
+import json
+import datetime
+from concurrent.futures import ProcessPoolExecutor
+from typing import Dict, List, Any, Optional, Iterator, Tuple
+
+from sqlalchemy import insert
+
+from libs.paralell_libs import get_max_threads
+
+def read_json_file(file_path: str, encoding: str = 'utf-8-sig') -> Tuple[str, Optional[Any], Optional[str]]:
+    """
+    Read and decode one JSON file (process pool worker).
+
+    Args:
+        file_path: Path to the JSON file
+        encoding: File encoding (result files are written with a BOM)
+
+    Returns:
+        Tuple of (file_path, data or None, error message or None)
+    """
+    try:
+        with open(file_path, 'r', encoding=encoding) as f:
+            return file_path, json.load(f), None
+    except Exception as e:
+        return file_path, None, f"{type(e).__name__}: {e}"
+
+def load_json_files_parallel(
+    file_paths: List[str],
+    encoding: str = 'utf-8-sig',
+    workers: Optional[int] = None,
+    reader=read_json_file,
+    progress=None,
+    verbose: bool = False
+) -> Iterator[Tuple[str, Optional[Any]]]:
+    """
+    Read and decode JSON files across a process pool, in input order.
+
+    Args:
+        file_paths: Paths of the JSON files
+        encoding: File encoding
+        workers: Number of worker processes (default: get_max_threads(), 1 reads inline)
+        reader: Top-level function (file_path, encoding) -> (file_path, data, error),
+                lets callers reduce the decoded data inside the worker
+        progress: Optional ProgressReporter updated once per file
+        verbose: Whether to print read errors
+
+    Yields:
+        Tuples of (file_path, data), data is None if the file could not be read
+    """
+    if workers is None:
+        workers = get_max_threads()
+
+    encodings = [encoding] * len(file_paths)
+    if workers <= 1 or len(file_paths) < 2:
+        results = map(reader, file_paths, encodings)
+        executor = None
+    else:
+        executor = ProcessPoolExecutor(max_workers=workers)
+        results = executor.map(reader, file_paths, encodings, chunksize=max(1, len(file_paths) // (workers * 8)))
+
+    try:
+        for file_path, data, error in results:
+            if error and verbose:
+                print(f"  Error reading {file_path}: {error}")
+            if progress:
+                progress.update(errors=int(error is not None))
+            yield file_path, data
+    finally:
+        if executor is not None:
+            executor.shutdown()
+
+def bulk_insert(session, model, rows: List[Dict[str, Any]], batch_size: int = 1000, verbose: bool = False) -> int:
+    """
+    Insert rows with multi-row INSERT statements, without committing.
+
+    Args:
+        session: SQLAlchemy session
+        model: Mapped model class of the target table
+        rows: List of column dictionaries
+        batch_size: Rows per statement
+        verbose: Whether to print status information
+
+    Returns:
+        int: Number of rows inserted
+    """
+    for start in range(0, len(rows), batch_size):
+        session.execute(insert(model), rows[start:start + batch_size])
+
+    if verbose:
+        print(f"  Inserted {len(rows)} rows into {model.__table__.fullname}")
+
+    return len(rows)
+
+def insert_returning(session, model, rows: List[Dict[str, Any]], returning: List[str], batch_size: int = 1000) -> List[Tuple]:
+    """
+    Insert rows with multi-row INSERT ... RETURNING statements, without committing,
+    so generated IDs can be resolved in memory.
+
+    Args:
+        session: SQLAlchemy session
+        model: Mapped model class of the target table
+        rows: List of column dictionaries, all with the same keys
+        returning: Column names returned for every inserted row (e.g. ["id", "source_file_path"])
+        batch_size: Rows per statement
+
+    Returns:
+        List of tuples of the returned columns
+    """
+    columns = [getattr(model, name) for name in returning]
+    returned = []
+    for start in range(0, len(rows), batch_size):
+        statement = insert(model).values(rows[start:start + batch_size]).returning(*columns)
+        returned.extend(tuple(row) for row in session.execute(statement))
+    return returned
+
+def _copy_field(value) -> str:
+    """
+    Format a value as a COPY CSV field. NULL is an unquoted empty field and
+    every other value is quoted, so empty strings stay empty strings.
+    """
+    if value is None:
+        return ''
+    if isinstance(value, (dict, list)):
+        value = json.dumps(value)
+    elif isinstance(value, (datetime.datetime, datetime.date)):
+        value = value.isoformat()
+    return '"' + str(value).replace('"', '""') + '"'
+
+def copy_insert(session, model, rows: List[Dict[str, Any]], verbose: bool = False) -> int:
+    """
+    Insert rows with Postgres COPY on the session's connection, without committing.
+
+    Args:
+        session: SQLAlchemy session (PostgreSQL, psycopg2 driver)
+        model: Mapped model class of the target table
+        rows: List of column dictionaries, all with the same keys
+        verbose: Whether to print status information
+
+    Returns:
+        int: Number of rows copied
+    """
+    if not rows:
+        return 0
+
+    columns = list(rows[0].keys())
+    buffer = io.StringIO()
+    for row in rows:
+        buffer.write(','.join(_copy_field(row[c]) for c in columns))
+        buffer.write('\n')
+    buffer.seek(0)
+
+    raw_connection = session.connection().connection
+    with raw_connection.cursor() as cursor:
+        cursor.copy_expert(
+            f"COPY {model.__table__.fullname} ({', '.join(columns)}) FROM STDIN WITH (FORMAT csv)",
+            buffer
+        )
+
+    if verbose:
+        print(f"  Copied {len(rows)} rows into {model.__table__.fullname}")
+
+    return len(rows)
+
+def write_rows(session, model, rows: List[Dict[str, Any]], method: str = "insert", batch_size: int = 1000, verbose: bool = False) -> int:
+    """
+    Write rows with the chosen bulk method, without committing.
+
+    Args:
+        session: SQLAlchemy session
+        model: Mapped model class of the target table
+        rows: List of column dictionaries
+        method: "insert" (batched multi-row INSERT) or "copy" (Postgres COPY)
+        batch_size: Rows per INSERT statement
+        verbose: Whether to print status information
+
+    Returns:
+        int: Number of rows written
+    """
+    if method == "copy":
+        return copy_insert(session, model, rows, verbose=verbose)
+    if method == "insert":
+        return bulk_insert(session, model, rows, batch_size=batch_size, verbose=verbose)
+    raise ValueError(f"Unknown bulk write method '{method}', expected 'insert' or 'copy'")
+
+def list_result_files(dir_path: str, extension: str = '.json', prefix: str = 'patient_') -> List[str]:
+    """
+    List result files of a directory with a single scandir pass.
+
+    Args:
+        dir_path: Directory to scan
+        extension: Required file extension
+        prefix: Required file name prefix
+
+    Returns:
+        Sorted list of file paths
+    """
+    if not os.path.isdir(dir_path):
+        return []
+    with os.scandir(dir_path) as entries:
+        return sorted(
+            entry.path for entry in entries
+            if entry.is_file() and entry.name.startswith(prefix) and entry.name.endswith(extension)
+        )
@@ -0,0 +1,106 @@
+"""
+Directory-level fan-out for the legacy file-by-file path of the hoarder29
+scripts (bulk=False); their default path is the ingest pipeline (ingest_libs),
+which parallelises file decoding instead.
+Each {model}_diagnosis_{prompt} result directory is independent, so the
+per-directory functions of the parse_* scripts run across a thread pool. Every
+worker gets its own session from one shared engine (and connection pool),
+results are merged into per-directory counts, and a failing directory is
+rolled back and reported without aborting the others.
+"""
+
+import traceback
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from typing import Dict, List, Any, Callable, Optional, Tuple
+
+from sqlalchemy.orm import sessionmaker
+
+# Default number of directories processed at once, kept below the default
+# SQLAlchemy pool capacity (pool_size 5 + max_overflow 10)
+DEFAULT_DIRECTORY_WORKERS = 8
+
+def run_directory(session_factory, process_directory: Callable[..., int], base_dir: str, dir_name: str, progress=None, verbose: bool = False) -> int:
+    """
+    Run process_directory on one directory with its own session.
+
+    Args:
+        session_factory: sessionmaker bound to the shared engine
+        process_directory: Function (session, base_dir, dir_name, progress=, verbose=) -> int
+        base_dir: Base directory path
+        dir_name: Directory name to process
+        progress: Optional ProgressReporter shared by all workers
+        verbose: Whether to print detailed information
+
+    Returns:
+        int: Count returned by process_directory
+    """
+    session = session_factory()
+    try:
+        return process_directory(session, base_dir, dir_name, progress=progress, verbose=verbose)
+    except Exception:
+        session.rollback()
+        raise
+    finally:
+        session.close()
+
+def process_directories_parallel(
+    engine,
+    base_dir: str,
+    directories: List[str],
+    process_directory: Callable[..., int],
+    workers: Optional[int] = None,
+    progress=None,
+    verbose: bool = False
+) -> Tuple[int, Dict[str, int], Dict[str, str]]:
+    """
+    Process model/prompt directories concurrently, one session per worker.
+
+    Args:
+        engine: SQLAlchemy engine whose connection pool the workers share
+        base_dir: Base directory path
+        directories: Directory names to process
+        process_directory: Function (session, base_dir, dir_name, progress=, verbose=) -> int
+        workers: Number of directories processed at once (default: DEFAULT_DIRECTORY_WORKERS)
+        progress: Optional ProgressReporter shared by all workers
+        verbose: Whether to print detailed information
+
+    Returns:
+        Tuple of (total count, {directory: count}, {directory: error message})
+        for the directories that succeeded and failed
+    """
+    if not directories:
+        return 0, {}, {}
+
+    if workers is None:
+        workers = DEFAULT_DIRECTORY_WORKERS
+    workers = max(1, min(workers, len(directories)))
+
+    session_factory = sessionmaker(bind=engine)
+    counts = {}
+    failures = {}
+
+    with ThreadPoolExecutor(max_workers=workers) as executor:
+        futures = {
+            executor.submit(run_directory, session_factory, process_directory, base_dir, dir_name, progress, verbose): dir_name
+            for dir_name in directories
+        }
+        for future in as_completed(futures):
+            dir_name = futures[future]
+            try:
+                counts[dir_name] = future.result()
+            except Exception as e:
+                failures[dir_name] = f"{type(e).__name__}: {e}"
+                if verbose:
+                    print(f"  Directory {dir_name} failed, skipping")
+                    traceback.print_exc()
+            else:
+                if verbose:
+                    print(f"  Directory {dir_name} done: {counts[dir_name]}")
+
+    total = sum(counts.values())
+    if verbose:
+        print(f"Processed {len(counts)}/{len(directories)} directories with {workers} workers, total {total}")
+        for dir_name, error in sorted(failures.items()):
+            print(f"  Failed: {dir_name}: {error}")
+
+    return total, counts, failures
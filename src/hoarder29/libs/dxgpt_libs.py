@@ -0,0 +1,246 @@
+"""
+Loader for the DxGPT benchmark datasets (data/dxgpt_testing-main).
+CSVs are parsed column-wise with pandas: gold diagnosis lists (stringified
+Python lists) are decoded once per distinct value, scores ("P1", '"P0"') are
+extracted with one vectorised regex, and rows are bulk-loaded into the bench29
+dxgpt tables with Postgres COPY.
+"""
+
+import os
+import ast
+import csv
+import glob
+from typing import Dict, List, Any, Optional, Tuple
+
+import pandas as pd
+
+from hoarder29.libs.bulk_libs import write_rows
+
+# Dataset names of the DxGPT result files, longest first so "URG_Torre_Dic_200" wins over shorter prefixes
+DXGPT_DATASETS = tuple(sorted(
+    ("RAMEDIS", "MME", "HMS", "LIRICAL", "PUMCH_ADM", "URG_Torre_Dic_200", "URG_Torre_Dic_1000", "GPT4_v2"),
+    key=len, reverse=True
+))
+
+# The additional_data CSVs are ;-separated and Windows-1252 encoded
+ADDITIONAL_DATA_CSV_OPTIONS = {"sep": ";", "encoding": "cp1252"}
+
+def split_source_name(source_name: str) -> Tuple[Optional[str], str]:
+    """
+    Split a result file stem like "PUMCH_ADM_llama3_70b" into dataset and model.
+
+    Args:
+        source_name: File name without the diagnoses_/scores_ prefix and extension
+
+    Returns:
+        Tuple of (dataset or None if not a known dataset, model)
+    """
+    for dataset in DXGPT_DATASETS:
+        if source_name.startswith(dataset + "_"):
+            return dataset, source_name[len(dataset) + 1:]
+    return None, source_name
+
+def parse_gold_lists(values: pd.Series) -> pd.Series:
+    """
+    Decode stringified Python lists ("['A', 'B']"), once per distinct value.
+
+    Args:
+        values: Series of list strings
+
+    Returns:
+        Series of lists (None where the value is missing or not a list)
+    """
+    def decode(value):
+        try:
+            decoded = ast.literal_eval(value)
+        except (ValueError, SyntaxError):
+            return None
+        return [str(item) for item in decoded] if isinstance(decoded, (list, tuple)) else None
+
+    decoded = {value: decode(value) for value in values.dropna().unique()}
+    lists = values.map(decoded).astype(object)
+    return lists.where(lists.notna(), None)
+
+def parse_scores(values: pd.Series) -> pd.Series:
+    """
+    Extract the integer of "P<n>" scores, with or without stray quotes.
+
+    Args:
+        values: Series of score strings
+
+    Returns:
+        Nullable integer Series
+    """
+    return values.astype(str).str.strip().str.strip('"').str.extract(r'^P(\d+)$', expand=False).astype("Int64")
+
+def frame_rows(df: pd.DataFrame) -> List[Dict[str, Any]]:
+    """
+    Convert a DataFrame to row dictionaries with None for missing values.
+
+    Args:
+        df: DataFrame with table column names
+
+    Returns:
+        List of column dictionaries
+    """
+    df = df.astype(object)
+    return df.where(df.notna(), None).to_dict("records")
+
+def _read_result_csv(path: str) -> pd.DataFrame:
+    """
+    Read a result CSV with the pyarrow CSV reader, every column as text.
+    Answers are quoted multi-line fields, which the pandas parsers reject when
+    a file ends inside one.
+    """
+    try:
+        import pyarrow as pa
+        import pyarrow.csv as pa_csv
+    except ImportError as e:
+        raise ImportError(f"The DxGPT loader needs the 'pyarrow' package ({e}). Install it using: pip install pyarrow")
+
+    with open(path, 'r', encoding='utf-8-sig') as f:
+        columns = next(csv.reader(f))
+    table = pa_csv.read_csv(
+        path,
+        parse_options=pa_csv.ParseOptions(newlines_in_values=True),
+        convert_options=pa_csv.ConvertOptions(column_types={column: pa.string() for column in columns}, strings_can_be_null=False)
+    )
+    return table.to_pandas()
+
+def _source_columns(df: pd.DataFrame, path: str, prefix: str) -> pd.DataFrame:
+    """Add source_name, dataset, model and row_index columns of a result file."""
+    source_name = os.path.splitext(os.path.basename(path))[0][len(prefix):]
+    dataset, model = split_source_name(source_name)
+    df.insert(0, "source_name", source_name)
+    df.insert(1, "dataset", dataset)
+    df.insert(2, "model", model)
+    df.insert(3, "row_index", range(len(df)))
+    return df
+
+def read_diagnoses_csv(path: str) -> pd.DataFrame:
+    """
+    Read a diagnoses_{dataset}_{model}.csv file (GT, Diagnosis 1).
+
+    Args:
+        path: CSV path
+
+    Returns:
+        DataFrame with the dxgpt_diagnosis columns
+    """
+    raw = _read_result_csv(path)
+    df = pd.DataFrame({
+        "gold_diagnoses": parse_gold_lists(raw["GT"]),
+        "diagnosis": raw.iloc[:, 1],
+    })
+    return _source_columns(df, path, "diagnoses_")
+
+def read_scores_csv(path: str) -> pd.DataFrame:
+    """
+    Read a scores_{dataset}_{model}.csv file (GT, Score).
+
+    Args:
+        path: CSV path
+
+    Returns:
+        DataFrame with the dxgpt_score columns
+    """
+    raw = _read_result_csv(path)
+    df = pd.DataFrame({
+        "gold_diagnoses": parse_gold_lists(raw["GT"]),
+        "score": parse_scores(raw["Score"]),
+    })
+    return _source_columns(df, path, "scores_")
+
+def read_answers_csv(path: str) -> pd.DataFrame:
+    """
+    Read DxGPT_answers_eval_DxGPT.csv.
+
+    Args:
+        path: CSV path
+
+    Returns:
+        DataFrame with the dxgpt_answer columns
+    """
+    raw = pd.read_csv(path, dtype=str, **ADDITIONAL_DATA_CSV_OPTIONS)
+    dx_columns = [column for column in raw.columns if column.startswith("Dx")]
+    predicted = raw[dx_columns].astype(object).where(raw[dx_columns].notna(), None).values.tolist()
+    return pd.DataFrame({
+        "respondent": raw["Respondant"],
+        "unique_key": raw["Unique_Key"],
+        "case_id": raw["HC_anonimizada"],
+        "variant": raw["Simple_Extended"],
+        "answer_date": pd.to_datetime(raw["Date"], format="%d/%m/%Y", errors="coerce").dt.date,
+        "attempt": pd.to_numeric(raw["Id"], errors="coerce").astype("Int64"),
+        "predicted_diagnoses": pd.Series([[dx for dx in row if dx] for row in predicted], dtype=object),
+        "true_diagnosis": raw["True_Diagnosis"],
+        "eval_top1": pd.to_numeric(raw["Eval_Top1"], errors="coerce").astype("Int64"),
+        "eval_top5": pd.to_numeric(raw["Eval_Top5"], errors="coerce").astype("Int64"),
+    })
+
+def read_case_metadata_csv(path: str) -> pd.DataFrame:
+    """
+    Read DxGPT_casos_metadata.csv.
+
+    Args:
+        path: CSV path
+
+    Returns:
+        DataFrame with the dxgpt_case_metadata columns
+    """
+    raw = pd.read_csv(path, dtype=str, **ADDITIONAL_DATA_CSV_OPTIONS)
+    raw.columns = ["case_id", "case_type", "disease_type", "diagnosis", "complexity"]
+    return raw
+
+def load_dxgpt(session, data_dir: str, method: str = "copy", verbose: bool = False) -> Dict[str, int]:
+    """
+    Load the DxGPT datasets into the bench29 dxgpt tables, in one transaction.
+    Result files replace the rows of the same source_name, the additional data
+    tables are replaced as a whole, so reloading is idempotent.
+
+    Args:
+        session: SQLAlchemy session
+        data_dir: The dxgpt_testing-main directory
+        method: Bulk write method, "copy" (Postgres COPY) or "insert"
+        verbose: Whether to print status information
+
+    Returns:
+        Dictionary mapping table name to number of rows loaded
+    """
+    from db.bench29.bench29_models import DxgptDiagnosis, DxgptScore, DxgptAnswer, DxgptCaseMetadata
+
+    result_files = [
+        (DxgptDiagnosis, read_diagnoses_csv, sorted(glob.glob(os.path.join(data_dir, "data", "diagnoses_*.csv")))),
+        (DxgptScore, read_scores_csv, sorted(glob.glob(os.path.join(data_dir, "data", "scores_*.csv")))),
+    ]
+    additional_files = [
+        (DxgptAnswer, read_answers_csv, os.path.join(data_dir, "additional_data", "DxGPT_answers_eval_DxGPT.csv")),
+        (DxgptCaseMetadata, read_case_metadata_csv, os.path.join(data_dir, "additional_data", "DxGPT_casos_metadata.csv")),
+    ]
+
+    counts = {}
+    try:
+        for model, reader, paths in result_files:
+            if not paths:
+                continue
+            df = pd.concat([reader(path) for path in paths], ignore_index=True)
+            session.query(model).filter(model.source_name.in_(df["source_name"].unique().tolist())).delete(synchronize_session=False)
+            counts[model.__tablename__] = write_rows(session, model, frame_rows(df), method=method, verbose=verbose)
+
+        for model, reader, path in additional_files:
+            if not os.path.exists(path):
+                if verbose:
+                    print(f"  {path} not found, skipping")
+                continue
+            df = reader(path)
+            session.query(model).delete(synchronize_session=False)
+            counts[model.__tablename__] = write_rows(session, model, frame_rows(df), method=method, verbose=verbose)
+
+        session.commit()
+    except Exception:
+        session.rollback()
+        raise
+
+    if verbose:
+        print("Loaded DxGPT data: " + ", ".join(f"{table}={n}" for table, n in counts.items()))
+
+    return counts
@@ -0,0 +1,369 @@
+"""
+Unified ingest pipeline for the hoarder29 result trees.
+Every patient file is read once (across a process pool) and turned into
+CasesBench, LlmDifferentialDiagnosis, DifferentialDiagnosis2Rank and
+LlmAnalysis rows, written stage by stage in dependency order with batched
+writes. Generated IDs are resolved in memory (INSERT ... RETURNING), and the
+whole run is a single transaction. The parse_* scripts select stages of it.
+"""
+
+import os
+import datetime
+from collections import Counter
+from typing import Dict, List, Any, Optional, Sequence, Tuple
+
+from libs.libs import get_directories
+from libs.progress_libs import ProgressReporter
+from hoarder29.libs.parser_libs import extract_model_prompt, parse_diagnosis_ranks
+from hoarder29.libs.rank_libs import parse_rank, DEFAULT_RANK
+from hoarder29.libs.bulk_libs import read_json_file, list_result_files, load_json_files_parallel, insert_returning, write_rows
+from hoarder29.libs.manifest_libs import scan_result_files, pending_files, record_files
+
+# Stages in dependency order
+STAGES = ("cases", "diagnoses", "ranks", "analysis")
+
+# Ingest manifest stage of every pipeline stage
+MANIFEST_STAGES = {
+    "cases": "cases",
+    "diagnoses": "llm_diagnoses",
+    "ranks": "llm_ranks",
+    "analysis": "predicted_ranks",
+}
+
+# Defaults of the analysis rows
+DEFAULT_SEMANTIC_RELATIONSHIP = 'Exact Synonym'
+DEFAULT_SEVERITY = 'rare'
+
+def read_result_file(file_path: str, encoding: str = 'utf-8-sig') -> Tuple[str, Optional[Dict[str, Any]], Optional[str]]:
+    """
+    Read a patient file and parse everything the stages need (process pool worker).
+
+    Args:
+        file_path: Path to the JSON file
+        encoding: File encoding
+
+    Returns:
+        Tuple of (file_path, record or None, error message or None). The record
+        holds "data" (the whole JSON), "predict_diagnosis", "ranks" (parsed
+        ranked diagnoses) and "predict_rank"
+    """
+    file_path, data, error = read_json_file(file_path, encoding)
+    if not data:
+        return file_path, None, error
+
+    predict_diagnosis = data.get("predict_diagnosis", "")
+    return file_path, {
+        "data": data,
+        "predict_diagnosis": predict_diagnosis,
+        "ranks": parse_diagnosis_ranks(predict_diagnosis),
+        "predict_rank": str(data.get("predict_rank", str(DEFAULT_RANK))),
+    }, None
+
+def resolve_directories(session, directories: List[str], verbose: bool = False) -> Dict[str, Tuple[int, int]]:
+    """
+    Resolve the model and prompt of every model-prompt directory once.
+
+    Args:
+        session: SQLAlchemy session
+        directories: Directory names
+        verbose: Whether to print skipped directories
+
+    Returns:
+        Dictionary mapping directory name to (model_id, prompt_id), directories
+        whose model or prompt is unknown are left out
+    """
+    from db.db_queries import get_model_id, get_prompt_id
+
+    resolved = {}
+    for dir_name in directories:
+        model_name, prompt_name = extract_model_prompt(dir_name)
+        if not model_name or not prompt_name:
+            if verbose:
+                print(f"  Could not extract model and prompt from {dir_name}, skipping")
+            continue
+        model_id = get_model_id(session, model_name)
+        prompt_id = get_prompt_id(session, prompt_name)
+        if not model_id or not prompt_id:
+            if verbose:
+                print(f"  Model {model_name} or prompt {prompt_name} not found in database, skipping")
+            continue
+        resolved[dir_name] = (model_id, prompt_id)
+    return resolved
+
+def load_id_maps(session, verbose: bool = False) -> Dict[str, Any]:
+    """
+    Load the ID maps of the pipeline with one query each.
+
+    Args:
+        session: SQLAlchemy session
+        verbose: Whether to print the map sizes
+
+    Returns:
+        Dictionary with "cases" (source_file_path -> case id), "diagnoses"
+        ((case, model, prompt) -> diagnosis id), "ranked" and "analysed"
+        (sets of diagnosis ids with rank rows / with an analysis)
+    """
+    from db.bench29.bench29_models import CasesBench, LlmDifferentialDiagnosis, DifferentialDiagnosis2Rank, LlmAnalysis
+
+    diagnoses = {}
+    for diagnosis_id, case_id, model_id, prompt_id in session.query(
+        LlmDifferentialDiagnosis.id,
+        LlmDifferentialDiagnosis.cases_bench_id,
+        LlmDifferentialDiagnosis.model_id,
+        LlmDifferentialDiagnosis.prompt_id
+    ).order_by(LlmDifferentialDiagnosis.id):
+        diagnoses.setdefault((case_id, model_id, prompt_id), diagnosis_id)
+
+    id_maps = {
+        "cases": dict(session.query(CasesBench.source_file_path, CasesBench.id)),
+        "diagnoses": diagnoses,
+        "ranked": {i for (i,) in session.query(DifferentialDiagnosis2Rank.differential_diagnosis_id).distinct()},
+        "analysed": {i for (i,) in session.query(LlmAnalysis.differential_diagnosis_id).distinct()},
+    }
+
+    if verbose:
+        print(f"Loaded {len(id_maps['cases'])} cases, {len(id_maps['diagnoses'])} diagnoses, "
+              f"{len(id_maps['ranked'])} ranked and {len(id_maps['analysed'])} analysed diagnoses")
+
+    return id_maps
+
+def run_ingest(
+    session,
+    base_dir: str,
+    stages: Sequence[str] = STAGES,
+    workers: Optional[int] = None,
+    method: str = "insert",
+    incremental: bool = True,
+    verbose: bool = False
+) -> Dict[str, int]:
+    """
+    Ingest a result tree: read each patient file once and write the rows of the
+    selected stages in dependency order, in a single transaction.
+
+    This is the only supported writer of llm_analysis: the analysis stage keeps
+    the leaderboard_rank_count aggregate in step with the rows it adds or
+    replaces. Anything else that changes llm_analysis must be followed by
+    leaderboard-aggregates.py --rebuild.
+
+    Args:
+        session: SQLAlchemy session
+        base_dir: Base directory containing model/prompt directories
+        stages: Stages to run, any of STAGES ("cases", "diagnoses", "ranks", "analysis")
+        workers: Number of processes reading and parsing files (default: most cores)
+        method: Bulk write method of the rank and analysis rows, "insert" or "copy"
+        incremental: Whether to skip files the ingest manifest records unchanged for every selected stage;
+                     the rows of files modified since they were recorded are replaced
+        verbose: Whether to print status information
+
+    Returns:
+        Dictionary mapping stage name to number of rows added
+    """
+    from db.bench29.bench29_models import CasesBench, LlmDifferentialDiagnosis, DifferentialDiagnosis2Rank, LlmAnalysis
+    from db.db_queries import diagnosis_rank_row, get_semantic_relationship_id, get_severity_id, increment_leaderboard_rank_count
+
+    unknown = set(stages) - set(STAGES)
+    if unknown:
+        raise ValueError(f"Unknown ingest stages {sorted(unknown)}, expected any of {STAGES}")
+    stages = [stage for stage in STAGES if stage in stages]
+
+    directories = get_directories(base_dir, verbose=verbose)
+    resolved = resolve_directories(session, directories, verbose=verbose)
+    id_maps = load_id_maps(session, verbose=verbose)
+
+    # Files each stage still has to handle, from one scan shared by all stages;
+    # the rows of modified files are replaced instead of skipped
+    pending, touched = {}, {}
+    modified = {stage: set() for stage in stages}
+    if incremental:
+        scanned = scan_result_files(base_dir, list(resolved))
+        for stage in stages:
+            pending[stage], touched[stage], modified[stage] = pending_files(
+                session, MANIFEST_STAGES[stage], base_dir, list(resolved), scanned=scanned, verbose=verbose
+            )
+
+    work = []  # (file_path, relative_path, model_id, prompt_id)
+    for dir_name, (model_id, prompt_id) in resolved.items():
+        for file_path in list_result_files(os.path.join(base_dir, dir_name)):
+            relative_path = os.path.join(dir_name, os.path.basename(file_path))
+            if incremental and not any(relative_path in pending[stage] for stage in stages):
+                continue
+            work.append((file_path, relative_path, model_id, prompt_id))
+
+    def needs(stage, relative_path):
+        return stage in stages and (not incremental or relative_path in pending[stage])
+
+    if verbose:
+        print(f"Reading {len(work)} patient files for stages {', '.join(stages)}")
+    progress = ProgressReporter("ingest", total=len(work))
+
+    records = [
+        (record, item)
+        for (_, record), item in zip(
+            load_json_files_parallel([file_path for file_path, _, _, _ in work], workers=workers,
+                                     reader=read_result_file, progress=progress, verbose=verbose),
+            work
+        )
+        if record is not None
+    ]
+    progress.close()
+
+    handled = {stage: set() for stage in stages}
+    added = {stage: 0 for stage in stages}
+    replaced = {stage: 0 for stage in stages}
+    timestamp = datetime.datetime.now()
+
+    try:
+        # Cases: one per patient file name, the first directory wins
+        if "cases" in stages:
+            new_cases = {}
+            for record, (_, relative_path, _, _) in records:
+                if not needs("cases", relative_path):
+                    continue
+                patient = os.path.basename(relative_path)
+                handled["cases"].add(relative_path)
+                if patient in id_maps["cases"] and relative_path in modified["cases"]:
+                    # Modified file of a known case: its content replaces the case metadata
+                    session.query(CasesBench).filter(CasesBench.id == id_maps["cases"][patient]).update(
+                        {'meta_data': record["data"], 'processed_date': timestamp}, synchronize_session=False
+                    )
+                    replaced["cases"] += 1
+                elif patient not in id_maps["cases"] and patient not in new_cases:
+                    new_cases[patient] = {
+                        'hospital': "ramedis",
+                        'meta_data': record["data"],
+                        'processed_date': timestamp,
+                        'source_type': "jsonl",
+                        'source_file_path': patient
+                    }
+            for case_id, patient in insert_returning(session, CasesBench, list(new_cases.values()), ["id", "source_file_path"]):
+                id_maps["cases"][patient] = case_id
+            added["cases"] = len(new_cases)
+
+        # Diagnoses: one per case, model and prompt
+        if "diagnoses" in stages:
+            new_diagnoses = {}
+            for record, (_, relative_path, model_id, prompt_id) in records:
+                if not needs("diagnoses", relative_path):
+                    continue
+                case_id = id_maps["cases"].get(os.path.basename(relative_path))
+                if case_id is None:
+                    continue
+                handled["diagnoses"].add(relative_path)
+                key = (case_id, model_id, prompt_id)
+                if record["predict_diagnosis"] and key in id_maps["diagnoses"] and relative_path in modified["diagnoses"]:
+                    # Modified file of a known diagnosis: update its text in place
+                    session.query(LlmDifferentialDiagnosis).filter(
+                        LlmDifferentialDiagnosis.id == id_maps["diagnoses"][key]
+                    ).update({'diagnosis': record["predict_diagnosis"], 'timestamp': timestamp}, synchronize_session=False)
+                    replaced["diagnoses"] += 1
+                elif record["predict_diagnosis"] and key not in id_maps["diagnoses"] and key not in new_diagnoses:
+                    new_diagnoses[key] = {
+                        'cases_bench_id': case_id,
+                        'model_id': model_id,
+                        'prompt_id': prompt_id,
+                        'diagnosis': record["predict_diagnosis"],
+                        'timestamp': timestamp
+                    }
+            returned = insert_returning(
+                session, LlmDifferentialDiagnosis, list(new_diagnoses.values()),
+                ["id", "cases_bench_id", "model_id", "prompt_id"]
+            )
+            for diagnosis_id, case_id, model_id, prompt_id in returned:
+                id_maps["diagnoses"][(case_id, model_id, prompt_id)] = diagnosis_id
+            added["diagnoses"] = len(new_diagnoses)
+
+        # Resolve the diagnosis of every record for the ranks and analysis stages
+        resolved_records = []
+        for record, (_, relative_path, model_id, prompt_id) in records:
+            case_id = id_maps["cases"].get(os.path.basename(relative_path))
+            diagnosis_id = id_maps["diagnoses"].get((case_id, model_id, prompt_id))
+            if diagnosis_id is not None:
+                resolved_records.append((record, relative_path, case_id, diagnosis_id, model_id, prompt_id))
+
+        # Ranks: every parsed ranked diagnosis of unranked diagnoses
+        if "ranks" in stages:
+            rank_rows = []
+            stale_ranks = set()
+            for record, relative_path, case_id, diagnosis_id, _, _ in resolved_records:
+                if not needs("ranks", relative_path):
+                    continue
+                handled["ranks"].add(relative_path)
+                if diagnosis_id in id_maps["ranked"]:
+                    if relative_path not in modified["ranks"] or diagnosis_id in stale_ranks:
+                        continue
+                    # Modified file of a ranked diagnosis: its ranks are replaced
+                    stale_ranks.add(diagnosis_id)
+                id_maps["ranked"].add(diagnosis_id)
+                ranks = record["ranks"] or [(None, None, None)]
+                rank_rows.extend(
+                    diagnosis_rank_row(case_id, diagnosis_id, rank_position, predicted_diagnosis, reasoning)
+                    for rank_position, predicted_diagnosis, reasoning in ranks
+                )
+            if stale_ranks:
+                session.query(DifferentialDiagnosis2Rank).filter(
+                    DifferentialDiagnosis2Rank.differential_diagnosis_id.in_(list(stale_ranks))
+                ).delete(synchronize_session=False)
+            write_rows(session, DifferentialDiagnosis2Rank, rank_rows, method=method, verbose=verbose)
+            added["ranks"] = len(rank_rows)
+            replaced["ranks"] = len(stale_ranks)
+
+        # Analysis: the predicted rank of every diagnosis, with the leaderboard increments
+        if "analysis" in stages:
+            semantic_id = get_semantic_relationship_id(session, DEFAULT_SEMANTIC_RELATIONSHIP)
+            severity_id = get_severity_id(session, DEFAULT_SEVERITY)
+            analysis_rows = []
+            rank_counts = Counter()
+            stale_analyses = {}  # diagnosis id -> (model_id, prompt_id)
+            for record, relative_path, case_id, diagnosis_id, model_id, prompt_id in resolved_records:
+                if not needs("analysis", relative_path):
+                    continue
+                handled["analysis"].add(relative_path)
+                if diagnosis_id in id_maps["analysed"]:
+                    if relative_path not in modified["analysis"] or diagnosis_id in stale_analyses:
+                        continue
+                    # Modified file of an analysed diagnosis: its analysis is replaced
+                    stale_analyses[diagnosis_id] = (model_id, prompt_id)
+                id_maps["analysed"].add(diagnosis_id)
+                predicted_rank = parse_rank(record["predict_rank"])
+                analysis_rows.append({
+                    'cases_bench_id': case_id,
+                    'differential_diagnosis_id': diagnosis_id,
+                    'predicted_rank': predicted_rank,
+                    'differential_diagnosis_semantic_relationship_id': semantic_id,
+                    'case_severity': severity_id,
+                    'differential_diagnosis_severity': severity_id
+                })
+                rank_counts[(model_id, prompt_id, predicted_rank)] += 1
+            if stale_analyses:
+                # Take the replaced rows back out of the leaderboard before deleting them
+                stale_rows = session.query(LlmAnalysis.differential_diagnosis_id, LlmAnalysis.predicted_rank).filter(
+                    LlmAnalysis.differential_diagnosis_id.in_(list(stale_analyses))
+                ).all()
+                for diagnosis_id, predicted_rank in stale_rows:
+                    rank_counts[(*stale_analyses[diagnosis_id], predicted_rank)] -= 1
+                session.query(LlmAnalysis).filter(
+                    LlmAnalysis.differential_diagnosis_id.in_(list(stale_analyses))
+                ).delete(synchronize_session=False)
+            write_rows(session, LlmAnalysis, analysis_rows, method=method, verbose=verbose)
+            for (model_id, prompt_id, predicted_rank), n in rank_counts.items():
+                if n:
+                    increment_leaderboard_rank_count(session, model_id, prompt_id, predicted_rank, n=n)
+            added["analysis"] = len(analysis_rows)
+            replaced["analysis"] = len(stale_analyses)
+
+        if incremental:
+            for stage in stages:
+                entries = {**touched[stage], **{path: pending[stage][path] for path in handled[stage]}}
+                record_files(session, MANIFEST_STAGES[stage], entries)
+
+        session.commit()
+    except Exception:
+        session.rollback()
+        raise
+
+    if verbose:
+        print("Ingest completed. Rows added: " + ", ".join(f"{stage}={n}" for stage, n in added.items()))
+        if any(replaced.values()):
+            print("Modified files re-ingested: " + ", ".join(f"{stage}={n}" for stage, n in replaced.items()))
+
+    return added
@@ -0,0 +1,177 @@
+"""
+Ingest manifest helpers for the hoarder29 parsers.
+A single scandir pass compares every result file against the manifest of an
+ingestion stage (size, mtime, content hash); only new or modified files are
+handed to the parser, and the files it ingested are recorded in the caller's
+transaction.
+"""
+
+import os
+import hashlib
+import datetime
+from typing import Dict, List, Optional, Set, Tuple
+
+# (size, mtime_ns) of a scanned file, (size, mtime_ns, content_hash) of a manifest entry
+FileStat = Tuple[int, int]
+ManifestEntry = Tuple[int, int, str]
+
+def file_hash(file_path: str, chunk_size: int = 1 << 20) -> str:
+    """
+    Compute the sha256 hex digest of a file.
+
+    Args:
+        file_path: Path to the file
+        chunk_size: Bytes read per chunk
+
+    Returns:
+        Hex digest string
+    """
+    digest = hashlib.sha256()
+    with open(file_path, 'rb') as f:
+        for chunk in iter(lambda: f.read(chunk_size), b''):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+def scan_result_files(
+    base_dir: str,
+    directories: List[str],
+    extension: str = '.json',
+    prefix: str = 'patient_'
+) -> Dict[str, FileStat]:
+    """
+    Stat every result file of the given directories with one scandir pass each.
+
+    Args:
+        base_dir: Base directory path
+        directories: Directory names to scan
+        extension: Required file extension
+        prefix: Required file name prefix
+
+    Returns:
+        Dictionary mapping path relative to base_dir to (size, mtime_ns)
+    """
+    scanned = {}
+    for dir_name in directories:
+        dir_path = os.path.join(base_dir, dir_name)
+        if not os.path.isdir(dir_path):
+            continue
+        with os.scandir(dir_path) as entries:
+            for entry in entries:
+                if entry.name.startswith(prefix) and entry.name.endswith(extension) and entry.is_file():
+                    stat = entry.stat()
+                    scanned[os.path.join(dir_name, entry.name)] = (stat.st_size, stat.st_mtime_ns)
+    return scanned
+
+def load_manifest(session, stage: str) -> Dict[str, ManifestEntry]:
+    """
+    Load the manifest of an ingestion stage.
+
+    Args:
+        session: SQLAlchemy session
+        stage: Ingestion stage name (e.g. "cases")
+
+    Returns:
+        Dictionary mapping relative path to (size, mtime_ns, content_hash)
+    """
+    from db.bench29.bench29_models import IngestManifest
+
+    rows = session.query(
+        IngestManifest.path, IngestManifest.size, IngestManifest.mtime_ns, IngestManifest.content_hash
+    ).filter(IngestManifest.stage == stage)
+    return {path: (size, mtime_ns, content_hash) for path, size, mtime_ns, content_hash in rows}
+
+def pending_files(
+    session,
+    stage: str,
+    base_dir: str,
+    directories: List[str],
+    scanned: Optional[Dict[str, FileStat]] = None,
+    verbose: bool = False
+) -> Tuple[Dict[str, ManifestEntry], Dict[str, ManifestEntry], Set[str]]:
+    """
+    Find the result files a stage still has to ingest.
+    Files whose size and mtime match the manifest are skipped without being
+    read; files whose stat changed are hashed and only count as modified when
+    their content hash differs too.
+
+    Args:
+        session: SQLAlchemy session
+        stage: Ingestion stage name
+        base_dir: Base directory path
+        directories: Directory names to scan
+        scanned: Optional result of scan_result_files, shared by several stages
+        verbose: Whether to print a summary
+
+    Returns:
+        Tuple of (pending, touched, modified): pending and touched map relative
+        path to (size, mtime_ns, content_hash), pending files are new or
+        modified, touched files have a new mtime but unchanged content;
+        modified is the set of pending paths the manifest already records,
+        whose rows have to be replaced rather than added
+    """
+    manifest = load_manifest(session, stage)
+    if scanned is None:
+        scanned = scan_result_files(base_dir, directories)
+
+    pending = {}
+    touched = {}
+    modified = set()
+    for path, (size, mtime_ns) in scanned.items():
+        known = manifest.get(path)
+        if known is not None and known[0] == size and known[1] == mtime_ns:
+            continue
+        content_hash = file_hash(os.path.join(base_dir, path))
+        if known is not None and known[2] == content_hash:
+            touched[path] = (size, mtime_ns, content_hash)
+        else:
+            pending[path] = (size, mtime_ns, content_hash)
+            if known is not None:
+                modified.add(path)
+
+    if verbose:
+        print(f"Manifest '{stage}': {len(scanned)} files, {len(pending) - len(modified)} new, "
+              f"{len(modified)} modified, {len(scanned) - len(pending)} unchanged")
+
+    return pending, touched, modified
+
+def record_files(session, stage: str, entries: Dict[str, ManifestEntry], ingested_at: Optional[datetime.datetime] = None) -> int:
+    """
+    Upsert manifest entries of an ingestion stage, without committing, so they
+    land in the same transaction as the ingested rows.
+
+    Args:
+        session: SQLAlchemy session
+        stage: Ingestion stage name
+        entries: Dictionary mapping relative path to (size, mtime_ns, content_hash)
+        ingested_at: Ingestion timestamp (default: now)
+
+    Returns:
+        int: Number of entries recorded
+    """
+    from sqlalchemy.dialects.postgresql import insert
+    from db.bench29.bench29_models import IngestManifest
+
+    if not entries:
+        return 0
+    if ingested_at is None:
+        ingested_at = datetime.datetime.utcnow()
+
+    rows = [
+        {'stage': stage, 'path': path, 'size': size, 'mtime_ns': mtime_ns,
+         'content_hash': content_hash, 'ingested_at': ingested_at}
+        for path, (size, mtime_ns, content_hash) in entries.items()
+    ]
+    statement = insert(IngestManifest)
+    statement = statement.on_conflict_do_update(
+        index_elements=['stage', 'path'],
+        set_={
+            'size': statement.excluded.size,
+            'mtime_ns': statement.excluded.mtime_ns,
+            'content_hash': statement.excluded.content_hash,
+            'ingested_at': statement.excluded.ingested_at,
+        }
+    )
+    for start in range(0, len(rows), 1000):
+        session.execute(statement, rows[start:start + 1000])
+
+    return len(rows)
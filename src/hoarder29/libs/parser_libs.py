@@ -3,17 +3,189 @@ Parsing utilities for the hoarder29 module.
 """
 
 import re
+import json
+
+# Precompiled patterns of the multi-rank parser
+# Numbered items: "1. x", "1) x", "1- x", "1: x", "1、x", "(1) x", "#1 x", "**1.** x", "Rank 1: x", "1.x"
+# ("3.5 cm" is not an item)
+NUMBERED_ITEM_PATTERN = re.compile(
+    r'^\s*(?:>\s*)?(?:#+\s*)?(?:\*\*|__)?\s*'
+    r'(?:(?:#|rank\s*)(\d{1,3})[\.．\)\]:：]?|[\(\[]?(\d{1,3})(?:[\.．](?!\d)|[\)\]:：、\-]|\s*[-–—]))'
+    r'(?:\*\*|__)?\s*(\S.*)$',
+    re.IGNORECASE
+)
+# Markdown bullets: "- x", "* x", "• x", "+ x" (not "**bold**")
+BULLET_ITEM_PATTERN = re.compile(r'^\s*(?:[-•+]|\*(?!\*))\s+(\S.*)$')
+# Name/reasoning separators: "Name: reasoning", "Name - reasoning", "Name – reasoning"
+REASONING_SEPARATOR_PATTERN = re.compile(r'\s*(?:[:：]|\s[-–—]\s)\s*')
+MARKDOWN_EMPHASIS_PATTERN = re.compile(r'\*\*|__|`')
+JSON_FENCE_PATTERN = re.compile(r'^\s*```(?:json)?\s*|\s*```\s*$', re.IGNORECASE)
+
+JSON_NAME_KEYS = ("diagnosis", "name", "disease", "dx", "condition")
+JSON_RANK_KEYS = ("rank", "position", "order")
+JSON_REASONING_KEYS = ("reasoning", "reason", "rationale", "explanation", "justification")
+JSON_LIST_KEYS = ("diagnoses", "differential_diagnosis", "differential", "ranking", "diagnosis")
+
+def _split_item(item_text):
+    """
+    Split an item into (diagnosis_name, reasoning), removing markdown emphasis.
+    A bold name ("**Name** reasoning") ends at its closing marker.
+    """
+    item_text = item_text.strip()
+    bold = re.match(r'^(\*\*|__)(.+?)\1\s*[:\-–—]?\s*(.*)$', item_text)
+    if bold:
+        name, reasoning = bold.group(2), bold.group(3)
+    else:
+        parts = REASONING_SEPARATOR_PATTERN.split(item_text, maxsplit=1)
+        name, reasoning = parts[0], parts[1] if len(parts) > 1 else ""
+    name = MARKDOWN_EMPHASIS_PATTERN.sub('', name).strip().rstrip(':').strip()
+    reasoning = MARKDOWN_EMPHASIS_PATTERN.sub('', reasoning).strip()
+    return name, reasoning or None
+
+def _first_value(item, keys):
+    """Return the value of the first key of keys present in a JSON object."""
+    for key in keys:
+        if key in item:
+            return item[key]
+    return None
+
+def _iter_json_ranks(diagnosis_text):
+    """
+    Yield (rank, diagnosis, reasoning) tuples from inline JSON, either a list of
+    strings/objects or an object holding such a list. Yields nothing when the
+    text holds no usable JSON.
+    """
+    text = JSON_FENCE_PATTERN.sub('', diagnosis_text)
+    start = min((i for i in (text.find('['), text.find('{')) if i >= 0), default=-1)
+    if start < 0:
+        return
+    end = max(text.rfind(']'), text.rfind('}'))
+    try:
+        data = json.loads(text[start:end + 1])
+    except ValueError:
+        return
+    
+    if isinstance(data, dict):
+        data = _first_value(data, JSON_LIST_KEYS)
+    if not isinstance(data, list):
+        return
+    
+    for position, item in enumerate(data, start=1):
+        if isinstance(item, str):
+            name, reasoning = _split_item(item)
+            rank = position
+        elif isinstance(item, dict):
+            name = _first_value(item, JSON_NAME_KEYS)
+            reasoning = _first_value(item, JSON_REASONING_KEYS)
+            rank = _first_value(item, JSON_RANK_KEYS)
+            try:
+                rank = int(rank)
+            except (TypeError, ValueError):
+                rank = position
+        else:
+            continue
+        if name:
+            yield rank, str(name).strip(), str(reasoning).strip() if reasoning else None
+
+def iter_diagnosis_ranks(diagnosis_text):
+    """
+    Parse differential diagnosis text into every ranked diagnosis, in one pass.
+    Handles numbered lists ("1.", "1)", "(1)", "#1", "**1.**", "Rank 1:"),
+    markdown bullets (ranked by position) and inline JSON. Lines following an
+    item belong to its reasoning until a blank line; unnumbered text after a
+    blank line (closing remarks) is dropped. Text without any list is read as
+    a single diagnosis on its first line.
+    
+    Args:
+        diagnosis_text: The raw diagnosis text from the LLM
+        
+    Yields:
+        Tuples of (rank_position, diagnosis_name, reasoning)
+    """
+    if not diagnosis_text or not diagnosis_text.strip():
+        return
+    
+    stripped = diagnosis_text.lstrip()
+    if stripped[0] in '[{`':
+        found = False
+        for parsed in _iter_json_ranks(diagnosis_text):
+            found = True
+            yield parsed
+        if found:
+            return
+    
+    current = None  # [rank, name, reasoning lines]
+    after_blank = False
+    numbered = False
+    bullet_rank = 0
+    
+    for line in diagnosis_text.splitlines():
+        if not line.strip():
+            after_blank = True
+            continue
+        
+        match = NUMBERED_ITEM_PATTERN.match(line)
+        if match:
+            numbered = True
+            rank = int(match.group(1) or match.group(2))
+            item_text = match.group(3)
+        else:
+            bullet = BULLET_ITEM_PATTERN.match(line)
+            if bullet and not numbered:
+                bullet_rank += 1
+                rank = bullet_rank
+                item_text = bullet.group(1)
+            else:
+                # Bullets nested under a numbered item and continuation lines are reasoning
+                if current is not None and (bullet or not after_blank):
+                    current[2].append(bullet.group(1).strip() if bullet else line.strip())
+                continue
+        
+        if current is not None:
+            yield current[0], current[1], "\n".join(current[2]) or None
+        name, reasoning = _split_item(item_text)
+        current = [rank, name, [reasoning] if reasoning else []]
+        after_blank = False
+    
+    if current is not None:
+        yield current[0], current[1], "\n".join(current[2]) or None
+        return
+    
+    # No list: the first line is the diagnosis, the rest is reasoning
+    lines = [line.strip() for line in diagnosis_text.strip().splitlines() if line.strip()]
+    name, reasoning = _split_item(lines[0])
+    reasoning_lines = ([reasoning] if reasoning else []) + lines[1:]
+    yield 1, name, "\n".join(reasoning_lines) or None
+
+def parse_diagnosis_ranks(diagnosis_text, verbose=False):
+    """
+    Parse differential diagnosis text into its full ranked list.
+    
+    Args:
+        diagnosis_text: The raw diagnosis text from the LLM
+        verbose: Whether to print the parsed ranks
+        
+    Returns:
+        List of (rank_position, diagnosis_name, reasoning) tuples, empty if
+        the text is empty
+    """
+    ranks = list(iter_diagnosis_ranks(diagnosis_text))
+    if verbose:
+        print(f"Parsed {len(ranks)} ranked diagnoses")
+        for rank_position, diagnosis_name, reasoning in ranks:
+            print(f"  {rank_position}: {diagnosis_name}{' (with reasoning)' if reasoning else ''}")
+    return ranks
 
 def parse_diagnosis_text(diagnosis_text, verbose=False, deep_verbose=False):
     """
-    Parse diagnosis text to extract rank, diagnosis, and reasoning.
-    Handles various formats and extracts diagnosis names from complex text.
+    Parse diagnosis text to extract the first ranked diagnosis.
+    Use iter_diagnosis_ranks / parse_diagnosis_ranks to get the whole ranked list.
     If parsing fails, returns None values.
     
     Args:
         diagnosis_text: The raw diagnosis text from the LLM
         verbose: Whether to print basic debug information
-        deep_verbose: Whether to print detailed debugging information for each line
+        deep_verbose: Whether to print every parsed rank
         
     Returns:
         tuple: (rank_position, diagnosis_name, reasoning)
@@ -23,109 +195,13 @@ def parse_diagnosis_text(diagnosis_text, verbose=False, deep_verbose=False):
         print("\n" + "="*80)
         print(f"STARTING PARSER: Received diagnosis text of length: {len(diagnosis_text) if diagnosis_text else 0}")
     
-    if not diagnosis_text or not diagnosis_text.strip():
+    ranks = parse_diagnosis_ranks(diagnosis_text, verbose=deep_verbose)
+    if not ranks:
         if verbose:
             print("Empty diagnosis text, returning None values")
         return None, None, None
     
-    # Split the text into lines
-    lines = diagnosis_text.strip().split('\n')
-    if verbose:
-        print(f"Split text into {len(lines)} lines")
-    
-    # Try to find a numbered diagnosis
-    rank_position = None
-    diagnosis_name = None
-    reasoning_lines = []
-    
-    for i, line in enumerate(lines):
-        line = line.strip()
-        if not line:
-            continue
-        
-        # Check if this line starts with a number (like "1." or "1)")
-        try:
-            number_match = re.match(r'^\s*(\d+)[\.\)\-]?\s*(.+)', line)
-        except Exception as e:
-            print(f"Error during regex matching for line {i+1}: {str(e)}")
-            continue
-            
-        if number_match:
-            # Found a numbered line, likely a diagnosis
-            try:
-                rank_position = int(number_match.group(1))
-            except ValueError:
-                print(f"Failed to parse rank number: {number_match.group(1)}")
-                rank_position = 1  # Default to rank 1
-                
-            diagnosis_text = number_match.group(2).strip()
-            
-            # Check if diagnosis has a colon separating diagnosis and reasoning
-            try:
-                colon_parts = diagnosis_text.split(':', 1)
-            except Exception as e:
-                print(f"Error splitting by colon: {str(e)}")
-                diagnosis_name = diagnosis_text
-                break
-                
-            if len(colon_parts) > 1 and len(colon_parts[1].strip()) > 0:
-                # There's a non-empty part after the colon, treat it as reasoning
-                diagnosis_name = colon_parts[0].strip()
-                reasoning_lines.append(colon_parts[1].strip())
-                
-                # We found a diagnosis, now collect the rest as reasoning
-                for j in range(i+1, len(lines)):
-                    if lines[j].strip():
-                        reasoning_lines.append(lines[j].strip())
-            else:
-                # No colon or empty part after colon, the whole text is the diagnosis
-                diagnosis_name = diagnosis_text
-                
-                # We found a diagnosis, now collect the rest as reasoning
-                for j in range(i+1, len(lines)):
-                    if lines[j].strip():
-                        reasoning_lines.append(lines[j].strip())
-            
-            break  # We found our diagnosis, stop processing lines
-            
-    # If we didn't find a numbered diagnosis, try to use the first line
-    if diagnosis_name is None and lines:
-        try:
-            # Try to parse it as a single diagnosis
-            first_line = lines[0].strip()
-            colon_parts = first_line.split(':', 1)
-            
-            if len(colon_parts) > 1 and len(colon_parts[1].strip()) > 0:
-                diagnosis_name = colon_parts[0].strip()
-                reasoning_lines.append(colon_parts[1].strip())
-                
-                # Add remaining lines as reasoning
-                for j in range(1, len(lines)):
-                    if lines[j].strip():
-                        reasoning_lines.append(lines[j].strip())
-            else:
-                # No colon, use the entire first line as diagnosis
-                diagnosis_name = first_line
-                
-                # Add remaining lines as reasoning
-                for j in range(1, len(lines)):
-                    if lines[j].strip():
-                        reasoning_lines.append(lines[j].strip())
-                        
-            rank_position = 1  # Default rank if not numbered
-            
-        except Exception as e:
-            print(f"Error parsing first line as diagnosis: {str(e)}")
-            return None, None, None
-    
-    # Join reasoning lines into a single string
-    reasoning = None
-    if reasoning_lines:
-        try:
-            reasoning = "\n".join(reasoning_lines)
-        except Exception as e:
-            print(f"Error joining reasoning lines: {str(e)}")
-            reasoning = None
+    rank_position, diagnosis_name, reasoning = ranks[0]
     
     if verbose:
         print("\nPARSING RESULT:")
@@ -0,0 +1,173 @@
+"""
+Phenotype and disease code ingestion for the hoarder29 module.
+Streams JSONL case files (Phenotype HP codes, RareDisease OMIM/ORPHA codes)
+line by line and stores the codes as integer arrays in
+bench29.case_phenotype_codes. When a result tree was generated from the same
+file, its patient_N.json files are line N of the file, and the cases are
+linked to their CasesBench rows through source_file_path.
+"""
+
+import json
+from typing import Dict, List, Any, Iterator, Optional, Tuple
+
+from hoarder29.libs.bulk_libs import bulk_insert
+
+# JSONL key -> ({code prefix: integer array column}, column of the other codes)
+CODE_SOURCES = {
+    "Phenotype": ({"HP": "phenotype_ids"}, "other_phenotype_codes"),
+    "RareDisease": ({"OMIM": "omim_ids", "ORPHA": "orpha_ids"}, "other_disease_codes"),
+}
+
+# Result file name of the case on line N of a dataset file
+CASE_FILE_TEMPLATE = "patient_{index}.json"
+
+def parse_code(code: str) -> Tuple[Optional[str], Optional[int]]:
+    """
+    Split an ontology code into its prefix and integer identifier.
+
+    Args:
+        code: Code such as "HP:0001252", "OMIM:106300" or "ORPHA:91138"
+
+    Returns:
+        Tuple of (prefix, identifier), identifier is None if not an integer
+    """
+    prefix, _, identifier = code.strip().partition(":")
+    try:
+        return prefix.upper(), int(identifier)
+    except ValueError:
+        return prefix.upper() or None, None
+
+def case_code_row(record: Dict[str, Any], dataset: str, case_index: int) -> Dict[str, Any]:
+    """
+    Build the CasePhenotypeCodes row of one JSONL case.
+
+    Args:
+        record: Decoded case with Phenotype, RareDisease and Department keys
+        dataset: Dataset name
+        case_index: Line of the case in the file
+
+    Returns:
+        Dictionary of CasePhenotypeCodes columns
+    """
+    row = {}
+    for key, (columns, other_column) in CODE_SOURCES.items():
+        ids = {column: set() for column in columns.values()}
+        other = []
+        for code in record.get(key) or []:
+            prefix, identifier = parse_code(code)
+            column = columns.get(prefix)
+            if column is not None and identifier is not None:
+                ids[column].add(identifier)
+            else:
+                other.append(code)
+        row.update({column: sorted(values) for column, values in ids.items()})
+        row[other_column] = other
+
+    row.update({
+        "dataset": dataset,
+        "case_index": case_index,
+        "department": record.get("Department"),
+    })
+    return row
+
+def iter_jsonl_batches(file_path: str, batch_size: int = 1000, verbose: bool = False) -> Iterator[List[Tuple[int, Dict[str, Any]]]]:
+    """
+    Stream a JSONL file in batches of decoded lines.
+
+    Args:
+        file_path: Path to the JSONL file
+        batch_size: Lines per batch
+        verbose: Whether to print lines that cannot be decoded
+
+    Yields:
+        Lists of (line index, decoded record) tuples, blank lines are skipped
+    """
+    batch = []
+    with open(file_path, 'r', encoding='utf-8-sig') as f:
+        for line_index, line in enumerate(f):
+            if not line.strip():
+                continue
+            try:
+                batch.append((line_index, json.loads(line)))
+            except json.JSONDecodeError as e:
+                if verbose:
+                    print(f"  Skipping line {line_index} of {file_path}: {e}")
+                continue
+            if len(batch) >= batch_size:
+                yield batch
+                batch = []
+    if batch:
+        yield batch
+
+def link_cases(session, dataset: str, case_file_template: str = CASE_FILE_TEMPLATE, verbose: bool = False) -> int:
+    """
+    Set cases_bench_id of the cases of a dataset from the CasesBench row whose
+    source_file_path is the case's result file name (line N -> patient_N.json).
+    Only valid when the result tree was generated from this dataset file.
+    Does not commit.
+
+    Args:
+        session: SQLAlchemy session
+        dataset: Dataset name
+        case_file_template: Result file name of a case, formatted with its line index
+        verbose: Whether to print status information
+
+    Returns:
+        int: Number of cases linked
+    """
+    from db.bench29.bench29_models import CasesBench, CasePhenotypeCodes
+
+    case_ids = dict(session.query(CasesBench.source_file_path, CasesBench.id))
+    links = []
+    for code_id, case_index in session.query(CasePhenotypeCodes.id, CasePhenotypeCodes.case_index).filter(
+        CasePhenotypeCodes.dataset == dataset
+    ):
+        case_id = case_ids.get(case_file_template.format(index=case_index))
+        if case_id is not None:
+            links.append({'id': code_id, 'cases_bench_id': case_id})
+
+    if links:
+        session.bulk_update_mappings(CasePhenotypeCodes, links)
+
+    if verbose:
+        print(f"Linked {len(links)} {dataset} cases to CasesBench rows")
+
+    return len(links)
+
+def load_phenotype_jsonl(session, file_path: str, dataset: str, batch_size: int = 1000,
+                         case_file_template: Optional[str] = None, verbose: bool = False) -> int:
+    """
+    Load the phenotype and disease codes of a JSONL dataset, in one transaction.
+    Existing rows of the dataset are replaced, so reloading is idempotent.
+
+    Args:
+        session: SQLAlchemy session
+        file_path: Path to the JSONL file
+        dataset: Dataset name stored with every case (e.g. "HMS")
+        batch_size: Lines decoded and inserted per batch
+        case_file_template: Result file name of a case (e.g. CASE_FILE_TEMPLATE) to
+                            link the cases to CasesBench, None to leave them unlinked
+        verbose: Whether to print status information
+
+    Returns:
+        int: Number of cases loaded
+    """
+    from db.bench29.bench29_models import CasePhenotypeCodes
+
+    cases_loaded = 0
+    try:
+        session.query(CasePhenotypeCodes).filter(CasePhenotypeCodes.dataset == dataset).delete(synchronize_session=False)
+        for batch in iter_jsonl_batches(file_path, batch_size=batch_size, verbose=verbose):
+            rows = [case_code_row(record, dataset, line_index) for line_index, record in batch]
+            cases_loaded += bulk_insert(session, CasePhenotypeCodes, rows, batch_size=batch_size)
+        if case_file_template:
+            link_cases(session, dataset, case_file_template, verbose=verbose)
+        session.commit()
+    except Exception:
+        session.rollback()
+        raise
+
+    if verbose:
+        print(f"Loaded phenotype codes of {cases_loaded} {dataset} cases from {file_path}")
+
+    return cases_loaded
@@ -0,0 +1,96 @@
+import os
+import sys
+import time
+from collections import Counter
+
+# Adjust the system path to include the parent directory
+sys.path.append(os.path.join(os.path.dirname(os.path.abspath(__file__)), '../../'))
+
+from libs.libs import get_directories
+from hoarder29.libs.parser_libs import parse_diagnosis_ranks
+from hoarder29.libs.bulk_libs import list_result_files, load_json_files_parallel
+
+def load_corpus(dirname, verbose=False):
+    """
+    Load the predict_diagnosis text of every patient file under the model/prompt directories.
+
+    Args:
+        dirname: Base directory containing model/prompt directories
+        verbose: Whether to print status information
+
+    Returns:
+        List of diagnosis texts
+    """
+    file_paths = []
+    for dir_name in get_directories(dirname, verbose=verbose):
+        file_paths.extend(list_result_files(os.path.join(dirname, dir_name)))
+
+    texts = [
+        data.get("predict_diagnosis", "")
+        for _, data in load_json_files_parallel(file_paths, verbose=verbose)
+        if data
+    ]
+
+    if verbose:
+        print(f"Loaded {len(texts)} diagnosis texts from {len(file_paths)} files")
+    return texts
+
+def benchmark_parser(texts, repeat=5, verbose=False):
+    """
+    Time the multi-rank parser on a corpus and summarise its output.
+
+    Args:
+        texts: Diagnosis texts
+        repeat: Number of timed passes over the corpus (the best one is reported)
+        verbose: Whether to print the results
+
+    Returns:
+        Dictionary with texts, ranks, best_seconds, texts_per_second,
+        ranks_per_second, mean_ranks, empty and rank_count_distribution
+    """
+    timings = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        parsed = [parse_diagnosis_ranks(text) for text in texts]
+        timings.append(time.perf_counter() - start)
+
+    best = min(timings)
+    rank_counts = Counter(len(ranks) for ranks in parsed)
+    total_ranks = sum(len(ranks) for ranks in parsed)
+
+    results = {
+        "texts": len(texts),
+        "ranks": total_ranks,
+        "best_seconds": best,
+        "texts_per_second": len(texts) / best if best > 0 else float("inf"),
+        "ranks_per_second": total_ranks / best if best > 0 else float("inf"),
+        "mean_ranks": total_ranks / len(texts) if texts else 0.0,
+        "empty": rank_counts.get(0, 0),
+        "rank_count_distribution": dict(sorted(rank_counts.items())),
+    }
+
+    if verbose:
+        print(f"Parsed {results['texts']} texts into {results['ranks']} ranks in {best:.4f}s (best of {repeat})")
+        print(f"  {results['texts_per_second']:.0f} texts/s, {results['ranks_per_second']:.0f} ranks/s")
+        print(f"  Mean ranks per text: {results['mean_ranks']:.2f}, texts without ranks: {results['empty']}")
+        print(f"  Ranks per text: {results['rank_count_distribution']}")
+
+    return results
+
+def main(dirname, repeat=5, verbose=False):
+    """
+    Benchmark the diagnosis parser on a result tree.
+
+    Args:
+        dirname: Base directory containing model/prompt directories
+        repeat: Number of timed passes over the corpus
+        verbose: Whether to print the results
+    """
+    texts = load_corpus(dirname, verbose=verbose)
+    return benchmark_parser(texts, repeat=repeat, verbose=verbose)
+
+if __name__ == "__main__":
+    dirname = "../../data/ramedis_paper/prompt_comparison_results"
+    verbose = True
+    repeat = 5
+    main(dirname, repeat=repeat, verbose=verbose)
@@ -0,0 +1,31 @@
+import os
+import sys
+
+# Adjust the system path to include the parent directory
+sys.path.append(os.path.join(os.path.dirname(os.path.abspath(__file__)), '../../'))
+
+from db.utils.db_utils import get_session
+from hoarder29.libs.ingest_libs import run_ingest, STAGES
+
+def main(dirname, stages=STAGES, workers=None, method="insert", incremental=True, verbose=False):
+    """
+    Ingest a result tree in a single pass: cases, diagnoses, ranks and analysis.
+
+    Args:
+        dirname: Base directory containing model/prompt directories
+        stages: Stages to run, any of "cases", "diagnoses", "ranks", "analysis"
+        workers: Number of processes reading and parsing files
+        method: Bulk write method, "insert" or "copy"
+        incremental: Whether to skip files the ingest manifest records unchanged
+        verbose: Whether to print detailed information
+    """
+    session = get_session(schema="bench29")
+
+    run_ingest(session, dirname, stages=stages, workers=workers, method=method, incremental=incremental, verbose=verbose)
+
+    session.close()
+
+if __name__ == "__main__":
+    dirname = "../../data/ramedis_paper/prompt_comparison_results"
+    verbose = True
+    main(dirname, verbose=verbose)
@@ -0,0 +1,28 @@
+import os
+import sys
+
+# Adjust the system path to include the parent directory
+sys.path.append(os.path.join(os.path.dirname(os.path.abspath(__file__)), '../../'))
+
+from db.utils.db_utils import get_session
+from hoarder29.libs.dxgpt_libs import load_dxgpt
+
+def main(dirname, method="copy", verbose=False):
+    """
+    Load the DxGPT benchmark datasets into the bench29 dxgpt tables.
+
+    Args:
+        dirname: The dxgpt_testing-main directory
+        method: Bulk write method, "copy" (Postgres COPY) or "insert"
+        verbose: Whether to print detailed information
+    """
+    session = get_session(schema="bench29")
+
+    load_dxgpt(session, dirname, method=method, verbose=verbose)
+
+    session.close()
+
+if __name__ == "__main__":
+    dirname = "../../data/dxgpt_testing-main"
+    verbose = True
+    main(dirname, verbose=verbose)
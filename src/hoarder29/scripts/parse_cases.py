@@ -5,11 +5,18 @@ import datetime
 # Adjust the system path to include the parent directory
 sys.path.append(os.path.join(os.path.dirname(os.path.abspath(__file__)), '../../'))
 
+from sqlalchemy.dialects.postgresql import insert
 from db.utils.db_utils import get_session
 from db.bench29.bench29_models import CasesBench
 from db.db_queries import get_model_id, get_prompt_id
-from libs.libs import get_directories, load_json
+from libs.libs import get_directories, load_json, count_files
+from libs.progress_libs import ProgressReporter
 from hoarder29.libs.parser_libs import extract_model_prompt
+from hoarder29.libs.ingest_libs import run_ingest
+from hoarder29.libs.directory_libs import process_directories_parallel
+
+# Ingest pipeline stages run by this script
+INGEST_STAGES = ("cases",)
 
 def process_patient_file(session, file_path, model_id, prompt_id, dir_name, verbose=False):
     """
@@ -39,25 +46,21 @@ def process_patient_file(session, file_path, model_id, prompt_id, dir_name, verb
     # Create source file path as directory/patient_N
     source_file_path = patient
     
-    # Create or get cases_bench entry
-    cases_bench = session.query(CasesBench).filter(
-        CasesBench.source_file_path == source_file_path
-    ).first()
-    
-    if not cases_bench:
-        cases_bench = CasesBench(
-            hospital="ramedis",
-            meta_data=patient_data,
-            processed_date=datetime.datetime.now(),
-            source_type="jsonl",
-            source_file_path=source_file_path
-        )
-        session.add(cases_bench)
-        session.commit()
+    # Directories share patient files: the unique source_file_path makes the
+    # insert a no-op for a case another directory worker already added
+    statement = insert(CasesBench).values(
+        hospital="ramedis",
+        meta_data=patient_data,
+        processed_date=datetime.datetime.now(),
+        source_type="jsonl",
+        source_file_path=source_file_path
+    ).on_conflict_do_nothing(index_elements=['source_file_path'])
+    session.execute(statement)
+    session.commit()
     
     return True
 
-def process_directory(session, base_dir, dir_name, verbose=False):
+def process_directory(session, base_dir, dir_name, progress=None, verbose=False):
     """
     Process a single model-prompt directory.
     
@@ -65,6 +68,7 @@ def process_directory(session, base_dir, dir_name, verbose=False):
         session: SQLAlchemy session
         base_dir: Base directory path
         dir_name: Directory name to process
+        progress: Optional ProgressReporter updated once per file
         verbose: Whether to print detailed information
         
     Returns:
@@ -113,49 +117,83 @@ def process_directory(session, base_dir, dir_name, verbose=False):
             
             if process_patient_file(session, file_path, model_id, prompt_id, dir_name, verbose=verbose):
                 files_added += 1
+            if progress:
+                progress.update()
     
     if verbose:
         print(f"  Completed directory {dir_name}. Processed {files_processed} files, added {files_added} new records.")
     return files_added
 
-def process_all_directories(dirname, verbose=False):
+def process_all_directories(dirname, bulk=True, workers=None, method="insert", incremental=True, verbose=False):
     """
     Process all model/prompt directories.
     
     Args:
         dirname: Base directory path
+        bulk: Whether to run the cases stage of the ingest pipeline (ingest_libs);
+              False selects the legacy file-by-file path, which processes the
+              directories concurrently (directory_libs)
+        workers: Number of processes decoding files in bulk mode, or of
+                 directories processed at once (one session each) otherwise
+        method: Bulk write method, "insert" or "copy"
+        incremental: Whether bulk mode skips files the ingest manifest records unchanged
         verbose: Whether to print detailed information
+        
+    Returns:
+        Dictionary mapping each failed directory to its error (always empty in bulk mode,
+        where a failure aborts the single transaction)
     """
-    session = get_session(schema="bench29")
-    
-    directories = get_directories(dirname, verbose=verbose)
-    
-    # Process each directory
-    total_files_added = 0
+    engine, session = get_session(schema="bench29", get_engine=True)
     
-    for dir_name in directories:
-        if verbose:
-            print(f"Processing directory: {dir_name}")
-        files_added = process_directory(session, dirname, dir_name, verbose=verbose)
-        total_files_added += files_added
+    if bulk:
+        run_ingest(session, dirname, stages=INGEST_STAGES, workers=workers, method=method, incremental=incremental, verbose=verbose)
+        session.close()
+        return {}
+    session.close()
     
+    directories = get_directories(dirname, verbose=verbose)
+    progress = ProgressReporter(
+        "parse-cases",
+        total=count_files(dirname, directories, extensions=['.json'], prefixes=['patient_'])
+    )
+    
+    # Process the directories concurrently, a failing directory does not stop the others
+    total_files_added, _, failures = process_directories_parallel(
+        engine, dirname, directories, process_directory, workers=workers, progress=progress, verbose=verbose
+    )
+    
+    progress.close()
+    engine.dispose()
+    if failures:
+        print(f"Processed {len(directories) - len(failures)} of {len(directories)} directories, {len(failures)} failed: "
+              + ", ".join(sorted(failures)))
+    elif verbose:
+        print("All directories processed successfully!")
     if verbose:
-        print(f"All directories processed successfully! Added {total_files_added} new records.")
-    session.close()
+        print(f"Added {total_files_added} new records.")
+    return failures
 
-def main(dirname, verbose=False):
+def main(dirname, bulk=True, workers=None, method="insert", incremental=True, verbose=False):
     """
     Process all directories in the given path.
     
     Args:
         dirname: Base directory path
+        bulk: Whether to use the bulk ingestion path (ingest_libs); False selects
+              the legacy file-by-file path
+        workers: Number of processes decoding files in bulk mode, or of
+                 directories processed at once (one session each) otherwise
+        method: Bulk write method, "insert" or "copy"
+        incremental: Whether bulk mode skips files the ingest manifest records unchanged
         verbose: Whether to print detailed information
+        
+    Returns:
+        Dictionary mapping each failed directory to its error
     """
-    process_all_directories(dirname, verbose=verbose)
-    if verbose:
-        print("All directories processed successfully!")
+    return process_all_directories(dirname, bulk=bulk, workers=workers, method=method, incremental=incremental, verbose=verbose)
 
 if __name__ == "__main__":
     dirname = "../../data/ramedis_paper/prompt_comparison_results"
     verbose = True
-    main(dirname, verbose=verbose)
+    bulk = True
+    main(dirname, bulk=bulk, verbose=verbose)
@@ -7,8 +7,14 @@ sys.path.append(os.path.join(os.path.dirname(os.path.abspath(__file__)), '../../
 
 from db.utils.db_utils import get_session
 from db.db_queries import get_model_id, get_prompt_id, add_llm_diagnosis
-from libs.libs import filter_files, get_directories, load_json
+from libs.libs import filter_files, get_directories, load_json, count_files
+from libs.progress_libs import ProgressReporter
 from hoarder29.libs.parser_libs import extract_model_prompt
+from hoarder29.libs.ingest_libs import run_ingest
+from hoarder29.libs.directory_libs import process_directories_parallel
+
+# Ingest pipeline stages run by this script
+INGEST_STAGES = ("diagnoses",)
 
 def process_patient_file(session, file_path, model_id, prompt_id, verbose=False):
     """
@@ -83,7 +89,7 @@ def process_patient_file(session, file_path, model_id, prompt_id, verbose=False)
         print(f"    Added diagnosis for {filename}")
     return True
 
-def process_directory(session, base_dir, dir_name, verbose=False):
+def process_directory(session, base_dir, dir_name, progress=None, verbose=False):
     """
     Process all patient files in a directory.
     
@@ -91,6 +97,7 @@ def process_directory(session, base_dir, dir_name, verbose=False):
         session: SQLAlchemy session
         base_dir: Base directory path
         dir_name: Directory name to process
+        progress: Optional ProgressReporter updated once per file
         verbose: Whether to print debug information
         
     Returns:
@@ -141,38 +148,58 @@ def process_directory(session, base_dir, dir_name, verbose=False):
         
         if process_patient_file(session, file_path, model_id, prompt_id, verbose=verbose):
             diagnoses_added += 1
+        if progress:
+            progress.update()
     
     if verbose:
         print(f"  Completed directory {dir_name}. Processed {files_processed} files, added {diagnoses_added} diagnoses.")
     return diagnoses_added
 
-def main(dirname, verbose=False):
+def main(dirname, bulk=True, workers=None, method="insert", incremental=True, verbose=False):
     """
     Process all model/prompt directories.
     
     Args:
         dirname: Base directory containing model/prompt directories
+        bulk: Whether to run the diagnoses stage of the ingest pipeline (ingest_libs);
+              False selects the legacy file-by-file path, which processes the
+              directories concurrently (directory_libs)
+        workers: Number of processes decoding files in bulk mode, or of
+                 directories processed at once (one session each) otherwise
+        method: Bulk write method, "insert" or "copy"
+        incremental: Whether bulk mode skips files the ingest manifest records unchanged
         verbose: Whether to print debug information
     """
-    session = get_session(schema="bench29")
+    engine, session = get_session(schema="bench29", get_engine=True)
+    
+    if bulk:
+        run_ingest(session, dirname, stages=INGEST_STAGES, workers=workers, method=method, incremental=incremental, verbose=verbose)
+        session.close()
+        return
+    session.close()
     
     # Get all directories
     directories = get_directories(dirname, verbose=verbose)
+    progress = ProgressReporter(
+        "parse-llm-diagnoses",
+        total=count_files(dirname, directories, extensions=['.json'], prefixes=['patient_'])
+    )
     
-    # Process each directory
-    total_diagnoses_added = 0
-    
-    for dir_name in directories:
-        if verbose:
-            print(f"Processing directory: {dir_name}")
-        diagnoses_added = process_directory(session, dirname, dir_name, verbose=verbose)
-        total_diagnoses_added += diagnoses_added
+    # Process the directories concurrently, a failing directory does not stop the others
+    total_diagnoses_added, _, failures = process_directories_parallel(
+        engine, dirname, directories, process_directory, workers=workers, progress=progress, verbose=verbose
+    )
     
+    progress.close()
+    engine.dispose()
+    if failures:
+        print(f"Processed {len(directories) - len(failures)} of {len(directories)} directories, {len(failures)} failed: "
+              + ", ".join(sorted(failures)))
     if verbose:
-        print(f"All directories processed. Total diagnoses added: {total_diagnoses_added}")
-    session.close()
+        print(f"Total diagnoses added: {total_diagnoses_added}")
 
 if __name__ == "__main__":
     dirname = "../../data/ramedis_paper/prompt_comparison_results"
     verbose = True
-    main(dirname, verbose=verbose)
+    bulk = True
+    main(dirname, bulk=bulk, verbose=verbose)
@@ -1,115 +1,71 @@
 import os
 import sys
+from functools import partial
+from concurrent.futures import ProcessPoolExecutor
 
 # Adjust the system path to include the parent directory
 sys.path.append(os.path.join(os.path.dirname(os.path.abspath(__file__)), '../../'))
 
 from db.utils.db_utils import get_session
-from db.bench29.bench29_models import LlmDifferentialDiagnosis, DifferentialDiagnosis2Rank
-from db.db_queries import get_diagnosis_ranks, add_diagnosis_rank
-from libs.libs import filter_files, get_directories
-from hoarder29.libs.parser_libs import parse_diagnosis_text
+from db.bench29.bench29_models import DifferentialDiagnosis2Rank
+from db.db_queries import iter_unranked_diagnoses, diagnosis_rank_row
+from libs.paralell_libs import get_max_threads
+from libs.progress_libs import ProgressReporter
+from hoarder29.libs.parser_libs import parse_diagnosis_ranks
+from hoarder29.libs.bulk_libs import bulk_insert
 
-def process_diagnosis_into_ranks(session, verbose=False, deep_verbose=False):
+def parse_diagnosis_row(row, deep_verbose=False):
     """
-    Process all diagnosis strings in LlmDifferentialDiagnosis table and parse each line
-    into a separate rank in the DifferentialDiagnosis2Rank table.
+    Parse one unranked diagnosis into its rank rows (process pool worker).
+    
+    Args:
+        row: (llm_diagnosis_id, cases_bench_id, diagnosis_text) tuple
+        deep_verbose: Whether to print detailed parsing information
+        
+    Returns:
+        Tuple of (list of DifferentialDiagnosis2Rank column dictionaries, parse failed flag).
+        A failed parse gives a single PARSING_FAILED row.
+    """
+    diagnosis_id, cases_bench_id, diagnosis_text = row
+    ranks = parse_diagnosis_ranks(diagnosis_text, verbose=deep_verbose)
+    if not ranks:
+        return [diagnosis_rank_row(cases_bench_id, diagnosis_id, None, None, verbose=deep_verbose)], True
+    return [
+        diagnosis_rank_row(cases_bench_id, diagnosis_id, rank_position, predicted_diagnosis, reasoning, verbose=deep_verbose)
+        for rank_position, predicted_diagnosis, reasoning in ranks
+    ], False
+
+def process_diagnosis_into_ranks(session, workers=None, batch_size=1000, verbose=False, deep_verbose=False):
+    """
+    Process all diagnosis strings in LlmDifferentialDiagnosis table and parse every
+    ranked diagnosis into a separate rank in the DifferentialDiagnosis2Rank table.
     
     Args:
         session: Database session
+        workers: Number of parsing processes (default: get_max_threads(), 1 parses inline)
+        batch_size: Diagnoses streamed, parsed and inserted per batch
         verbose: Whether to print basic workflow information
         deep_verbose: Whether to print detailed parsing information
     """
-    # Get all LLM diagnoses
-    diagnoses = session.query(LlmDifferentialDiagnosis).all()
-    if verbose:
-        print(f"Found {len(diagnoses)} diagnoses to process")
-    
-    diagnoses_processed = 0
-    ranks_added = 0
-    parse_failures = 0
-    
-    for diagnosis in diagnoses:
-        if verbose:
-            print(f"Processing diagnosis ID: {diagnosis.id}")
-        
-        # Check if diagnosis has text
-        if not diagnosis.diagnosis:
-            if verbose:
-                print(f"  Diagnosis ID {diagnosis.id} has empty text, skipping")
-            diagnoses_processed += 1
-            continue
-        
-        # Check if any ranks already exist for this diagnosis
-        existing_ranks = session.query(DifferentialDiagnosis2Rank).filter(
-            DifferentialDiagnosis2Rank.differential_diagnosis_id == diagnosis.id
-        ).count()
-        
-        if existing_ranks > 0:
-            if verbose:
-                print(f"  Diagnosis ID {diagnosis.id} already has {existing_ranks} ranks, skipping")
-            diagnoses_processed += 1
-            continue
-        
-        # Parse the diagnosis text
-        rank_position, diagnosis_text, reasoning = parse_diagnosis_text(
-            diagnosis.diagnosis, 
-            verbose=deep_verbose, 
-            deep_verbose=deep_verbose
-        )
-        
-        # Add the diagnosis rank entry
-        add_diagnosis_rank(
-            session, 
-            diagnosis.cases_bench_id,
-            diagnosis.id,
-            rank_position,
-            diagnosis_text,
-            reasoning,
-            verbose=deep_verbose
-        )
-        ranks_added += 1
-            
-        # Count parse failures
-        if rank_position is None or diagnosis_text is None:
-            parse_failures += 1
-            if verbose:
-                print(f"  Parsing failed for diagnosis ID {diagnosis.id}")
-        elif verbose:
-            print(f"  Added rank entry: rank={rank_position}, diagnosis='{diagnosis_text[:30]}...'")
-        
-        diagnoses_processed += 1
-    
-    if verbose:
-        print(f"Processing completed. Processed {diagnoses_processed} diagnoses, added {ranks_added} ranks.")
-        print(f"Total parse failures: {parse_failures}")
+    process_by_model_prompt(session, workers=workers, batch_size=batch_size, verbose=verbose, deep_verbose=deep_verbose)
 
-def process_by_model_prompt(session, model_id=None, prompt_id=None, limit=None, verbose=False, deep_verbose=False):
+def process_by_model_prompt(session, model_id=None, prompt_id=None, limit=None, workers=None, batch_size=1000, verbose=False, deep_verbose=False):
     """
     Process diagnoses by specific model/prompt combinations.
+    Only diagnoses without ranks are read (one anti-join query, streamed in
+    batches); each batch is parsed across a process pool and bulk inserted,
+    and everything is committed once at the end.
     
     Args:
         session: Database session
         model_id: Optional model ID to filter by
         prompt_id: Optional prompt ID to filter by
         limit: Optional limit on number of diagnoses to process
+        workers: Number of parsing processes (default: get_max_threads(), 1 parses inline)
+        batch_size: Diagnoses streamed, parsed and inserted per batch
         verbose: Whether to print basic workflow information
         deep_verbose: Whether to print detailed parsing information
     """
-    # Build query
-    query = session.query(LlmDifferentialDiagnosis)
-    
-    # Apply filters if provided
-    if model_id is not None:
-        query = query.filter(LlmDifferentialDiagnosis.model_id == model_id)
-    if prompt_id is not None:
-        query = query.filter(LlmDifferentialDiagnosis.prompt_id == prompt_id)
-    if limit is not None:
-        query = query.limit(limit)
-    
-    # Execute query
-    diagnoses = query.all()
-    
     # Print filter information
     if verbose:
         filter_info = []
@@ -121,64 +77,45 @@ def process_by_model_prompt(session, model_id=None, prompt_id=None, limit=None,
             filter_info.append(f"limit={limit}")
         
         filter_str = ", ".join(filter_info) if filter_info else "no filters"
-        print(f"Found {len(diagnoses)} diagnoses to process ({filter_str})")
+        print(f"Processing unranked diagnoses ({filter_str})")
+    
+    if workers is None:
+        workers = get_max_threads()
+    executor = ProcessPoolExecutor(max_workers=workers) if workers > 1 else None
+    worker = partial(parse_diagnosis_row, deep_verbose=deep_verbose)
     
-    # Process each diagnosis
-    diagnoses_processed = 0
     ranks_added = 0
     parse_failures = 0
+    progress = ProgressReporter("parse-llm-ranks")
     
-    for diagnosis in diagnoses:
-        if verbose:
-            print(f"Processing diagnosis ID: {diagnosis.id}")
-        
-        # Check if diagnosis has text
-        if not diagnosis.diagnosis:
-            if verbose:
-                print(f"  Diagnosis ID {diagnosis.id} has empty text, skipping")
-            diagnoses_processed += 1
-            continue
-        
-        # Check if any ranks already exist for this diagnosis
-        existing_ranks = get_diagnosis_ranks(session, diagnosis.id)
-        
-        if existing_ranks:
-            if verbose:
-                print(f"  Diagnosis ID {diagnosis.id} already has {len(existing_ranks)} ranks, skipping")
-            diagnoses_processed += 1
-            continue
-        
-        # Parse the diagnosis text
-        rank_position, diagnosis_text, reasoning = parse_diagnosis_text(
-            diagnosis.diagnosis, 
-            verbose=deep_verbose, 
-            deep_verbose=deep_verbose
-        )
-        
-        # Add the diagnosis rank entry
-        add_diagnosis_rank(
-            session, 
-            diagnosis.cases_bench_id,
-            diagnosis.id,
-            rank_position,
-            diagnosis_text,
-            reasoning,
-            verbose=deep_verbose
-        )
-        ranks_added += 1
+    try:
+        for rows in iter_unranked_diagnoses(session, model_id, prompt_id, limit, batch_size=batch_size):
+            if executor is not None:
+                results = list(executor.map(worker, rows, chunksize=max(1, len(rows) // (workers * 4))))
+            else:
+                results = [worker(row) for row in rows]
+            
+            rank_rows = [rank_row for diagnosis_rows, _ in results for rank_row in diagnosis_rows]
+            failures = sum(failed for _, failed in results)
+            bulk_insert(session, DifferentialDiagnosis2Rank, rank_rows, batch_size=batch_size)
             
-        # Count parse failures
-        if rank_position is None or diagnosis_text is None:
-            parse_failures += 1
+            ranks_added += len(rank_rows)
+            parse_failures += failures
+            progress.update(len(rows), errors=failures)
             if verbose:
-                print(f"  Parsing failed for diagnosis ID {diagnosis.id}")
-        elif verbose:
-            print(f"  Added rank entry: rank={rank_position}, diagnosis='{diagnosis_text[:30]}...'")
+                print(f"  Added {len(rank_rows)} ranks ({failures} parse failures)")
         
-        diagnoses_processed += 1
+        session.commit()
+    except Exception:
+        session.rollback()
+        raise
+    finally:
+        if executor is not None:
+            executor.shutdown()
+        progress.close()
     
     if verbose:
-        print(f"Processing completed. Processed {diagnoses_processed} diagnoses, added {ranks_added} ranks.")
+        print(f"Processing completed. Added {ranks_added} ranks.")
         print(f"Total parse failures: {parse_failures}")
 
 def main(dirname=None, verbose=False, deep_verbose=False):
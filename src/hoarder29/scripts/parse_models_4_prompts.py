@@ -7,6 +7,7 @@ sys.path.append(os.path.join(os.path.dirname(os.path.abspath(__file__)), '../../
 from db.utils.db_utils import get_session
 from db.db_queries import add_model, get_model_id, add_prompt, get_prompt_id
 from libs.libs import get_directories
+from libs.progress_libs import ProgressReporter
 from hoarder29.libs.parser_libs import extract_model_prompt
 
 def main(dirname, verbose=False):
@@ -22,9 +23,11 @@ def main(dirname, verbose=False):
     
     # Get list of directories
     dirs = get_directories(dirname, verbose=verbose)
+    progress = ProgressReporter("parse-models-4-prompts", total=len(dirs))
     
     # Process each directory
     for dir_name in dirs:
+        progress.update()
         model_name, prompt_name = extract_model_prompt(dir_name)
         
         if model_name and prompt_name:
@@ -43,6 +46,7 @@ def main(dirname, verbose=False):
             if verbose:
                 print(f"Skipping {dir_name}: Could not extract model and prompt")
     
+    progress.close()
     if verbose:
         print("Processing completed")
     session.close()
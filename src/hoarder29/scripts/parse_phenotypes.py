@@ -0,0 +1,35 @@
+import os
+import sys
+
+# Adjust the system path to include the parent directory
+sys.path.append(os.path.join(os.path.dirname(os.path.abspath(__file__)), '../../'))
+
+from db.utils.db_utils import get_session
+from hoarder29.libs.phenotype_libs import load_phenotype_jsonl
+
+def main(filename, dataset=None, batch_size=1000, case_file_template=None, verbose=False):
+    """
+    Load the HPO phenotype and rare disease codes of a JSONL dataset.
+
+    Args:
+        filename: Path to the JSONL file
+        dataset: Dataset name, defaults to the file name without extension
+        batch_size: Lines decoded and inserted per batch
+        case_file_template: Result file name of a case (e.g. "patient_{index}.json")
+                            to link the cases to CasesBench, only when the result
+                            tree was generated from this file
+        verbose: Whether to print detailed information
+    """
+    if dataset is None:
+        dataset = os.path.splitext(os.path.basename(filename))[0]
+
+    session = get_session(schema="bench29")
+
+    load_phenotype_jsonl(session, filename, dataset, batch_size=batch_size, case_file_template=case_file_template, verbose=verbose)
+
+    session.close()
+
+if __name__ == "__main__":
+    filename = "../../data/ramedis_paper/data/HMS.jsonl"
+    verbose = True
+    main(filename, verbose=verbose)
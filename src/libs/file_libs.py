@@ -73,6 +73,31 @@ def filter_files(dir_path, extensions=None, prefixes=None, suffixes=None, verbos
     
     return filtered_files
 
+def count_files(dirname, directories, extensions=None, prefixes=None, verbose=False):
+    """
+    Count the files matching the filters across several subdirectories.
+    Used to size progress reporting before a batch job starts.
+    
+    Args:
+        dirname: Base directory path
+        directories: Subdirectory names to scan
+        extensions: List of file extensions to include (e.g., ['.json'])
+        prefixes: List of file prefixes to include (e.g., ['patient_'])
+        verbose: Whether to print info messages
+        
+    Returns:
+        int: Total number of matching files
+    """
+    total = sum(
+        len(filter_files(os.path.join(dirname, d), extensions=extensions, prefixes=prefixes))
+        for d in directories
+    )
+    
+    if verbose:
+        print(f"Found {total} matching files in {len(directories)} directories")
+    
+    return total
+
 def extract_model_prompt(dirname):
     """
     Extract model and prompt from directory name formatted as
@@ -98,3 +98,172 @@ def rescaled_penalized_weighted_stats(values, weights=None, alpha=alpha):
         penalized_mean,
         penalized_weighted_mean
     )
+
+def weight_values(rank_values, weights=None):
+    """
+    Look up the weight of each rank value, as weighted_mean does.
+    Ranks missing from the weights dictionary get weight 0.
+    
+    Args:
+        rank_values: 1-D sequence of rank values
+        weights: Dictionary mapping ranks to weights, or None for uniform weights
+        
+    Returns:
+        np.ndarray: Weight of each rank value
+        
+    Raises:
+        ValueError: If a weight cannot be read or converted to float
+    """
+    rank_values = np.asarray(rank_values, dtype=float)
+    if not weights:
+        return np.ones_like(rank_values)
+    
+    result = np.empty_like(rank_values)
+    for i, value in enumerate(rank_values):
+        # Float ranks coming from arrays must match the integer keys of the dictionary
+        key = int(value) if float(value).is_integer() else value
+        try:
+            result[i] = float(weights.get(key, 0))
+        except (AttributeError, TypeError, ValueError) as e:
+            raise ValueError(f"Failed to get weight for value {key}: {e}")
+    
+    return result
+
+def penalty_values(s, alpha=alpha):
+    """
+    Array version of penalty_function.
+    
+    Args:
+        s: Array of rank values (any shape)
+        alpha: Parameter controlling penalty steepness (default: log(1.93))
+        
+    Returns:
+        np.ndarray: Penalized values, same shape as s
+    """
+    s = np.asarray(s, dtype=float)
+    numerator = 2 * (np.exp(alpha * (s - 1)) - 1)
+    denominator = math.exp(5 * alpha) - 1
+    return 1 - (numerator / denominator)
+
+def rank_histogram(ranks):
+    """
+    Turn a rank matrix into per-group rank-count histograms.
+    
+    Args:
+        ranks: 2-D array (groups x cases) of rank values; groups with fewer
+               cases are padded with NaN. A list of lists of different
+               lengths is also accepted.
+        
+    Returns:
+        tuple: (rank_values, counts) where rank_values holds the K distinct
+        ranks and counts is a (groups x K) array
+    """
+    if isinstance(ranks, (list, tuple)) and ranks and not np.isscalar(ranks[0]):
+        width = max((len(row) for row in ranks), default=0)
+        matrix = np.full((len(ranks), width), np.nan)
+        for i, row in enumerate(ranks):
+            matrix[i, :len(row)] = row
+        ranks = matrix
+    
+    ranks = np.atleast_2d(np.asarray(ranks, dtype=float))
+    valid = ~np.isnan(ranks)
+    
+    rank_values = np.unique(ranks[valid])
+    group_ids = np.nonzero(valid)[0]
+    rank_ids = np.searchsorted(rank_values, ranks[valid])
+    
+    counts = np.bincount(
+        group_ids * len(rank_values) + rank_ids,
+        minlength=ranks.shape[0] * len(rank_values)
+    ).reshape(ranks.shape[0], len(rank_values))
+    
+    return rank_values, counts
+
+def histogram_stats(rank_values, counts, weights=None, alpha=alpha):
+    """
+    Compute the rescaled_penalized_weighted_stats of many groups at once from
+    rank-count histograms instead of lists of ranks.
+    
+    Args:
+        rank_values: 1-D sequence of the K distinct rank values
+        counts: 2-D array (groups x K) with how often each rank occurs per group
+        weights: Dictionary mapping ranks to weights, or None for uniform weights
+        alpha: Parameter for penalty function
+        
+    Returns:
+        tuple of arrays, one value per group:
+        (mean, weighted_mean, penalized_mean, penalized_weighted_mean)
+        
+    Raises:
+        ValueError: If a weight cannot be read or converted to float
+    """
+    rank_values = np.asarray(rank_values, dtype=float)
+    counts = np.atleast_2d(np.asarray(counts, dtype=float))
+    weight_vector = weight_values(rank_values, weights)
+    
+    totals = counts.sum(axis=1)
+    rank_sums = counts @ rank_values
+    weight_totals = counts @ weight_vector
+    weighted_sums = counts @ (rank_values * weight_vector)
+    
+    # Empty groups and groups with zero total weight give 0, as in the scalar functions
+    with np.errstate(divide='ignore', invalid='ignore'):
+        mean_values = np.where(totals > 0, rank_sums / totals, 0.0)
+        weighted_mean_values = np.where(weight_totals != 0, weighted_sums / weight_totals, 0.0)
+    
+    return (
+        mean_values,
+        weighted_mean_values,
+        penalty_values(mean_values, alpha),
+        penalty_values(weighted_mean_values, alpha)
+    )
+
+def rank_matrix_stats(ranks, weights=None, alpha=alpha):
+    """
+    Compute the rescaled_penalized_weighted_stats of every group of a rank matrix.
+    
+    Args:
+        ranks: 2-D array (groups x cases) of rank values padded with NaN,
+               or a list of rank lists
+        weights: Dictionary mapping ranks to weights, or None for uniform weights
+        alpha: Parameter for penalty function
+        
+    Returns:
+        tuple of arrays, one value per group:
+        (mean, weighted_mean, penalized_mean, penalized_weighted_mean)
+    """
+    rank_values, counts = rank_histogram(ranks)
+    return histogram_stats(rank_values, counts, weights, alpha)
+
+def sweep_histogram_stats(rank_values, counts, weight_matrix, alphas=(alpha,)):
+    """
+    Weighted means and penalized weighted means of many groups under many
+    weight vectors and alpha values at once, as matrix products over the
+    rank-count histograms.
+    
+    Args:
+        rank_values: 1-D sequence of the K distinct rank values
+        counts: 2-D array (groups x K) with how often each rank occurs per group
+        weight_matrix: 2-D array (S x K), one weight vector per row, aligned with rank_values
+        alphas: 1-D sequence of A penalty parameters
+        
+    Returns:
+        tuple: (weighted_means, penalized_weighted_means) of shapes (S x groups)
+        and (A x S x groups)
+    """
+    rank_values = np.asarray(rank_values, dtype=float)
+    counts = np.atleast_2d(np.asarray(counts, dtype=float))
+    weight_matrix = np.atleast_2d(np.asarray(weight_matrix, dtype=float))
+    alphas = np.atleast_1d(np.asarray(alphas, dtype=float))
+    
+    weight_totals = weight_matrix @ counts.T
+    weighted_sums = (weight_matrix * rank_values) @ counts.T
+    
+    with np.errstate(divide='ignore', invalid='ignore'):
+        weighted_means = np.where(weight_totals != 0, weighted_sums / weight_totals, 0.0)
+    
+    # Broadcast the penalty over alphas: (A, 1, 1) against (S, groups)
+    alpha_column = alphas[:, None, None]
+    penalized = 1 - 2 * (np.exp(alpha_column * (weighted_means - 1)) - 1) / (np.exp(5 * alpha_column) - 1)
+    
+    return weighted_means, penalized
@@ -0,0 +1,145 @@
+"""
+Retrieval metrics for ranked differential diagnoses.
+Computes the first correct rank of every differential diagnosis and, per
+(model, prompt) group, top-k hit rates, mean reciprocal rank and the
+first-correct-rank distribution in one vectorised pass.
+"""
+
+import numpy as np
+from typing import Dict, List, Any, Optional, Sequence, Tuple
+
+# Semantic relationships (registry.diagnosis_semantic_relationship) counted as a hit
+DEFAULT_HIT_RELATIONSHIPS = ("Exact Synonym", "Broad Synonym")
+
+DEFAULT_KS = (1, 3, 5, 10)
+
+def first_hit_ranks(diagnosis_ids, ranks, hits) -> Tuple[np.ndarray, np.ndarray]:
+    """
+    Find the best rank at which each differential diagnosis has a hit.
+
+    Args:
+        diagnosis_ids: 1-D array, differential diagnosis of each ranked row
+        ranks: 1-D array, rank position of each row
+        hits: 1-D boolean array, whether the row counts as a hit
+
+    Returns:
+        tuple: (unique_diagnosis_ids, first_ranks) with first_ranks set to
+        np.inf for diagnoses without any hit
+    """
+    diagnosis_ids = np.asarray(diagnosis_ids)
+    ranks = np.asarray(ranks, dtype=float)
+    hits = np.asarray(hits, dtype=bool)
+
+    order = np.argsort(diagnosis_ids, kind="stable")
+    sorted_ids = diagnosis_ids[order]
+    hit_ranks = np.where(hits[order], ranks[order], np.inf)
+
+    if len(sorted_ids) == 0:
+        return sorted_ids, hit_ranks
+
+    starts = np.flatnonzero(np.r_[True, sorted_ids[1:] != sorted_ids[:-1]])
+    return sorted_ids[starts], np.minimum.reduceat(hit_ranks, starts)
+
+def topk_metrics(
+    group_ids,
+    first_ranks,
+    ks: Sequence[int] = DEFAULT_KS,
+    max_rank: Optional[int] = None
+) -> Dict[str, Any]:
+    """
+    Top-k hit rates, MRR and first-correct-rank distribution per group.
+
+    Args:
+        group_ids: 1-D array of integer group indices (0..G-1), one per diagnosis
+        first_ranks: 1-D array of first hit ranks (np.inf for misses), one per diagnosis
+        ks: Cut-offs for the top-k hit rates
+        max_rank: Highest rank kept in the distribution (default: highest hit rank)
+
+    Returns:
+        Dictionary with arrays of one value per group: "n", "top_<k>" for each k,
+        "mrr", and "distribution" (G x max_rank counts of first hit at rank 1..max_rank)
+        plus "misses" (diagnoses without a hit within max_rank)
+    """
+    group_ids = np.asarray(group_ids, dtype=int)
+    first_ranks = np.asarray(first_ranks, dtype=float)
+    n_groups = int(group_ids.max()) + 1 if len(group_ids) else 0
+
+    n = np.bincount(group_ids, minlength=n_groups)
+    safe_n = np.maximum(n, 1)
+
+    metrics = {"n": n}
+    for k in ks:
+        metrics[f"top_{k}"] = np.bincount(group_ids, weights=first_ranks <= k, minlength=n_groups) / safe_n
+
+    # 1/inf is 0, so misses contribute nothing to the reciprocal rank
+    reciprocal = np.where(first_ranks >= 1, 1.0 / np.maximum(first_ranks, 1), 0.0)
+    metrics["mrr"] = np.bincount(group_ids, weights=reciprocal, minlength=n_groups) / safe_n
+
+    finite = np.isfinite(first_ranks)
+    if max_rank is None:
+        max_rank = int(first_ranks[finite].max()) if finite.any() else 1
+    in_range = finite & (first_ranks >= 1) & (first_ranks <= max_rank)
+
+    distribution = np.bincount(
+        group_ids[in_range] * max_rank + first_ranks[in_range].astype(int) - 1,
+        minlength=n_groups * max_rank
+    ).reshape(n_groups, max_rank)
+    metrics["distribution"] = distribution
+    metrics["misses"] = n - distribution.sum(axis=1)
+
+    return metrics
+
+def compute_group_metrics(
+    rows,
+    hit_relationships: Sequence[str] = DEFAULT_HIT_RELATIONSHIPS,
+    ks: Sequence[int] = DEFAULT_KS,
+    max_rank: Optional[int] = None
+) -> List[Dict[str, Any]]:
+    """
+    Compute top-k/MRR metrics for every (model, prompt) group of ranked rows.
+
+    Args:
+        rows: Iterable of (model, prompt, differential_diagnosis_id, rank_position,
+              semantic_relationship) tuples, one per ranked diagnosis
+        hit_relationships: Semantic relationship names counted as a hit
+        ks: Cut-offs for the top-k hit rates
+        max_rank: Highest rank kept in the distribution
+
+    Returns:
+        List of dictionaries, one per group, with model, prompt, n, top_<k>,
+        mrr, rank_<r> counts and misses
+    """
+    rows = list(rows)
+    if not rows:
+        return []
+
+    models, prompts, diagnosis_ids, ranks, relationships = zip(*rows)
+    hit_set = set(hit_relationships)
+    hits = np.fromiter((relationship in hit_set for relationship in relationships), dtype=bool, count=len(rows))
+    ranks = np.array([np.nan if rank is None else rank for rank in ranks], dtype=float)
+    hits &= ~np.isnan(ranks)
+
+    unique_ids, first_ranks = first_hit_ranks(np.asarray(diagnosis_ids), ranks, hits)
+
+    # Group of each differential diagnosis
+    group_of_diagnosis = {}
+    for model, prompt, diagnosis_id in zip(models, prompts, diagnosis_ids):
+        group_of_diagnosis[diagnosis_id] = (model, prompt)
+    group_keys = sorted(set(group_of_diagnosis.values()), key=lambda key: (str(key[0]), str(key[1])))
+    group_index = {key: i for i, key in enumerate(group_keys)}
+    group_ids = np.array([group_index[group_of_diagnosis[diagnosis_id]] for diagnosis_id in unique_ids])
+
+    metrics = topk_metrics(group_ids, first_ranks, ks, max_rank)
+
+    results = []
+    for i, (model, prompt) in enumerate(group_keys):
+        result = {"model": model, "prompt": prompt, "n": int(metrics["n"][i])}
+        for k in ks:
+            result[f"top_{k}"] = float(metrics[f"top_{k}"][i])
+        result["mrr"] = float(metrics["mrr"][i])
+        for rank, count in enumerate(metrics["distribution"][i], start=1):
+            result[f"rank_{rank}"] = int(count)
+        result["misses"] = int(metrics["misses"][i])
+        results.append(result)
+
+    return results
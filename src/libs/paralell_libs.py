@@ -7,10 +7,14 @@ sys.path.append(os.path.join(os.path.dirname(os.path.abspath(__file__)), parent_
 
 
 
+import re
 import json
 import datetime
 import time
 import multiprocessing
+import threading
+from contextlib import contextmanager
+from collections import deque
 from typing import Dict, List, Optional, Tuple, Any
 
 def get_max_threads(percent_usage: float = 0.75) -> int:
@@ -24,4 +28,262 @@ def get_max_threads(percent_usage: float = 0.75) -> int:
         int: Number of threads to use
     """
     max_threads = multiprocessing.cpu_count()
-    return max(1, int(max_threads * percent_usage))
\ No newline at end of file
+    return max(1, int(max_threads * percent_usage))
+
+# HTTP status codes meaning the provider is overloaded
+OVERLOAD_STATUS_CODES = (429, 503)
+
+# Exception class names meaning the provider is overloaded (openai, anthropic,
+# requests, httpx and the builtin TimeoutError)
+OVERLOAD_ERROR_TYPES = (
+    "RateLimitError",
+    "APITimeoutError",
+    "Timeout",
+    "TimeoutError",
+    "ReadTimeout",
+    "ConnectTimeout",
+    "TimeoutException",
+    "ServiceUnavailableError",
+    "OverloadedError",
+)
+
+# Substrings marking errors that mean the provider is overloaded
+OVERLOAD_ERROR_MARKERS = (
+    "rate limit",
+    "rate_limit",
+    "ratelimit",
+    "too many requests",
+    "service unavailable",
+    "overloaded",
+    "timeout",
+    "timed out",
+)
+
+# A 429/503 in an error message only counts next to an HTTP status context
+# ("Error code: 429", "status 503", "HTTP/1.1 429"), so ids such as
+# "case 1429" or "patient 503" do not match
+OVERLOAD_STATUS_PATTERN = re.compile(
+    r'\b(?:status(?:[ _]code)?|error code|http(?:/[\d.]+)?|code)\W{0,3}(?:429|503)\b'
+)
+
+def _status_code(error: BaseException) -> Optional[int]:
+    """Return the HTTP status code carried by an exception, if any."""
+    for holder in (error, getattr(error, "response", None)):
+        for attr in ("status_code", "status"):
+            value = getattr(holder, attr, None)
+            if isinstance(value, int):
+                return value
+    return None
+
+def is_overload_error(error: Any) -> bool:
+    """
+    Check whether an error signals provider overload (429s, timeouts, 503s).
+    Exceptions are classified by their HTTP status code and type, error
+    strings by their text.
+    
+    Args:
+        error: Exception, error string or None
+        
+    Returns:
+        bool: True if the error should trigger a sharp concurrency cut
+    """
+    if not error:
+        return False
+    
+    if isinstance(error, BaseException):
+        if _status_code(error) in OVERLOAD_STATUS_CODES:
+            return True
+        if any(cls.__name__ in OVERLOAD_ERROR_TYPES for cls in type(error).__mro__):
+            return True
+    
+    text = str(error).lower()
+    if OVERLOAD_STATUS_PATTERN.search(text):
+        return True
+    return any(marker in text for marker in OVERLOAD_ERROR_MARKERS)
+
+class AdaptiveConcurrencyLimiter:
+    """
+    Additive-increase / multiplicative-decrease (AIMD) limit on in-flight requests.
+    
+    The limit grows by roughly one slot per window of healthy requests and is
+    cut sharply on overload errors (429s, timeouts), and more gently when
+    latency drifts well above the best observed latency or the error rate
+    climbs. Workers call acquire() before a request and release() after it,
+    or use the slot() context manager.
+    """
+    
+    def __init__(
+        self,
+        initial_limit: int = 4,
+        min_limit: int = 1,
+        max_limit: int = 64,
+        overload_backoff: float = 0.5,
+        latency_backoff: float = 0.9,
+        latency_tolerance: float = 2.0,
+        max_error_rate: float = 0.2,
+        window: int = 20
+    ):
+        """
+        Initialize the limiter.
+        
+        Args:
+            initial_limit: Starting number of concurrent requests
+            min_limit: Lowest limit the controller may reach
+            max_limit: Highest limit the controller may reach
+            overload_backoff: Multiplier applied on 429s and timeouts
+            latency_backoff: Multiplier applied on latency or error-rate degradation
+            latency_tolerance: Allowed ratio of recent latency to best latency
+            max_error_rate: Error rate over the window that triggers a backoff
+            window: Number of recent requests used for error rate
+        """
+        self.min_limit = min_limit
+        self.max_limit = max_limit
+        self.overload_backoff = overload_backoff
+        self.latency_backoff = latency_backoff
+        self.latency_tolerance = latency_tolerance
+        self.max_error_rate = max_error_rate
+        
+        self.limit = float(min(max(initial_limit, min_limit), max_limit))
+        self.in_flight = 0
+        self.peak_limit = self.limit
+        
+        self.latency_ewma = None
+        self.best_latency = None
+        self.outcomes = deque(maxlen=window)
+        # Requests already in flight when the limit was last cut; their
+        # outcomes reflect the old limit and must not cut it again
+        self._stale_requests = 0
+        
+        self.requests = 0
+        self.errors = 0
+        self.overloads = 0
+        self.backoffs = 0
+        
+        self._cond = threading.Condition()
+    
+    def acquire(self) -> None:
+        """Block until a request slot is available, then take it."""
+        with self._cond:
+            while self.in_flight >= int(self.limit):
+                self._cond.wait()
+            self.in_flight += 1
+    
+    def release(self, latency: float, error: Any = None) -> None:
+        """
+        Return a slot and update the limit from the request outcome.
+        
+        Args:
+            latency: Request duration in seconds
+            error: Exception or error string if the request failed, else None
+        """
+        with self._cond:
+            self.in_flight -= 1
+            self.requests += 1
+            stale = self._stale_requests > 0
+            self.outcomes.append(bool(error))
+            
+            if is_overload_error(error):
+                self.overloads += 1
+                self.errors += 1
+                self._backoff(self.overload_backoff)
+            elif error:
+                self.errors += 1
+                error_rate = sum(self.outcomes) / len(self.outcomes)
+                if len(self.outcomes) >= self.outcomes.maxlen and error_rate > self.max_error_rate:
+                    self._backoff(self.latency_backoff)
+            else:
+                self._observe_latency(latency)
+                if self.latency_ewma > self.best_latency * self.latency_tolerance:
+                    self._backoff(self.latency_backoff)
+                else:
+                    # One extra slot per `limit` healthy requests
+                    self.limit = min(self.max_limit, self.limit + 1.0 / self.limit)
+                    self.peak_limit = max(self.peak_limit, self.limit)
+            
+            if stale:
+                self._stale_requests -= 1
+            self._cond.notify_all()
+    
+    @contextmanager
+    def slot(self):
+        """
+        Context manager holding a slot for the duration of a request.
+        Exceptions raised inside the block are recorded as errors and re-raised.
+        """
+        self.acquire()
+        start_time = time.time()
+        try:
+            yield
+        except Exception as e:
+            self.release(time.time() - start_time, error=e)
+            raise
+        self.release(time.time() - start_time)
+    
+    def metrics(self) -> Dict[str, Any]:
+        """
+        Snapshot of the controller state for logs and run summaries.
+        
+        Returns:
+            Dictionary with current limit, in-flight count and counters
+        """
+        with self._cond:
+            return {
+                "concurrency": int(self.limit),
+                "peak_concurrency": int(self.peak_limit),
+                "in_flight": self.in_flight,
+                "requests": self.requests,
+                "errors": self.errors,
+                "overloads": self.overloads,
+                "backoffs": self.backoffs,
+                "latency_ewma": self.latency_ewma,
+                "best_latency": self.best_latency
+            }
+    
+    def _observe_latency(self, latency: float) -> None:
+        """Update the latency averages (lock must be held)."""
+        if self.latency_ewma is None:
+            self.latency_ewma = latency
+            self.best_latency = latency
+            return
+        self.latency_ewma = 0.7 * self.latency_ewma + 0.3 * latency
+        # Let the best latency creep up so one lucky request does not pin it forever
+        self.best_latency = min(latency, self.best_latency * 1.01)
+    
+    def _backoff(self, factor: float) -> None:
+        """Multiplicatively decrease the limit, at most once per in-flight window (lock must be held)."""
+        if self._stale_requests > 0:
+            return
+        self.limit = max(self.min_limit, self.limit * factor)
+        self.backoffs += 1
+        self._stale_requests = self.in_flight
+
+# One limiter per model alias, shared by every worker calling that alias
+_alias_limiters = {}
+_alias_limiters_lock = threading.Lock()
+
+def get_alias_limiter(alias: str, **kwargs) -> AdaptiveConcurrencyLimiter:
+    """
+    Get the shared concurrency limiter for a model alias, creating it if needed.
+    
+    Args:
+        alias: Model alias
+        **kwargs: AdaptiveConcurrencyLimiter arguments used on creation
+        
+    Returns:
+        AdaptiveConcurrencyLimiter for the alias
+    """
+    with _alias_limiters_lock:
+        if alias not in _alias_limiters:
+            _alias_limiters[alias] = AdaptiveConcurrencyLimiter(**kwargs)
+        return _alias_limiters[alias]
+
+def get_alias_limiter_metrics() -> Dict[str, Dict[str, Any]]:
+    """
+    Metrics of every alias limiter created in this process.
+    
+    Returns:
+        Dictionary mapping alias to limiter metrics
+    """
+    with _alias_limiters_lock:
+        limiters = dict(_alias_limiters)
+    return {alias: limiter.metrics() for alias, limiter in limiters.items()}
@@ -0,0 +1,233 @@
+"""
+Plotting utilities for model/prompt performance figures.
+Renders headless (Agg backend) with one scatter call per prompt group, and
+renders whole figure sets (one figure per metric and stratum) across a
+process pool.
+"""
+
+import os
+import matplotlib
+matplotlib.use("Agg")
+
+import numpy as np
+import matplotlib.pyplot as plt
+from matplotlib.lines import Line2D
+from concurrent.futures import ProcessPoolExecutor
+from typing import Dict, List, Any, Optional
+
+from .paralell_libs import get_max_threads
+
+METRIC_LABELS = {
+    "mean": "Mean",
+    "weighted_mean": "Weighted Mean",
+    "penalized_mean": "Penalized Mean",
+    "penalized_weighted_mean": "Penalized Weighted Mean",
+}
+
+# Fixed y-range of metrics with a known scale; the rank means (>= 1) are autoscaled
+METRIC_YLIMS = {
+    "penalized_mean": (-1, 1),
+    "penalized_weighted_mean": (-1, 1),
+}
+
+def get_model_positions(df, sort_models: str = "name") -> Dict[str, float]:
+    """
+    Map models to evenly spaced x-coordinates between -0.9 and 0.9.
+
+    Args:
+        df: Performance DataFrame with a model_name column
+        sort_models: "name" for alphabetical order, "appearance" for CSV order
+
+    Returns:
+        Dictionary mapping model name to x-coordinate
+    """
+    models = df['model_name'].unique()
+    if sort_models == "name":
+        models = sorted(models)
+    x_positions = np.linspace(-0.9, 0.9, len(models))
+    return dict(zip(models, x_positions))
+
+def get_prompt_colors(prompts) -> Dict[str, Any]:
+    """
+    Map prompts to tab10 colors.
+
+    Args:
+        prompts: Prompt names
+
+    Returns:
+        Dictionary mapping prompt name to RGBA color
+    """
+    prompts = sorted(prompts)
+    cmap = plt.get_cmap('tab10', max(1, len(prompts)))
+    return {prompt: cmap(i) for i, prompt in enumerate(prompts)}
+
+def render_performance_figure(
+    df,
+    output_path: str,
+    metric: str = "penalized_weighted_mean",
+    style: str = "cartesian",
+    sort_models: str = "name",
+    title: Optional[str] = None,
+    prompt_colors: Optional[Dict[str, Any]] = None,
+    dpi: int = 300
+) -> str:
+    """
+    Render the model-prompt performance scatter plot of one metric.
+
+    Args:
+        df: Performance DataFrame (columns of model_prompt_performance.csv)
+        output_path: PNG file to write
+        metric: Column plotted on the y axis
+        style: "cartesian" (axes through the origin, models as ticks) or
+               "legend" (boxed axes, models in a bottom legend)
+        sort_models: "name" for alphabetical order, "appearance" for CSV order
+        title: Figure title (default: 'Model-Prompt Performance Comparison')
+        prompt_colors: Optional fixed prompt colors, keeps colors stable across a figure set
+        dpi: Output resolution
+
+    Returns:
+        Path of the written figure
+    """
+    model_positions = get_model_positions(df, sort_models)
+    if prompt_colors is None:
+        prompt_colors = get_prompt_colors(df['prompt_name'].unique())
+
+    x = df['model_name'].map(model_positions).to_numpy()
+    y = df[metric].to_numpy()
+
+    fig, ax = plt.subplots(figsize=(12, 8))
+
+    # One scatter call per prompt instead of one per row
+    for prompt, indices in df.groupby('prompt_name').indices.items():
+        ax.scatter(x[indices], y[indices], marker='X', s=100, color=prompt_colors[prompt], alpha=0.8)
+
+    ax.set_xlim(-1, 1)
+    if metric in METRIC_YLIMS:
+        ax.set_ylim(*METRIC_YLIMS[metric])
+    else:
+        ax.margins(y=0.1)
+        ax.autoscale(axis='y')
+    y_low, y_high = ax.get_ylim()
+    ax.set_title(title or 'Model-Prompt Performance Comparison')
+    ax.grid(True, linestyle='--', alpha=0.7)
+
+    if style == "cartesian":
+        ax.spines['left'].set_position('zero')
+        # The x axis crosses at y = 0 when that is in range, else at the bottom
+        ax.spines['bottom'].set_position('zero' if y_low <= 0 <= y_high else ('axes', 0))
+        ax.spines['right'].set_color('none')
+        ax.spines['top'].set_color('none')
+        ax.set_xlabel('Models', x=1.0)
+        ax.set_ylabel(METRIC_LABELS.get(metric, metric), y=1.0)
+        ax.set_xticks(list(model_positions.values()))
+        ax.set_xticklabels(list(model_positions.keys()), rotation=45, ha='right')
+        if y_low <= 0 <= y_high:
+            ax.axhline(y=0, color='k', linestyle='-', alpha=0.3)
+        ax.axvline(x=0, color='k', linestyle='-', alpha=0.3)
+    else:
+        ax.set_xlabel('Models')
+        ax.set_ylabel(METRIC_LABELS.get(metric, metric))
+        model_handles = [Line2D([0], [0], marker='|', color='w', markerfacecolor='black',
+                                markersize=10, label=f"{model} ({pos:.2f})")
+                         for model, pos in model_positions.items()]
+        ax.legend(handles=model_handles, loc='lower center', bbox_to_anchor=(0.5, -0.15),
+                  ncol=3, title="Model Mapping", fontsize=8)
+
+    # Right legend for prompts
+    prompt_handles = [Line2D([0], [0], marker='X', color='w', markerfacecolor=color,
+                             markersize=10, label=prompt)
+                      for prompt, color in prompt_colors.items()]
+    ax2 = ax.twinx()
+    ax2.legend(handles=prompt_handles, loc='center right', bbox_to_anchor=(1.15, 0.5),
+               title="Prompts", fontsize=8)
+    ax2.set_yticks([])
+
+    fig.tight_layout()
+    if style == "cartesian":
+        fig.subplots_adjust(right=0.85)
+    else:
+        fig.subplots_adjust(bottom=0.2, right=0.85)
+
+    fig.savefig(output_path, dpi=dpi, bbox_inches='tight')
+    plt.close(fig)
+
+    return output_path
+
+def _render_worker(task: Dict[str, Any]) -> str:
+    """Process pool entry point for render_performance_figure."""
+    return render_performance_figure(**task)
+
+def render_figure_set(
+    df,
+    output_dir: str,
+    metrics: Optional[List[str]] = None,
+    stratum_column: Optional[str] = None,
+    style: str = "cartesian",
+    sort_models: str = "name",
+    workers: Optional[int] = None,
+    dpi: int = 300,
+    verbose: bool = False
+) -> List[str]:
+    """
+    Render one figure per metric, and per stratum if a stratum column is given.
+
+    Args:
+        df: Performance DataFrame (columns of model_prompt_performance.csv)
+        output_dir: Directory receiving the PNG files
+        metrics: Metric columns to plot (default: every metric present in df)
+        stratum_column: Optional column splitting the data into strata (e.g. case severity)
+        style: Figure style, see render_performance_figure
+        sort_models: "name" for alphabetical order, "appearance" for CSV order
+        workers: Number of worker processes (default: get_max_threads(), 1 renders inline)
+        dpi: Output resolution
+        verbose: Whether to print status information
+
+    Returns:
+        List of written figure paths
+    """
+    os.makedirs(output_dir, exist_ok=True)
+    if metrics is None:
+        metrics = [metric for metric in METRIC_LABELS if metric in df.columns]
+
+    # Same prompt colors in every figure of the set
+    prompt_colors = get_prompt_colors(df['prompt_name'].unique())
+
+    if stratum_column:
+        strata = [(str(value), group) for value, group in df.groupby(stratum_column)]
+    else:
+        strata = [(None, df)]
+
+    tasks = []
+    for stratum, stratum_df in strata:
+        for metric in metrics:
+            name = metric if stratum is None else f"{metric}_{stratum_column}_{stratum}"
+            title = 'Model-Prompt Performance Comparison'
+            if stratum is not None:
+                title += f" ({stratum_column} = {stratum})"
+            tasks.append({
+                "df": stratum_df,
+                "output_path": os.path.join(output_dir, f"{name}.png"),
+                "metric": metric,
+                "style": style,
+                "sort_models": sort_models,
+                "title": title,
+                "prompt_colors": prompt_colors,
+                "dpi": dpi
+            })
+
+    if workers is None:
+        workers = get_max_threads()
+
+    if verbose:
+        print(f"Rendering {len(tasks)} figures on {workers} workers...")
+
+    if workers <= 1 or len(tasks) <= 1:
+        paths = [_render_worker(task) for task in tasks]
+    else:
+        with ProcessPoolExecutor(max_workers=min(workers, len(tasks))) as executor:
+            paths = list(executor.map(_render_worker, tasks))
+
+    if verbose:
+        print(f"Figures written to {output_dir}")
+
+    return paths
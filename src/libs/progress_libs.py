@@ -0,0 +1,231 @@
+"""
+Progress telemetry for long batch jobs.
+Tracks items/sec, in-flight count, error rate, tokens/sec and ETA, renders a
+status line to the terminal and emits newline-delimited JSON events for log
+collection. Output is throttled to one line per interval, so the per-item
+cost is a lock and a clock read.
+"""
+
+import os
+import sys
+import json
+import time
+import threading
+from typing import Dict, Any, Optional, Callable
+
+# Environment variable naming a file ("-" for stdout) that receives NDJSON events
+PROGRESS_EVENTS_ENV = "PROGRESS_EVENTS"
+
+def estimate_tokens(text: Optional[str]) -> int:
+    """
+    Rough token count for a text (about 4 characters per token).
+    Used when the provider response does not report usage.
+
+    Args:
+        text: Text to measure
+
+    Returns:
+        int: Estimated number of tokens
+    """
+    if not text:
+        return 0
+    return max(1, len(text) // 4)
+
+def format_duration(seconds: Optional[float]) -> str:
+    """
+    Format a duration as a short human readable string (e.g. "4m05s").
+
+    Args:
+        seconds: Duration in seconds, or None if unknown
+
+    Returns:
+        Formatted duration, or "?" if unknown
+    """
+    if seconds is None:
+        return "?"
+    seconds = int(seconds)
+    hours, remainder = divmod(seconds, 3600)
+    minutes, secs = divmod(remainder, 60)
+    if hours:
+        return f"{hours}h{minutes:02d}m"
+    if minutes:
+        return f"{minutes}m{secs:02d}s"
+    return f"{secs}s"
+
+class ProgressReporter:
+    """
+    Thread-safe progress tracker for batch jobs.
+
+    Use start_item()/finish_item() around work that runs concurrently so the
+    in-flight count is tracked, or update() for sequential loops.
+    """
+
+    def __init__(
+        self,
+        name: str,
+        total: Optional[int] = None,
+        interval: float = 2.0,
+        stream=None,
+        events_path: Optional[str] = None,
+        extra: Optional[Callable[[], Dict[str, Any]]] = None,
+        extra_prefix: str = "extra_",
+        enabled: bool = True
+    ):
+        """
+        Initialize the reporter.
+
+        Args:
+            name: Job name shown in the status line and events
+            total: Total number of items, or None if unknown (no ETA)
+            interval: Minimum seconds between two status lines/events
+            stream: Terminal stream for the status line (default: stderr)
+            events_path: File receiving NDJSON events, "-" for stdout
+                         (default: $PROGRESS_EVENTS, or no events)
+            extra: Optional function returning extra fields for each event
+                   (e.g. concurrency limiter metrics)
+            extra_prefix: Prefix added to extra fields that share a name with
+                          the reporter's own fields (e.g. "in_flight")
+            enabled: Whether to render anything at all
+        """
+        self.name = name
+        self.total = total
+        self.interval = interval
+        self.stream = stream if stream is not None else sys.stderr
+        self.extra = extra
+        self.extra_prefix = extra_prefix
+        self.enabled = enabled
+
+        self.done = 0
+        self.errors = 0
+        self.tokens = 0
+        self.in_flight = 0
+
+        self.start_time = time.time()
+        self._last_emit = 0.0
+        self._lock = threading.Lock()
+        self._is_tty = hasattr(self.stream, "isatty") and self.stream.isatty()
+
+        if events_path is None:
+            events_path = os.environ.get(PROGRESS_EVENTS_ENV)
+        self._events = None
+        if enabled and events_path:
+            self._events = sys.stdout if events_path == "-" else open(events_path, 'a', encoding='utf-8')
+
+        self._emit("start")
+
+    def start_item(self) -> None:
+        """Mark one item as in flight."""
+        with self._lock:
+            self.in_flight += 1
+
+    def finish_item(self, error: bool = False, tokens: int = 0) -> None:
+        """
+        Mark one in-flight item as finished.
+
+        Args:
+            error: Whether the item failed
+            tokens: Tokens consumed by the item
+        """
+        with self._lock:
+            self.in_flight = max(0, self.in_flight - 1)
+            self._count(1, int(error), tokens)
+
+    def update(self, n: int = 1, errors: int = 0, tokens: int = 0) -> None:
+        """
+        Record finished items in a sequential loop.
+
+        Args:
+            n: Number of items finished
+            errors: How many of them failed
+            tokens: Tokens consumed by them
+        """
+        with self._lock:
+            self._count(n, errors, tokens)
+
+    def snapshot(self) -> Dict[str, Any]:
+        """
+        Current progress statistics.
+
+        Returns:
+            Dictionary with counts, rates and ETA
+        """
+        elapsed = max(time.time() - self.start_time, 1e-9)
+        items_per_sec = self.done / elapsed
+
+        eta = None
+        if self.total is not None and items_per_sec > 0:
+            eta = max(0, self.total - self.done) / items_per_sec
+
+        snapshot = {
+            "job": self.name,
+            "done": self.done,
+            "total": self.total,
+            "errors": self.errors,
+            "error_rate": (self.errors / self.done) if self.done else 0.0,
+            "in_flight": self.in_flight,
+            "items_per_sec": items_per_sec,
+            "tokens_per_sec": self.tokens / elapsed,
+            "elapsed": elapsed,
+            "eta": eta
+        }
+        if self.extra:
+            # The reporter's own fields win, colliding extra fields are kept prefixed
+            for key, value in self.extra().items():
+                snapshot[self.extra_prefix + key if key in snapshot else key] = value
+
+        return snapshot
+
+    def close(self) -> Dict[str, Any]:
+        """
+        Emit the final status line/event and release the events file.
+
+        Returns:
+            Final progress snapshot
+        """
+        with self._lock:
+            snapshot = self._emit("done")
+        if self.enabled and self._is_tty:
+            self.stream.write("\n")
+            self.stream.flush()
+        if self._events is not None and self._events is not sys.stdout:
+            self._events.close()
+        return snapshot
+
+    def _count(self, n: int, errors: int, tokens: int) -> None:
+        """Update counters and emit if the interval elapsed (lock must be held)."""
+        self.done += n
+        self.errors += errors
+        self.tokens += tokens
+
+        now = time.time()
+        if now - self._last_emit >= self.interval:
+            self._emit("progress", now)
+
+    def _emit(self, event: str, now: Optional[float] = None) -> Dict[str, Any]:
+        """Render the status line and write an NDJSON event."""
+        self._last_emit = now or time.time()
+        snapshot = self.snapshot()
+        if not self.enabled:
+            return snapshot
+
+        total = snapshot["total"]
+        done_str = f"{snapshot['done']}/{total} ({snapshot['done'] / total:.0%})" if total else f"{snapshot['done']}"
+        line = (
+            f"[{self.name}] {done_str} | {snapshot['items_per_sec']:.2f} it/s"
+            f" | {snapshot['in_flight']} in flight | err {snapshot['error_rate']:.1%}"
+            f" | {snapshot['tokens_per_sec']:.0f} tok/s | ETA {format_duration(snapshot['eta'])}"
+        )
+        if "concurrency" in snapshot:
+            line += f" | concurrency {snapshot['concurrency']}"
+
+        if self._is_tty:
+            self.stream.write("\r" + line)
+        else:
+            self.stream.write(line + "\n")
+        self.stream.flush()
+
+        if self._events is not None:
+            self._events.write(json.dumps({"event": event, "timestamp": time.time(), **snapshot}) + "\n")
+            self._events.flush()
+
+        return snapshot
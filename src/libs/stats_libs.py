@@ -0,0 +1,572 @@
+"""
+Resampling statistics for the model x prompt leaderboard.
+Bootstrap confidence intervals over cases for every metric of
+rescaled_penalized_weighted_stats. Resamples are drawn as case-count matrices
+and scored from per-case metric terms, and groups are spread across a process pool.
+Paired permutation and bootstrap tests between groups scored on the same cases,
+with Holm or Benjamini-Hochberg correction. Leaderboard order sensitivity to
+the rank weights.
+"""
+
+import numpy as np
+from concurrent.futures import ProcessPoolExecutor
+from typing import Dict, List, Any, Optional, Hashable, Tuple
+
+from .math_libs import alpha, histogram_stats, weight_values, penalty_values
+from .paralell_libs import get_max_threads
+
+METRIC_NAMES = ("mean", "weighted_mean", "penalized_mean", "penalized_weighted_mean")
+
+def bootstrap_group_stats(
+    ranks,
+    weights: Optional[Dict[int, float]] = None,
+    n_resamples: int = 2000,
+    confidence: float = 0.95,
+    seed=None,
+    chunk_size: int = 1000,
+    alpha: float = alpha
+) -> Dict[str, Dict[str, float]]:
+    """
+    Bootstrap confidence intervals for one group, resampling cases.
+    A case with several rows (e.g. a case diagnosed twice) is drawn with all
+    its rows, as in the paired tests.
+
+    Args:
+        ranks: Ranks of the group per case, a rank or a sequence of ranks for
+               each case (see _case_terms); NaN ranks are ignored
+        weights: Dictionary mapping ranks to weights, or None for uniform weights
+        n_resamples: Number of bootstrap resamples
+        confidence: Confidence level of the percentile intervals
+        seed: Seed or np.random.SeedSequence for reproducible resamples
+        chunk_size: Resamples drawn per index matrix, bounds memory use
+        alpha: Parameter for penalty function
+
+    Returns:
+        Dictionary mapping each metric name to its estimate, ci_low, ci_high and std
+    """
+    case_ranks = [np.atleast_1d(np.asarray(case, dtype=float)) for case in ranks]
+    case_ranks = [case[~np.isnan(case)] for case in case_ranks]
+    terms = _case_terms([case for case in case_ranks if len(case)], weights)
+    n_cases = len(terms)
+
+    sums = terms.sum(axis=0)
+    point = [float(_metric_from_sums(sums, name, alpha)) for name in METRIC_NAMES]
+
+    if n_cases == 0 or n_resamples <= 0:
+        return {
+            name: {"estimate": point[i], "ci_low": np.nan, "ci_high": np.nan, "std": np.nan}
+            for i, name in enumerate(METRIC_NAMES)
+        }
+
+    rng = np.random.default_rng(seed)
+    samples = [[] for _ in METRIC_NAMES]
+
+    for start in range(0, n_resamples, chunk_size):
+        size = min(chunk_size, n_resamples - start)
+        # Each row of the index matrix is one resample of the cases
+        indices = rng.integers(0, n_cases, size=(size, n_cases))
+
+        # How often each case is drawn in each resample, then the summed terms of every resample
+        offsets = np.arange(size)[:, None] * n_cases
+        draws = np.bincount((indices + offsets).ravel(), minlength=size * n_cases).reshape(size, n_cases).astype(float)
+        resampled_sums = draws @ terms
+
+        for i, name in enumerate(METRIC_NAMES):
+            samples[i].append(_metric_from_sums(resampled_sums, name, alpha))
+
+    tail = (1 - confidence) / 2 * 100
+    result = {}
+    for i, name in enumerate(METRIC_NAMES):
+        values = np.concatenate(samples[i])
+        ci_low, ci_high = np.percentile(values, [tail, 100 - tail])
+        result[name] = {
+            "estimate": point[i],
+            "ci_low": float(ci_low),
+            "ci_high": float(ci_high),
+            "std": float(values.std(ddof=1)) if len(values) > 1 else 0.0
+        }
+
+    return result
+
+def _bootstrap_worker(args) -> Dict[str, Dict[str, float]]:
+    """Process pool entry point for bootstrap_group_stats."""
+    ranks, weights, n_resamples, confidence, seed = args
+    return bootstrap_group_stats(ranks, weights, n_resamples, confidence, seed)
+
+def bootstrap_stats(
+    groups: Dict[Hashable, Any],
+    weights: Optional[Dict[int, float]] = None,
+    n_resamples: int = 2000,
+    confidence: float = 0.95,
+    seed: Optional[int] = 0,
+    workers: Optional[int] = None,
+    verbose: bool = False
+) -> Dict[Hashable, Dict[str, Dict[str, float]]]:
+    """
+    Bootstrap confidence intervals for many groups in parallel.
+    Every group gets its own child seed, so results do not depend on the
+    number of workers.
+
+    Args:
+        groups: Dictionary mapping group key (e.g. (model, prompt)) to its ranks per
+                case (see bootstrap_group_stats)
+        weights: Dictionary mapping ranks to weights, or None for uniform weights
+        n_resamples: Number of bootstrap resamples per group
+        confidence: Confidence level of the percentile intervals
+        seed: Root seed for reproducible resamples
+        workers: Number of worker processes (default: get_max_threads(), 1 runs inline)
+        verbose: Whether to print status information
+
+    Returns:
+        Dictionary mapping group key to the output of bootstrap_group_stats
+    """
+    keys = list(groups.keys())
+    child_seeds = np.random.SeedSequence(seed).spawn(len(keys))
+    tasks = [(groups[key], weights, n_resamples, confidence, child_seeds[i]) for i, key in enumerate(keys)]
+
+    if workers is None:
+        workers = get_max_threads()
+
+    if verbose:
+        print(f"Bootstrapping {len(keys)} groups x {n_resamples} resamples on {workers} workers...")
+
+    if workers <= 1 or len(tasks) <= 1:
+        results = [_bootstrap_worker(task) for task in tasks]
+    else:
+        with ProcessPoolExecutor(max_workers=workers) as executor:
+            results = list(executor.map(_bootstrap_worker, tasks, chunksize=max(1, len(tasks) // (workers * 4))))
+
+    return dict(zip(keys, results))
+
+def rank_count_matrix(rank_counts) -> Tuple[List[Tuple], List[int], np.ndarray]:
+    """
+    Turn (model_name, model_alias, prompt_name, rank, count) rows into a
+    (model-prompt x rank) count matrix.
+
+    Args:
+        rank_counts: Iterable of (model_name, model_alias, prompt_name, rank, count)
+
+    Returns:
+        tuple: (group_keys, rank_values, counts) with sorted group keys and ranks
+    """
+    rank_counts = list(rank_counts)
+    group_keys = sorted({(model_name, model_alias, prompt_name) for model_name, model_alias, prompt_name, _, _ in rank_counts})
+    rank_values = sorted({rank for _, _, _, rank, _ in rank_counts})
+    group_index = {key: i for i, key in enumerate(group_keys)}
+    rank_index = {rank: j for j, rank in enumerate(rank_values)}
+
+    counts = np.zeros((len(group_keys), len(rank_values)))
+    for model_name, model_alias, prompt_name, rank, count in rank_counts:
+        counts[group_index[(model_name, model_alias, prompt_name)], rank_index[rank]] += count
+
+    return group_keys, rank_values, counts
+
+def leaderboard_rows(group_keys, rank_values, counts, weights=None) -> List[Dict[str, Any]]:
+    """
+    Score every model-prompt combination of a rank count matrix.
+
+    Args:
+        group_keys: List of (model_name, model_alias, prompt_name)
+        rank_values: List of the distinct rank values
+        counts: (groups x ranks) count matrix
+        weights: Dictionary mapping ranks to weights, or None for uniform weights
+
+    Returns:
+        List of dictionaries with the columns of model_prompt_performance.csv
+    """
+    means, weighted_means, penalized_means, penalized_weighted_means = histogram_stats(rank_values, counts, weights)
+    sample_counts = counts.sum(axis=1)
+
+    rows = []
+    for i, (model_name, model_alias, prompt_name) in enumerate(group_keys):
+        rows.append({
+            'model_name': model_name,
+            'model_alias': model_alias,
+            'prompt_name': prompt_name,
+            'sample_count': int(sample_counts[i]),
+            'mean': float(means[i]),
+            'weighted_mean': float(weighted_means[i]),
+            'penalized_mean': float(penalized_means[i]),
+            'penalized_weighted_mean': float(penalized_weighted_means[i])
+        })
+
+    return rows
+
+def _case_terms(ranks, weights=None) -> np.ndarray:
+    """
+    Per-case additive terms of the metrics: (1, rank, weight, weight * rank).
+    A case with several rows (e.g. a case diagnosed twice) gets the sum of the
+    terms of all its rows, so every row counts as it does in the histogram.
+
+    Args:
+        ranks: 1-D array with one rank per case, or a sequence with the ranks
+               of every case (scalar or 1-D array each)
+        weights: Dictionary mapping ranks to weights, or None for uniform weights
+
+    Returns:
+        np.ndarray of shape (cases, 4)
+    """
+    case_ranks = [np.atleast_1d(np.asarray(case, dtype=float)) for case in ranks]
+    if not case_ranks:
+        return np.zeros((0, 4))
+
+    rows = np.concatenate(case_ranks)
+    rank_values, rank_ids = np.unique(rows, return_inverse=True)
+    row_weights = weight_values(rank_values, weights)[rank_ids]
+    row_terms = np.column_stack([np.ones_like(rows), rows, row_weights, row_weights * rows])
+
+    starts = np.concatenate([[0], np.cumsum([len(case) for case in case_ranks])[:-1]])
+    return np.add.reduceat(row_terms, starts, axis=0)
+
+def _metric_from_sums(sums, metric: str, alpha: float = alpha) -> np.ndarray:
+    """
+    Evaluate a metric from summed case terms (..., 4), as histogram_stats does.
+
+    Args:
+        sums: Array whose last axis holds the sums of (1, rank, weight, weight * rank)
+        metric: One of METRIC_NAMES
+        alpha: Parameter for penalty function
+
+    Returns:
+        np.ndarray of metric values
+    """
+    with np.errstate(divide='ignore', invalid='ignore'):
+        if metric in ("mean", "penalized_mean"):
+            value = np.where(sums[..., 0] > 0, sums[..., 1] / sums[..., 0], 0.0)
+        else:
+            value = np.where(sums[..., 2] != 0, sums[..., 3] / sums[..., 2], 0.0)
+
+    if metric.startswith("penalized"):
+        return penalty_values(value, alpha)
+    return value
+
+def paired_permutation_test(
+    ranks_a,
+    ranks_b,
+    weights: Optional[Dict[int, float]] = None,
+    metric: str = "penalized_weighted_mean",
+    n_permutations: int = 10000,
+    seed=None,
+    chunk_size: int = 2000
+) -> Dict[str, float]:
+    """
+    Paired permutation test of the metric difference between two groups
+    scored on the same cases. Each permutation swaps the two ranks of a random
+    subset of cases; all permutations of a chunk are scored with one matrix product.
+
+    Args:
+        ranks_a: Ranks of group A per case (see _case_terms), aligned by case with ranks_b
+        ranks_b: Ranks of group B per case
+        weights: Dictionary mapping ranks to weights, or None for uniform weights
+        metric: One of METRIC_NAMES
+        n_permutations: Number of random sign flips
+        seed: Seed or np.random.SeedSequence for reproducible permutations
+        chunk_size: Permutations per swap matrix, bounds memory use
+
+    Returns:
+        Dictionary with n_cases, difference (A - B) and two-sided p_value
+    """
+    terms_a = _case_terms(ranks_a, weights)
+    terms_b = _case_terms(ranks_b, weights)
+    sums_a, sums_b = terms_a.sum(axis=0), terms_b.sum(axis=0)
+    observed = float(_metric_from_sums(sums_a, metric) - _metric_from_sums(sums_b, metric))
+
+    n_cases = len(terms_a)
+    if n_cases == 0:
+        return {"n_cases": 0, "difference": 0.0, "p_value": 1.0}
+
+    rng = np.random.default_rng(seed)
+    delta = terms_b - terms_a
+    extreme = 0
+
+    for start in range(0, n_permutations, chunk_size):
+        size = min(chunk_size, n_permutations - start)
+        # One random bit per case and permutation: 1 swaps the two ranks
+        random_bytes = rng.integers(0, 256, size=(size, (n_cases + 7) // 8), dtype=np.uint8)
+        swaps = np.unpackbits(random_bytes, axis=1, count=n_cases).astype(float)
+        shift = swaps @ delta
+        differences = _metric_from_sums(sums_a + shift, metric) - _metric_from_sums(sums_b - shift, metric)
+        # Tolerance keeps ties with the observed statistic from being lost to rounding
+        extreme += int(np.count_nonzero(np.abs(differences) >= abs(observed) - 1e-12))
+
+    return {
+        "n_cases": n_cases,
+        "difference": observed,
+        "p_value": (extreme + 1) / (n_permutations + 1)
+    }
+
+def paired_bootstrap_test(
+    ranks_a,
+    ranks_b,
+    weights: Optional[Dict[int, float]] = None,
+    metric: str = "penalized_weighted_mean",
+    n_resamples: int = 10000,
+    confidence: float = 0.95,
+    seed=None,
+    chunk_size: int = 2000
+) -> Dict[str, float]:
+    """
+    Paired bootstrap of the metric difference between two groups scored on the
+    same cases. Cases are resampled jointly for both groups.
+
+    Args:
+        ranks_a: Ranks of group A per case (see _case_terms), aligned by case with ranks_b
+        ranks_b: Ranks of group B per case
+        weights: Dictionary mapping ranks to weights, or None for uniform weights
+        metric: One of METRIC_NAMES
+        n_resamples: Number of bootstrap resamples
+        confidence: Confidence level of the difference interval
+        seed: Seed or np.random.SeedSequence for reproducible resamples
+        chunk_size: Resamples per index matrix, bounds memory use
+
+    Returns:
+        Dictionary with n_cases, difference (A - B), ci_low, ci_high and two-sided p_value
+    """
+    terms_a = _case_terms(ranks_a, weights)
+    terms_b = _case_terms(ranks_b, weights)
+    observed = float(_metric_from_sums(terms_a.sum(axis=0), metric) - _metric_from_sums(terms_b.sum(axis=0), metric))
+
+    n_cases = len(terms_a)
+    if n_cases == 0:
+        return {"n_cases": 0, "difference": 0.0, "ci_low": np.nan, "ci_high": np.nan, "p_value": 1.0}
+
+    rng = np.random.default_rng(seed)
+    samples = []
+
+    for start in range(0, n_resamples, chunk_size):
+        size = min(chunk_size, n_resamples - start)
+        indices = rng.integers(0, n_cases, size=(size, n_cases))
+        # How often each case is drawn in each resample
+        offsets = np.arange(size)[:, None] * n_cases
+        draws = np.bincount((indices + offsets).ravel(), minlength=size * n_cases).reshape(size, n_cases).astype(float)
+        samples.append(_metric_from_sums(draws @ terms_a, metric) - _metric_from_sums(draws @ terms_b, metric))
+
+    differences = np.concatenate(samples)
+    tail = (1 - confidence) / 2 * 100
+    ci_low, ci_high = np.percentile(differences, [tail, 100 - tail])
+
+    # Two-sided p-value: how often the resampled difference crosses zero
+    p_value = 2 * min(np.mean(differences <= 0), np.mean(differences >= 0))
+
+    return {
+        "n_cases": n_cases,
+        "difference": observed,
+        "ci_low": float(ci_low),
+        "ci_high": float(ci_high),
+        "p_value": float(min(1.0, max(p_value, 1 / (n_resamples + 1))))
+    }
+
+def holm_correction(p_values) -> np.ndarray:
+    """
+    Holm-Bonferroni adjusted p-values (family-wise error rate).
+
+    Args:
+        p_values: 1-D array of raw p-values
+
+    Returns:
+        np.ndarray of adjusted p-values, same order as the input
+    """
+    p_values = np.asarray(p_values, dtype=float)
+    m = len(p_values)
+    order = np.argsort(p_values)
+    adjusted = np.maximum.accumulate((m - np.arange(m)) * p_values[order])
+    result = np.empty(m)
+    result[order] = np.minimum(adjusted, 1.0)
+    return result
+
+def benjamini_hochberg(p_values) -> np.ndarray:
+    """
+    Benjamini-Hochberg adjusted p-values (false discovery rate).
+
+    Args:
+        p_values: 1-D array of raw p-values
+
+    Returns:
+        np.ndarray of adjusted p-values, same order as the input
+    """
+    p_values = np.asarray(p_values, dtype=float)
+    m = len(p_values)
+    order = np.argsort(p_values)
+    scaled = p_values[order] * m / np.arange(1, m + 1)
+    adjusted = np.minimum.accumulate(scaled[::-1])[::-1]
+    result = np.empty(m)
+    result[order] = np.minimum(adjusted, 1.0)
+    return result
+
+CORRECTIONS = {
+    "holm": holm_correction,
+    "bh": benjamini_hochberg,
+}
+
+def _pair_test_worker(args) -> Dict[str, float]:
+    """Process pool entry point for the paired tests."""
+    method, ranks_a, ranks_b, weights, metric, n_iterations, seed = args
+    if method == "bootstrap":
+        return paired_bootstrap_test(ranks_a, ranks_b, weights, metric, n_iterations, seed=seed)
+    return paired_permutation_test(ranks_a, ranks_b, weights, metric, n_iterations, seed=seed)
+
+def pairwise_tests(
+    case_ranks: Dict[Hashable, Dict[Any, Any]],
+    weights: Optional[Dict[int, float]] = None,
+    metric: str = "penalized_weighted_mean",
+    method: str = "permutation",
+    n_iterations: int = 10000,
+    correction: str = "holm",
+    seed: Optional[int] = 0,
+    workers: Optional[int] = None,
+    verbose: bool = False
+) -> Dict[str, Any]:
+    """
+    Paired tests between every pair of groups, on the cases both groups scored.
+
+    Args:
+        case_ranks: Dictionary mapping group key to {case id: rank or list of ranks},
+                    every rank of a case is kept (see _case_terms)
+        weights: Dictionary mapping ranks to weights, or None for uniform weights
+        metric: One of METRIC_NAMES
+        method: "permutation" or "bootstrap"
+        n_iterations: Permutations or resamples per pair
+        correction: "holm", "bh" or None
+        seed: Root seed, one child seed per pair
+        workers: Number of worker processes (default: get_max_threads(), 1 runs inline)
+        verbose: Whether to print status information
+
+    Returns:
+        Dictionary with "keys" (group order), and (G x G) matrices "difference"
+        (row minus column), "p_value" and "p_adjusted" (NaN on the diagonal and
+        for pairs without shared cases)
+    """
+    if method not in ("permutation", "bootstrap"):
+        raise ValueError(f"Unknown test method '{method}', expected 'permutation' or 'bootstrap'")
+    if correction is not None and correction not in CORRECTIONS:
+        raise ValueError(f"Unknown correction '{correction}', expected one of {list(CORRECTIONS)}")
+
+    keys = list(case_ranks.keys())
+    pairs = []
+    tasks = []
+    for i in range(len(keys)):
+        for j in range(i + 1, len(keys)):
+            ranks_i, ranks_j = case_ranks[keys[i]], case_ranks[keys[j]]
+            shared = sorted(set(ranks_i) & set(ranks_j), key=str)
+            if not shared:
+                continue
+            pairs.append((i, j))
+            tasks.append((
+                method,
+                [np.atleast_1d(np.asarray(ranks_i[case], dtype=float)) for case in shared],
+                [np.atleast_1d(np.asarray(ranks_j[case], dtype=float)) for case in shared],
+                weights, metric, n_iterations, None
+            ))
+
+    child_seeds = np.random.SeedSequence(seed).spawn(len(tasks))
+    tasks = [task[:-1] + (child_seeds[k],) for k, task in enumerate(tasks)]
+
+    if workers is None:
+        workers = get_max_threads()
+
+    if verbose:
+        print(f"Running {len(tasks)} paired {method} tests ({n_iterations} iterations) on {workers} workers...")
+
+    if workers <= 1 or len(tasks) <= 1:
+        results = [_pair_test_worker(task) for task in tasks]
+    else:
+        with ProcessPoolExecutor(max_workers=workers) as executor:
+            results = list(executor.map(_pair_test_worker, tasks, chunksize=max(1, len(tasks) // (workers * 4))))
+
+    n_groups = len(keys)
+    difference = np.full((n_groups, n_groups), np.nan)
+    p_value = np.full((n_groups, n_groups), np.nan)
+    p_adjusted = np.full((n_groups, n_groups), np.nan)
+
+    raw = np.array([result["p_value"] for result in results])
+    adjusted = CORRECTIONS[correction](raw) if (correction and len(raw)) else raw
+
+    for k, (i, j) in enumerate(pairs):
+        difference[i, j], difference[j, i] = results[k]["difference"], -results[k]["difference"]
+        p_value[i, j] = p_value[j, i] = raw[k]
+        p_adjusted[i, j] = p_adjusted[j, i] = adjusted[k]
+
+    return {
+        "keys": keys,
+        "difference": difference,
+        "p_value": p_value,
+        "p_adjusted": p_adjusted
+    }
+
+def sample_weight_vectors(
+    base_weights: Dict[int, float],
+    rank_values,
+    n_vectors: int = 1000,
+    concentration: float = 50.0,
+    seed: Optional[int] = 0
+) -> np.ndarray:
+    """
+    Sample weight vectors around a base weighting for sensitivity analysis.
+    Vectors are drawn from a Dirichlet distribution centered on the normalized
+    base weights; lower concentration spreads them further. The base vector is
+    always the first row.
+
+    Args:
+        base_weights: Dictionary mapping ranks to weights
+        rank_values: 1-D sequence of the K distinct rank values
+        n_vectors: Number of vectors including the base one
+        concentration: Dirichlet concentration around the base weights
+        seed: Seed for reproducible sampling
+
+    Returns:
+        np.ndarray of shape (n_vectors x K), rows summing to 1
+    """
+    base = weight_values(rank_values, base_weights)
+    if base.sum() <= 0:
+        raise ValueError("Base weights must have a positive sum over the observed ranks")
+    base = base / base.sum()
+
+    rng = np.random.default_rng(seed)
+    # Ranks with zero base weight keep a small share instead of a degenerate Dirichlet parameter
+    samples = rng.dirichlet(np.maximum(base * concentration, 1e-3), size=max(0, n_vectors - 1))
+    return np.vstack([base, samples])
+
+def leaderboard_order_changes(scores, baseline_scores, top_k: int = 5) -> Dict[str, np.ndarray]:
+    """
+    Compare many leaderboards with a baseline leaderboard (higher score is better).
+
+    Args:
+        scores: 2-D array (configurations x groups) of scores
+        baseline_scores: 1-D array (groups) of baseline scores
+        top_k: Size of the top set compared between leaderboards
+
+    Returns:
+        Dictionary with per-configuration arrays "spearman", "top1_changed",
+        "top_k_overlap" (fraction of the baseline top-k kept) and "max_shift",
+        and per-group arrays "baseline_position", "best_position", "worst_position",
+        "median_position" and "first_fraction" (positions are 1-based)
+    """
+    scores = np.atleast_2d(np.asarray(scores, dtype=float))
+    baseline_scores = np.asarray(baseline_scores, dtype=float)
+    n_groups = scores.shape[1]
+
+    # Position of every group in every leaderboard (0 = best), stable on ties
+    positions = np.argsort(np.argsort(-scores, axis=1, kind="stable"), axis=1, kind="stable")
+    baseline_positions = np.argsort(np.argsort(-baseline_scores, kind="stable"), kind="stable")
+
+    shifts = positions - baseline_positions
+    if n_groups > 1:
+        spearman = 1 - 6 * (shifts ** 2).sum(axis=1) / (n_groups * (n_groups ** 2 - 1))
+    else:
+        spearman = np.ones(len(scores))
+
+    k = min(top_k, n_groups)
+    baseline_top = baseline_positions < k
+    top_k_overlap = ((positions < k) & baseline_top).sum(axis=1) / max(k, 1)
+
+    return {
+        "spearman": spearman,
+        "top1_changed": positions[:, np.argmin(baseline_positions)] != 0,
+        "top_k_overlap": top_k_overlap,
+        "max_shift": np.abs(shifts).max(axis=1),
+        "baseline_position": baseline_positions + 1,
+        "best_position": positions.min(axis=0) + 1,
+        "worst_position": positions.max(axis=0) + 1,
+        "median_position": np.median(positions, axis=0) + 1,
+        "first_fraction": (positions == 0).mean(axis=0)
+    }
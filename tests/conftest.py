@@ -0,0 +1,51 @@
+import os
+import sys
+
+import pytest
+
+# The libraries import each other from src/ (e.g. "from libs.math_libs import ...")
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', 'src'))
+
+SCHEMAS = ("bench29", "llm", "prompts", "registry")
+
+
+@pytest.fixture
+def bench29_session(tmp_path):
+    """
+    Session on a SQLite database with the bench29, llm, prompts and registry
+    schemas attached, holding the tables of the ingest and leaderboard code
+    plus one model, prompt, severity level and semantic relationship.
+    """
+    from sqlalchemy import create_engine, event
+    from sqlalchemy.orm import Session
+    from db.bench29.bench29_models import (
+        CasesBench, LlmDifferentialDiagnosis, DifferentialDiagnosis2Rank, LlmAnalysis,
+        LeaderboardRankCount, IngestManifest,
+    )
+    from db.llm.llm_models import Models
+    from db.prompts.prompts_models import Prompt
+    from db.registry.registry_models import SeverityLevels, DiagnosisSemanticRelationship
+
+    engine = create_engine(f"sqlite:///{tmp_path / 'main.db'}")
+
+    @event.listens_for(engine, "connect")
+    def attach_schemas(connection, _):
+        for schema in SCHEMAS:
+            connection.execute(f"ATTACH DATABASE '{tmp_path / schema}.db' AS {schema}")
+
+    for model in (CasesBench, LlmDifferentialDiagnosis, DifferentialDiagnosis2Rank, LlmAnalysis,
+                  LeaderboardRankCount, IngestManifest, Models, Prompt, SeverityLevels,
+                  DiagnosisSemanticRelationship):
+        model.__table__.create(engine)
+
+    session = Session(engine)
+    session.add_all([
+        Models(alias="chatglm3-6b", name="chatglm3-6b", provider="local"),
+        Prompt(alias="standard", content="Give a differential diagnosis"),
+        SeverityLevels(name="rare"),
+        DiagnosisSemanticRelationship(semantic_relationship="Exact Synonym"),
+    ])
+    session.commit()
+    yield session
+    session.close()
+    engine.dispose()
@@ -0,0 +1,137 @@
+import csv
+import io
+import json
+import datetime
+
+import pytest
+from sqlalchemy import create_engine, Column, Integer, String, JSON
+from sqlalchemy.orm import declarative_base, Session
+
+from hoarder29.libs.bulk_libs import (
+    _copy_field, copy_insert, bulk_insert, write_rows,
+    read_json_file, load_json_files_parallel, list_result_files,
+)
+
+Base = declarative_base()
+
+
+class Row(Base):
+    __tablename__ = "rows"
+    id = Column(Integer, primary_key=True)
+    name = Column(String)
+    meta_data = Column(JSON)
+
+
+def parse_csv_line(line):
+    return next(csv.reader(io.StringIO(line)))
+
+
+@pytest.mark.parametrize("value, expected", [
+    ("plain", "plain"),
+    ("", ""),
+    ('say "hi", twice', 'say "hi", twice'),
+    ("multi\nline,\r\nvalue", "multi\nline,\r\nvalue"),
+    ("back\\slash", "back\\slash"),
+    (42, "42"),
+    (1.5, "1.5"),
+    (True, "True"),
+    (datetime.date(2024, 1, 31), "2024-01-31"),
+    (datetime.datetime(2024, 1, 31, 12, 30), "2024-01-31T12:30:00"),
+])
+def test_copy_field_round_trips_through_csv(value, expected):
+    field = _copy_field(value)
+    assert field.startswith('"') and field.endswith('"')
+    assert parse_csv_line(field) == [expected]
+
+
+def test_copy_field_null_and_json():
+    # NULL is the only unquoted empty field, an empty string stays quoted
+    assert _copy_field(None) == ''
+    assert _copy_field('') == '""'
+
+    line = ','.join([_copy_field({"a": 'x "y"'}), _copy_field([1, "b,c"]), _copy_field(None)])
+    assert parse_csv_line(line) == ['{"a": "x \\"y\\""}', '[1, "b,c"]', '']
+
+
+class FakeCursor:
+    def __init__(self):
+        self.calls = []
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *args):
+        return False
+
+    def copy_expert(self, sql, buffer):
+        self.calls.append((sql, buffer.read()))
+
+
+def test_copy_insert_writes_one_csv_record_per_row():
+    cursor = FakeCursor()
+    raw_connection = type("Raw", (), {"cursor": lambda self: cursor})()
+    sa_connection = type("Conn", (), {"connection": raw_connection})()
+    session = type("Sess", (), {"connection": lambda self: sa_connection})()
+
+    rows = [
+        {"id": 1, "name": 'a "quoted", name', "meta_data": {"k": [1, 2]}},
+        {"id": 2, "name": "two\nlines", "meta_data": None},
+    ]
+    assert copy_insert(session, Row, rows) == 2
+    assert copy_insert(session, Row, []) == 0
+
+    (sql, data), = cursor.calls
+    assert sql == "COPY rows (id, name, meta_data) FROM STDIN WITH (FORMAT csv)"
+    records = list(csv.reader(io.StringIO(data)))
+    assert records == [
+        ["1", 'a "quoted", name', '{"k": [1, 2]}'],
+        ["2", "two\nlines", ""],
+    ]
+
+
+def test_bulk_insert_and_write_rows():
+    engine = create_engine("sqlite://")
+    Base.metadata.create_all(engine)
+    rows = [{"id": i, "name": f"n{i}", "meta_data": {"i": i}} for i in range(7)]
+
+    with Session(engine) as session:
+        assert bulk_insert(session, Row, rows[:5], batch_size=2) == 5
+        assert write_rows(session, Row, rows[5:], method="insert") == 2
+        session.commit()
+        assert [r.meta_data for r in session.query(Row).order_by(Row.id)] == [{"i": i} for i in range(7)]
+
+        with pytest.raises(ValueError):
+            write_rows(session, Row, rows, method="upsert")
+
+
+def read_diagnosis(file_path, encoding):
+    """Reader that keeps only the diagnosis text, as parse_llm_diagnoses does."""
+    file_path, data, error = read_json_file(file_path, encoding)
+    return file_path, (data or {}).get("predict_diagnosis"), error
+
+
+@pytest.fixture
+def result_dir(tmp_path):
+    for i in range(6):
+        # Result files are written with a BOM
+        (tmp_path / f"patient_{i}.json").write_text(json.dumps({"predict_diagnosis": f"dx {i}"}), encoding="utf-8-sig")
+    (tmp_path / "patient_6.json").write_text("{not json", encoding="utf-8")
+    (tmp_path / "summary.json").write_text("{}", encoding="utf-8")
+    return tmp_path
+
+
+@pytest.mark.parametrize("workers", [1, 2])
+def test_load_json_files_parallel_keeps_order_and_reports_errors(result_dir, workers):
+    file_paths = list_result_files(str(result_dir))
+    assert [p.rsplit("/", 1)[-1] for p in file_paths] == [f"patient_{i}.json" for i in range(7)]
+
+    results = list(load_json_files_parallel(file_paths, workers=workers, reader=read_diagnosis))
+    assert [path for path, _ in results] == file_paths
+    assert [data for _, data in results] == [f"dx {i}" for i in range(6)] + [None]
+
+    full = dict(load_json_files_parallel(file_paths[:2], workers=workers))
+    assert full[file_paths[0]] == {"predict_diagnosis": "dx 0"}
+
+
+def test_list_result_files_of_missing_directory(tmp_path):
+    assert list_result_files(str(tmp_path / "missing")) == []
@@ -0,0 +1,62 @@
+from types import SimpleNamespace
+
+from bench29.libs.dedup_libs import (
+    normalize_judge_input, hash_judge_input, group_by_judge_input, fan_out_result, build_dedup_report,
+)
+
+
+def diagnosis(id, text, gold=None, case_id=1):
+    return SimpleNamespace(id=id, diagnosis=text, gold=gold, cases_bench_id=case_id)
+
+
+def test_normalize_judge_input():
+    assert normalize_judge_input("  1.  Asthma\r\n\r\n\r\n2.\tCOPD  ") == "1. Asthma\n2. COPD"
+    # NFKC folds compatibility characters such as full-width digits
+    assert normalize_judge_input("１. Asthma") == "1. Asthma"
+    assert normalize_judge_input(None) == ""
+    assert normalize_judge_input("") == ""
+
+
+def test_hash_judge_input():
+    assert hash_judge_input("1. Asthma\n2. COPD") == hash_judge_input("1.  Asthma\r\n\r\n2. COPD ")
+    assert hash_judge_input("1. Asthma") != hash_judge_input("1. asthma")
+    # The gold diagnosis is part of the input, and the separator keeps the parts apart
+    assert hash_judge_input("a", "bc") != hash_judge_input("ab", "c")
+    assert hash_judge_input("a") != hash_judge_input("a", "")
+
+
+def test_group_by_judge_input_keeps_first_seen_order():
+    rows = [
+        diagnosis(1, "Asthma"),
+        diagnosis(2, "COPD"),
+        diagnosis(3, " Asthma "),
+        diagnosis(4, "Asthma", gold="Asthma"),
+    ]
+    groups = group_by_judge_input(rows)
+    assert [[row.id for row in group] for group in groups.values()] == [[1, 3, 4], [2]]
+
+    groups = group_by_judge_input(rows, gold_getter=lambda d: d.gold)
+    # Row 4 differs from rows 1 and 3 by its gold diagnosis
+    assert [[row.id for row in group] for group in groups.values()] == [[1, 3], [2], [4]]
+
+    report = build_dedup_report(groups)
+    assert report["total_rows"] == 4
+    assert report["unique_inputs"] == 3
+    assert report["calls_saved"] == 1
+    assert report["saved_fraction"] == 0.25
+    assert report["duplicated_inputs"] == 1
+    assert report["largest_groups"] == [2, 1, 1]
+
+
+def test_fan_out_result():
+    representative = diagnosis(1, "Asthma", case_id=10)
+    duplicate = diagnosis(7, "Asthma", case_id=20)
+    result = {"case_id": 10, "diagnosis_id": 1, "severity": "mild", "db_record_ids": [3], "filepath": "x.json"}
+
+    fanned = fan_out_result(result, duplicate, representative)
+    assert fanned == {"case_id": 20, "diagnosis_id": 7, "severity": "mild", "deduplicated_from": 1}
+    assert result["diagnosis_id"] == 1
+
+
+def test_empty_report():
+    assert build_dedup_report({})["saved_fraction"] == 0.0
@@ -0,0 +1,51 @@
+import threading
+
+from sqlalchemy import create_engine, text
+
+from hoarder29.libs.directory_libs import process_directories_parallel
+from libs.progress_libs import ProgressReporter
+
+
+def process_directory(session, base_dir, dir_name, progress=None, verbose=False):
+    """Count the letters of the directory name, failing on directories named bad_*."""
+    session.execute(text("SELECT 1"))
+    if dir_name.startswith("bad_"):
+        raise RuntimeError(f"cannot parse {dir_name}")
+    if progress:
+        progress.update()
+    return len(dir_name)
+
+
+def test_counts_and_failures_per_directory(tmp_path):
+    engine = create_engine(f"sqlite:///{tmp_path / 'db.sqlite'}")
+    directories = ["a_diagnosis", "bb_diagnosis", "bad_diagnosis", "ccc_diagnosis"]
+    progress = ProgressReporter("test", total=len(directories), enabled=False)
+
+    total, counts, failures = process_directories_parallel(
+        engine, str(tmp_path), directories, process_directory, workers=3, progress=progress
+    )
+
+    assert counts == {"a_diagnosis": 11, "bb_diagnosis": 12, "ccc_diagnosis": 13}
+    assert total == 36
+    assert failures == {"bad_diagnosis": "RuntimeError: cannot parse bad_diagnosis"}
+    assert progress.done == 3
+
+
+def test_each_worker_gets_its_own_session(tmp_path):
+    engine = create_engine(f"sqlite:///{tmp_path / 'db.sqlite'}")
+    sessions = {}
+    lock = threading.Lock()
+
+    def record_session(session, base_dir, dir_name, progress=None, verbose=False):
+        with lock:
+            sessions[dir_name] = session
+        return 1
+
+    total, _, _ = process_directories_parallel(engine, str(tmp_path), ["a", "b", "c"], record_session, workers=2)
+    assert total == 3
+    assert len({id(session) for session in sessions.values()}) == 3
+
+
+def test_no_directories(tmp_path):
+    engine = create_engine(f"sqlite:///{tmp_path / 'db.sqlite'}")
+    assert process_directories_parallel(engine, str(tmp_path), [], process_directory) == (0, {}, {})
@@ -0,0 +1,79 @@
+import os
+
+import pandas as pd
+import pytest
+
+from hoarder29.libs.dxgpt_libs import (
+    split_source_name, parse_gold_lists, parse_scores, frame_rows,
+    read_scores_csv, read_diagnoses_csv, read_answers_csv, read_case_metadata_csv,
+)
+
+DATA_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', 'data', 'dxgpt_testing-main')
+
+
+@pytest.mark.parametrize("source_name, expected", [
+    ("PUMCH_ADM_llama3_70b", ("PUMCH_ADM", "llama3_70b")),
+    ("URG_Torre_Dic_200_c3opus", ("URG_Torre_Dic_200", "c3opus")),
+    ("URG_Torre_Dic_1000_gpt4o", ("URG_Torre_Dic_1000", "gpt4o")),
+    ("GPT4_v2_mistral", ("GPT4_v2", "mistral")),
+    ("UNKNOWN_model", (None, "UNKNOWN_model")),
+])
+def test_split_source_name(source_name, expected):
+    assert split_source_name(source_name) == expected
+
+
+def test_parse_gold_lists():
+    values = pd.Series([
+        "['Prader-Willi syndrome']",
+        "['Neonatal Marfan syndrome', 'Marfan syndrome']",
+        "['Prader-Willi syndrome']",
+        "('A', 1)",
+        "not a list",
+        "'just a string'",
+        None,
+    ])
+    assert parse_gold_lists(values).tolist() == [
+        ["Prader-Willi syndrome"],
+        ["Neonatal Marfan syndrome", "Marfan syndrome"],
+        ["Prader-Willi syndrome"],
+        ["A", "1"],
+        None,
+        None,
+        None,
+    ]
+
+
+def test_parse_scores():
+    scores = parse_scores(pd.Series(["P1", '"P0"', ' P5 ', "P", "X1", "P1a", None]))
+    assert scores.dtype == "Int64"
+    assert scores.tolist() == [1, 0, 5, pd.NA, pd.NA, pd.NA, pd.NA]
+
+
+def test_frame_rows_uses_none_for_missing_values():
+    df = pd.DataFrame({"score": pd.array([1, None], dtype="Int64"), "text": ["a", None]})
+    assert frame_rows(df) == [{"score": 1, "text": "a"}, {"score": None, "text": None}]
+
+
+def test_read_result_csvs():
+    scores = read_scores_csv(os.path.join(DATA_DIR, "data", "scores_PUMCH_ADM_llama3_70b.csv"))
+    assert list(scores.columns) == ["source_name", "dataset", "model", "row_index", "gold_diagnoses", "score"]
+    assert set(scores["dataset"]) == {"PUMCH_ADM"} and set(scores["model"]) == {"llama3_70b"}
+    assert scores["row_index"].tolist() == list(range(len(scores)))
+    assert scores["score"].notna().all()
+    assert scores["score"].head(5).tolist() == [1, 1, 0, 1, 0]
+    assert scores["gold_diagnoses"][15] == ["Neonatal Marfan syndrome", "Marfan syndrome"]
+
+    diagnoses = read_diagnoses_csv(os.path.join(DATA_DIR, "data", "diagnoses_PUMCH_ADM_c3opus.csv"))
+    assert set(diagnoses["model"]) == {"c3opus"}
+    assert diagnoses["gold_diagnoses"].notna().all()
+    assert diagnoses["diagnosis"].str.len().gt(0).all()
+
+
+def test_read_additional_data_csvs():
+    answers = read_answers_csv(os.path.join(DATA_DIR, "additional_data", "DxGPT_answers_eval_DxGPT.csv"))
+    assert len(answers) > 0
+    assert answers["predicted_diagnoses"].map(lambda dx: isinstance(dx, list) and None not in dx).all()
+    assert answers["eval_top1"].dropna().isin([0, 1]).all()
+
+    metadata = read_case_metadata_csv(os.path.join(DATA_DIR, "additional_data", "DxGPT_casos_metadata.csv"))
+    assert list(metadata.columns) == ["case_id", "case_type", "disease_type", "diagnosis", "complexity"]
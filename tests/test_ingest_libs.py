@@ -0,0 +1,102 @@
+import json
+import os
+import shutil
+
+import pytest
+
+from db.bench29.bench29_models import CasesBench, LlmDifferentialDiagnosis, DifferentialDiagnosis2Rank, LlmAnalysis
+from db.db_queries_bench29 import check_leaderboard_rank_counts, get_leaderboard_rank_counts
+from hoarder29.libs.ingest_libs import run_ingest, read_result_file
+from hoarder29.libs.parser_libs import parse_diagnosis_ranks
+from hoarder29.libs.rank_libs import parse_rank, DEFAULT_RANK
+
+RESULTS_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', 'data', 'ramedis_paper', 'prompt_comparison_results')
+
+
+@pytest.fixture
+def result_tree(tmp_path):
+    base = tmp_path / "results"
+    shutil.copytree(RESULTS_DIR, base)
+    return base
+
+
+def patient_file(base, index):
+    return base / "chatglm3-6b_diagnosis" / f"patient_{index}.json"
+
+
+def test_read_result_file(result_tree):
+    _, record, error = read_result_file(str(patient_file(result_tree, 0)))
+    assert error is None
+    assert record["ranks"] == parse_diagnosis_ranks(record["predict_diagnosis"])
+    assert len(record["ranks"]) == 10
+    assert record["data"]["predict_rank"] == record["predict_rank"]
+
+
+def test_first_ingest_and_rerun(result_tree, bench29_session):
+    session = bench29_session
+    expected_ranks = sum(len(read_result_file(str(patient_file(result_tree, i)))[1]["ranks"]) for i in range(2))
+
+    added = run_ingest(session, str(result_tree), workers=1)
+    assert added == {"cases": 2, "diagnoses": 2, "ranks": expected_ranks, "analysis": 2}
+    assert sorted(path for path, in session.query(CasesBench.source_file_path)) == ["patient_0.json", "patient_1.json"]
+    assert session.query(DifferentialDiagnosis2Rank).count() == expected_ranks
+    assert sum(get_leaderboard_rank_counts(session).values()) == 2
+    assert check_leaderboard_rank_counts(session) == []
+
+    # Unchanged files are skipped, with and without the manifest
+    assert run_ingest(session, str(result_tree), workers=1) == {"cases": 0, "diagnoses": 0, "ranks": 0, "analysis": 0}
+    assert run_ingest(session, str(result_tree), workers=1, incremental=False) == \
+        {"cases": 0, "diagnoses": 0, "ranks": 0, "analysis": 0}
+
+
+def test_modified_file_replaces_its_rows(result_tree, bench29_session):
+    session = bench29_session
+    run_ingest(session, str(result_tree), workers=1)
+
+    path = patient_file(result_tree, 0)
+    data = json.loads(path.read_text(encoding="utf-8-sig"))
+    data["predict_diagnosis"] = "1. Prader-Willi syndrome\n2. Angelman syndrome"
+    data["predict_rank"] = "1"
+    path.write_text(json.dumps(data), encoding="utf-8")
+
+    added = run_ingest(session, str(result_tree), workers=1)
+    assert added == {"cases": 0, "diagnoses": 0, "ranks": 2, "analysis": 1}
+
+    case_id, = session.query(CasesBench.id).filter(CasesBench.source_file_path == "patient_0.json").one()
+    diagnosis = session.query(LlmDifferentialDiagnosis).filter(LlmDifferentialDiagnosis.cases_bench_id == case_id).one()
+    assert diagnosis.diagnosis == data["predict_diagnosis"]
+    ranks = session.query(DifferentialDiagnosis2Rank.rank_position, DifferentialDiagnosis2Rank.predicted_diagnosis).filter(
+        DifferentialDiagnosis2Rank.differential_diagnosis_id == diagnosis.id
+    ).order_by(DifferentialDiagnosis2Rank.rank_position).all()
+    assert ranks == [(1, "Prader-Willi syndrome"), (2, "Angelman syndrome")]
+
+    analyses = session.query(LlmAnalysis.predicted_rank).filter(LlmAnalysis.differential_diagnosis_id == diagnosis.id).all()
+    assert analyses == [(1,)]
+    # The replaced analysis was taken back out of the leaderboard
+    assert check_leaderboard_rank_counts(session) == []
+    assert sum(get_leaderboard_rank_counts(session).values()) == 2
+
+
+def test_unknown_stage(result_tree, bench29_session):
+    with pytest.raises(ValueError):
+        run_ingest(bench29_session, str(result_tree), stages=["cases", "severity"], workers=1)
+
+
+def test_analysis_stage_alone(result_tree, bench29_session):
+    """The stages of parse_cases/parse_llm_diagnoses first, then parse_predicted_ranks."""
+    session = bench29_session
+    run_ingest(session, str(result_tree), stages=["cases", "diagnoses"], workers=1)
+    assert session.query(LlmAnalysis).count() == 0
+
+    predict_ranks = [json.loads(patient_file(result_tree, i).read_text(encoding="utf-8-sig"))["predict_rank"] for i in range(2)]
+    expected = sorted(parse_rank(rank) for rank in predict_ranks)
+
+    assert run_ingest(session, str(result_tree), stages=["analysis"], workers=1)["analysis"] == 2
+    assert sorted(rank for rank, in session.query(LlmAnalysis.predicted_rank)) == expected
+    assert sorted(rank for _, _, rank in get_leaderboard_rank_counts(session)) == sorted(set(expected))
+    assert session.query(DifferentialDiagnosis2Rank).count() == 0
+
+
+@pytest.mark.parametrize("rank_str, expected", [("1", 1), ("5", 5), ("7", DEFAULT_RANK), ("否", DEFAULT_RANK), (None, DEFAULT_RANK)])
+def test_parse_rank(rank_str, expected):
+    assert parse_rank(rank_str) == expected
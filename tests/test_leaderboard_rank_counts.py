@@ -0,0 +1,52 @@
+from db.bench29.bench29_models import CasesBench, LlmDifferentialDiagnosis, LlmAnalysis
+from db.db_queries_bench29 import (
+    increment_leaderboard_rank_count, compute_leaderboard_rank_counts, get_leaderboard_rank_counts,
+    get_leaderboard_rank_histograms, rebuild_leaderboard_rank_counts, check_leaderboard_rank_counts,
+)
+
+
+def add_analyses(session, ranks):
+    """One case and diagnosis of model 1 / prompt 1 per rank, with its analysis row."""
+    for i, rank in enumerate(ranks):
+        session.add(CasesBench(id=100 + i, source_file_path=f"patient_{i}.json"))
+        session.add(LlmDifferentialDiagnosis(id=200 + i, cases_bench_id=100 + i, model_id=1, prompt_id=1))
+        session.add(LlmAnalysis(
+            cases_bench_id=100 + i, differential_diagnosis_id=200 + i, predicted_rank=rank,
+            differential_diagnosis_semantic_relationship_id=1, case_severity=1, differential_diagnosis_severity=1,
+        ))
+    session.flush()
+
+
+def test_increments_are_upserts(bench29_session):
+    increment_leaderboard_rank_count(bench29_session, 1, 1, 2)
+    increment_leaderboard_rank_count(bench29_session, 1, 1, 2, n=3)
+    increment_leaderboard_rank_count(bench29_session, 1, 1, 5)
+    increment_leaderboard_rank_count(bench29_session, 1, 1, 5, n=-1)
+    bench29_session.commit()
+
+    # Rows that dropped to zero are not part of the histogram
+    assert get_leaderboard_rank_counts(bench29_session) == {(1, 1, 2): 4}
+
+
+def test_check_and_rebuild(bench29_session):
+    add_analyses(bench29_session, [1, 1, 3, None])
+    assert compute_leaderboard_rank_counts(bench29_session) == {(1, 1, 1): 2, (1, 1, 3): 1}
+
+    increment_leaderboard_rank_count(bench29_session, 1, 1, 1)
+    bench29_session.commit()
+    assert check_leaderboard_rank_counts(bench29_session) == [(1, 1, 1, 1, 2), (1, 1, 3, 0, 1)]
+
+    assert rebuild_leaderboard_rank_counts(bench29_session) == 2
+    assert check_leaderboard_rank_counts(bench29_session) == []
+    assert get_leaderboard_rank_counts(bench29_session) == {(1, 1, 1): 2, (1, 1, 3): 1}
+
+
+def test_histograms_are_keyed_by_aliases(bench29_session):
+    add_analyses(bench29_session, [3, 1, 3, None])
+    rebuild_leaderboard_rank_counts(bench29_session)
+
+    # The leaderboard rows of the recompute in analyze_ranks, read from the aggregate
+    assert get_leaderboard_rank_histograms(bench29_session) == [
+        ("chatglm3-6b", "chatglm3-6b", "standard", 1, 1),
+        ("chatglm3-6b", "chatglm3-6b", "standard", 3, 2),
+    ]
@@ -0,0 +1,88 @@
+import re
+
+from sqlalchemy import Index, event
+
+from db.bench29.bench29_views import (
+    LlmAnalysisView, LLM_ANALYSIS_VIEW, LLM_ANALYSIS_INDEXES_SQL, refresh_llm_analysis_view,
+)
+from db.db_queries_bench29 import get_rank_counts_by_model_prompt
+from db.registry.registry_models import DiagnosisSemanticRelationship
+
+
+def test_rank_counts_use_the_first_correct_rank(bench29_session):
+    session = bench29_session
+    LlmAnalysisView.__table__.create(session.get_bind())
+    session.add(DiagnosisSemanticRelationship(id=2, semantic_relationship="Not Related"))
+
+    # (differential diagnosis, model, prompt, rank, relationship): 1 = Exact Synonym, 2 = Not Related
+    rows = [
+        (10, 1, 1, 1, 2), (10, 1, 1, 2, 1), (10, 1, 1, 4, 1),
+        (11, 1, 1, 1, 1),
+        (12, 1, 1, 3, 2),
+        (13, 2, 1, 2, 1),
+    ]
+    for i, (diagnosis_id, model_id, prompt_id, rank, relationship_id) in enumerate(rows):
+        session.add(LlmAnalysisView(
+            single_differential_diagnosis_id=i, cases_bench_id=1, differential_diagnosis_id=diagnosis_id,
+            model_id=model_id, prompt_id=prompt_id, predicted_rank=rank,
+            differential_diagnosis_semantic_relationship_id=relationship_id,
+        ))
+    session.commit()
+
+    # Diagnosis 12 has no hit and is left out, 10 counts once at its best hit
+    assert sorted(get_rank_counts_by_model_prompt(session)) == [(1, 1, 1, 1), (1, 1, 2, 1), (2, 1, 2, 1)]
+    assert sorted(get_rank_counts_by_model_prompt(session, model_id=2)) == [(2, 1, 2, 1)]
+    assert sorted(get_rank_counts_by_model_prompt(session, hit_relationships=["Not Related"])) == [(1, 1, 1, 1), (1, 1, 3, 1)]
+
+
+def test_leaderboard_index_covers_the_rank_count_query(bench29_session):
+    session = bench29_session
+    table = LlmAnalysisView.__table__
+    table.create(session.get_bind())
+
+    # SQLite has no INCLUDE, the included column is indexed as a trailing key instead
+    index_sql, = [sql for sql in LLM_ANALYSIS_INDEXES_SQL if "leaderboard" in sql]
+    name = re.search(r"EXISTS (\w+)", index_sql).group(1)
+    columns = [column.strip() for group in re.findall(r"\(([^)]*)\)", index_sql) for column in group.split(",")]
+    Index(name, *[table.c[column] for column in columns]).create(session.get_bind())
+
+    statements = []
+    event.listen(session.get_bind(), "before_cursor_execute",
+                 lambda conn, cursor, statement, parameters, context, executemany: statements.append((statement, parameters)))
+    get_rank_counts_by_model_prompt(session)
+    statement, parameters = statements[-1]
+    plan = [row[-1] for row in session.connection().exec_driver_sql(f"EXPLAIN QUERY PLAN {statement}", parameters)]
+
+    # The per-diagnosis grouping reads the index in order, only the small outer grouping sorts
+    assert f"SCAN bench29.llm_analysis_mv USING COVERING INDEX {name}" in plan
+    assert sum("TEMP B-TREE" in step for step in plan) == 1
+
+
+class RecordingSession:
+    def __init__(self, populated):
+        self.populated = populated
+        self.statements = []
+
+    def execute(self, statement):
+        self.statements.append(str(statement))
+        return self
+
+    def scalar(self):
+        return self.populated
+
+    def commit(self):
+        pass
+
+
+def test_refresh_is_concurrent_only_once_populated():
+    session = RecordingSession(populated=True)
+    refresh_llm_analysis_view(session)
+    assert session.statements[-1] == f"REFRESH MATERIALIZED VIEW CONCURRENTLY {LLM_ANALYSIS_VIEW}"
+
+    session = RecordingSession(populated=False)
+    refresh_llm_analysis_view(session)
+    assert session.statements[-1] == f"REFRESH MATERIALIZED VIEW {LLM_ANALYSIS_VIEW}"
+
+    session = RecordingSession(populated=True)
+    refresh_llm_analysis_view(session, concurrently=False)
+    assert session.statements == [f"REFRESH MATERIALIZED VIEW {LLM_ANALYSIS_VIEW}"]
@@ -0,0 +1,59 @@
+import os
+
+from hoarder29.libs.manifest_libs import scan_result_files, pending_files, record_files, load_manifest, file_hash
+
+
+def write(path, text):
+    path.parent.mkdir(parents=True, exist_ok=True)
+    path.write_text(text, encoding="utf-8")
+
+
+def set_mtime(path, mtime_ns):
+    os.utime(path, ns=(mtime_ns, mtime_ns))
+
+
+def test_scan_result_files(tmp_path):
+    write(tmp_path / "m_diagnosis" / "patient_0.json", "{}")
+    write(tmp_path / "m_diagnosis" / "summary.json", "{}")
+    write(tmp_path / "m_diagnosis" / "patient_1.txt", "{}")
+
+    scanned = scan_result_files(str(tmp_path), ["m_diagnosis", "missing"])
+    assert list(scanned) == [os.path.join("m_diagnosis", "patient_0.json")]
+    assert scanned[os.path.join("m_diagnosis", "patient_0.json")][0] == 2
+
+
+def test_pending_files_new_touched_and_modified(tmp_path, bench29_session):
+    base = tmp_path / "results"
+    paths = {name: base / "m_diagnosis" / f"{name}.json" for name in ("patient_0", "patient_1", "patient_2")}
+    for name, path in paths.items():
+        write(path, f'{{"case": "{name}"}}')
+        set_mtime(path, 1_000_000_000)
+    directories = ["m_diagnosis"]
+
+    pending, touched, modified = pending_files(bench29_session, "cases", str(base), directories)
+    assert len(pending) == 3 and touched == {} and modified == set()
+    assert record_files(bench29_session, "cases", pending) == 3
+    bench29_session.commit()
+
+    # Unchanged stat: nothing to do
+    assert pending_files(bench29_session, "cases", str(base), directories) == ({}, {}, set())
+
+    # patient_0 is touched (same content), patient_1 is modified, patient_3 is new
+    set_mtime(paths["patient_0"], 2_000_000_000)
+    write(paths["patient_1"], '{"case": "patient_1", "edited": true}')
+    write(base / "m_diagnosis" / "patient_3.json", "{}")
+
+    pending, touched, modified = pending_files(bench29_session, "cases", str(base), directories)
+    relative = lambda name: os.path.join("m_diagnosis", f"{name}.json")
+    assert set(pending) == {relative("patient_1"), relative("patient_3")}
+    assert set(touched) == {relative("patient_0")}
+    assert modified == {relative("patient_1")}
+    assert pending[relative("patient_1")][2] == file_hash(str(paths["patient_1"]))
+
+    # Recording upserts the changed entries; other stages keep their own manifest
+    record_files(bench29_session, "cases", {**pending, **touched})
+    bench29_session.commit()
+    manifest = load_manifest(bench29_session, "cases")
+    assert len(manifest) == 4
+    assert manifest[relative("patient_0")][1] == 2_000_000_000
+    assert load_manifest(bench29_session, "diagnoses") == {}
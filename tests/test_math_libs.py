@@ -0,0 +1,84 @@
+import numpy as np
+import pytest
+
+from libs.math_libs import (
+    simple_mean, weighted_mean, penalty_function, rescaled_penalized_weighted_stats,
+    histogram_stats, weight_values, penalty_values, rank_histogram, rank_matrix_stats,
+)
+
+GROUPS = [
+    [1, 1, 2, 5, 3],
+    [5, 5, 5],
+    [2],
+    [1, 3, 3, 4, 2, 2, 1],
+]
+WEIGHTS = {1: 5, 2: 4, 3: 3, 4: 2, 5: 1}
+
+
+def histogram(groups):
+    rank_values = sorted({rank for group in groups for rank in group})
+    counts = [[group.count(rank) for rank in rank_values] for group in groups]
+    return rank_values, counts
+
+
+@pytest.mark.parametrize("weights", [None, WEIGHTS, {1: 1, 2: 0.5}])
+def test_histogram_stats_matches_scalar_functions(weights):
+    rank_values, counts = histogram(GROUPS)
+    stats = histogram_stats(rank_values, counts, weights)
+
+    for i, group in enumerate(GROUPS):
+        expected = rescaled_penalized_weighted_stats(group, weights)
+        for array, value in zip(stats, expected):
+            assert array[i] == pytest.approx(value)
+
+
+def test_histogram_stats_empty_and_zero_weight_groups():
+    # Second group is empty, third has only ranks without a weight
+    rank_values = [1, 2, 3]
+    counts = [[1, 1, 0], [0, 0, 0], [0, 0, 4]]
+    mean, weighted, penalized, penalized_weighted = histogram_stats(rank_values, counts, {1: 2, 2: 1})
+
+    assert mean[1] == simple_mean([]) == 0
+    assert weighted[1] == weighted_mean([], {1: 2, 2: 1}) == 0
+    assert weighted[2] == weighted_mean([3, 3, 3, 3], {1: 2, 2: 1}) == 0
+    assert mean[2] == 3
+    assert penalized[1] == pytest.approx(penalty_function(0))
+
+
+def test_penalty_function_anchors():
+    assert penalty_function(1) == pytest.approx(1)
+    assert penalty_function(5) == pytest.approx(0, abs=0.01)
+    assert penalty_function(1) > penalty_function(2) > penalty_function(5)
+
+
+def test_penalty_values_matches_penalty_function():
+    ranks = np.array([[1, 2.5], [4, 5]])
+    expected = [[penalty_function(r) for r in row] for row in ranks.tolist()]
+    assert penalty_values(ranks) == pytest.approx(np.array(expected))
+
+
+def test_weight_values_matches_dictionary_lookup():
+    # Float ranks must find the integer keys, missing ranks get 0
+    assert weight_values(np.array([1.0, 3.0, 7.0]), WEIGHTS).tolist() == [5, 3, 0]
+    assert weight_values([1, 2], None).tolist() == [1, 1]
+    with pytest.raises(ValueError):
+        weight_values([1], {1: "heavy"})
+
+
+def test_rank_histogram_of_ragged_lists():
+    rank_values, counts = rank_histogram([[1, 3, 3], [2], []])
+    assert rank_values.tolist() == [1, 2, 3]
+    assert counts.tolist() == [[1, 0, 2], [0, 1, 0], [0, 0, 0]]
+
+
+def test_rank_matrix_stats_matches_scalar_functions():
+    stats = rank_matrix_stats(GROUPS, WEIGHTS)
+    for i, group in enumerate(GROUPS):
+        for array, value in zip(stats, rescaled_penalized_weighted_stats(group, WEIGHTS)):
+            assert array[i] == pytest.approx(value)
+
+    # NaN padding is the same as ragged lists
+    width = max(len(group) for group in GROUPS)
+    matrix = np.array([group + [np.nan] * (width - len(group)) for group in GROUPS])
+    for padded, ragged in zip(rank_matrix_stats(matrix, WEIGHTS), stats):
+        assert padded == pytest.approx(ragged)
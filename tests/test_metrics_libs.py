@@ -0,0 +1,50 @@
+import numpy as np
+import pytest
+
+from libs.metrics_libs import first_hit_ranks, topk_metrics, compute_group_metrics
+
+
+def test_first_hit_ranks():
+    ids, first = first_hit_ranks([7, 3, 7, 3, 9], [2, 4, 1, 1, 1], [True, True, False, False, False])
+    assert ids.tolist() == [3, 7, 9]
+    assert first.tolist() == [4, 2, np.inf]
+
+    ids, first = first_hit_ranks([], [], [])
+    assert len(ids) == 0 and len(first) == 0
+
+
+def test_topk_metrics_matches_a_direct_count():
+    group_ids = [0, 0, 0, 1, 1]
+    first_ranks = [1, 3, np.inf, 2, 6]
+    metrics = topk_metrics(group_ids, first_ranks, ks=(1, 3, 5), max_rank=5)
+
+    assert metrics["n"].tolist() == [3, 2]
+    assert metrics["top_1"] == pytest.approx([1 / 3, 0])
+    assert metrics["top_3"] == pytest.approx([2 / 3, 1 / 2])
+    assert metrics["top_5"] == pytest.approx([2 / 3, 1 / 2])
+    assert metrics["mrr"] == pytest.approx([(1 + 1 / 3) / 3, (1 / 2 + 1 / 6) / 2])
+    assert metrics["distribution"].tolist() == [[1, 0, 1, 0, 0], [0, 1, 0, 0, 0]]
+    # Rank 6 is beyond max_rank, so it counts as a miss of the distribution
+    assert metrics["misses"].tolist() == [1, 1]
+
+
+def test_compute_group_metrics():
+    rows = [
+        ("gpt4o", "standard", 1, 1, "Exact Synonym"),
+        ("gpt4o", "standard", 1, 2, "Broad Synonym"),
+        ("gpt4o", "standard", 2, 1, "Not Related"),
+        ("gpt4o", "standard", 2, 2, "Broad Synonym"),
+        ("gpt4o", "standard", 3, None, "Exact Synonym"),
+        ("llama", "standard", 4, 3, "Exact Synonym"),
+    ]
+    results = compute_group_metrics(rows, ks=(1, 3))
+
+    assert [(r["model"], r["n"]) for r in results] == [("gpt4o", 3), ("llama", 1)]
+    gpt4o, llama = results
+    assert gpt4o["top_1"] == pytest.approx(1 / 3)
+    assert gpt4o["top_3"] == pytest.approx(2 / 3)
+    assert gpt4o["mrr"] == pytest.approx((1 + 1 / 2) / 3)
+    assert (gpt4o["rank_1"], gpt4o["rank_2"], gpt4o["rank_3"], gpt4o["misses"]) == (1, 1, 0, 1)
+    assert (llama["top_1"], llama["top_3"], llama["rank_3"], llama["misses"]) == (0.0, 1.0, 1, 0)
+
+    assert compute_group_metrics([]) == []
@@ -0,0 +1,62 @@
+import pytest
+
+from libs.paralell_libs import is_overload_error, AdaptiveConcurrencyLimiter
+
+
+class RateLimitError(Exception):
+    pass
+
+
+class StatusError(Exception):
+    def __init__(self, message, status_code):
+        super().__init__(message)
+        self.status_code = status_code
+
+
+class Response:
+    status_code = 503
+
+
+class ResponseError(Exception):
+    response = Response()
+
+
+@pytest.mark.parametrize("error", [
+    "Error code: 429 - {'error': 'slow down'}",
+    "HTTP 503 Service Unavailable",
+    "status_code=429",
+    "Rate limit reached for requests",
+    "Too Many Requests",
+    "Request timed out",
+    "The server is overloaded",
+    RateLimitError("slow down"),
+    TimeoutError(),
+    StatusError("failed", 429),
+    ResponseError("failed"),
+])
+def test_overload_errors(error):
+    assert is_overload_error(error)
+
+
+@pytest.mark.parametrize("error", [
+    None,
+    "",
+    "Error processing case 1429: KeyError",
+    "patient 503 failed to parse",
+    "Diagnosis id 4290 not found",
+    KeyError("case 429"),
+    StatusError("bad request", 400),
+])
+def test_ordinary_errors(error):
+    assert not is_overload_error(error)
+
+
+def test_limiter_halves_on_overload_only():
+    limiter = AdaptiveConcurrencyLimiter(initial_limit=8, min_limit=1, max_limit=16)
+    limiter.acquire()
+    limiter.release(0.1, error="Error processing case 1429: KeyError")
+    assert int(limiter.limit) >= 7
+
+    limiter.acquire()
+    limiter.release(0.1, error="Error code: 429")
+    assert int(limiter.limit) <= 4
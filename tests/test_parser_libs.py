@@ -0,0 +1,101 @@
+import pytest
+
+from hoarder29.libs.parser_libs import (
+    parse_diagnosis_ranks, parse_diagnosis_text, extract_model_prompt,
+)
+
+
+def names(text):
+    return [(rank, name) for rank, name, _ in parse_diagnosis_ranks(text)]
+
+
+@pytest.mark.parametrize("text", [
+    "1. Asthma\n2. COPD\n3. Heart failure",
+    "1) Asthma\n2) COPD\n3) Heart failure",
+    "(1) Asthma\n(2) COPD\n(3) Heart failure",
+    "#1 Asthma\n#2 COPD\n#3 Heart failure",
+    "**1.** Asthma\n**2.** COPD\n**3.** Heart failure",
+    "Rank 1: Asthma\nRank 2: COPD\nRank 3: Heart failure",
+    "1- Asthma\n2- COPD\n3- Heart failure",
+    "1、Asthma\n2、COPD\n3、Heart failure",
+    "1.Asthma\n2.COPD\n3.Heart failure",
+    "- Asthma\n- COPD\n- Heart failure",
+    "* Asthma\n* COPD\n* Heart failure",
+    "### 1. Asthma\n### 2. COPD\n### 3. Heart failure",
+])
+def test_list_styles(text):
+    assert names(text) == [(1, "Asthma"), (2, "COPD"), (3, "Heart failure")]
+
+
+def test_reasoning_separators_and_bold_names():
+    ranks = parse_diagnosis_ranks(
+        "1. **Asthma**: wheezing and reversible obstruction\n"
+        "2. COPD - smoking history\n"
+        "3. **Heart failure** edema"
+    )
+    assert ranks == [
+        (1, "Asthma", "wheezing and reversible obstruction"),
+        (2, "COPD", "smoking history"),
+        (3, "Heart failure", "edema"),
+    ]
+
+
+def test_continuation_lines_nested_bullets_and_closing_remarks():
+    text = (
+        "Differential diagnosis:\n"
+        "\n"
+        "1. Asthma\n"
+        "   Episodic wheezing.\n"
+        "   - Responds to bronchodilators\n"
+        "2. COPD\n"
+        "\n"
+        "These should be confirmed with spirometry."
+    )
+    assert parse_diagnosis_ranks(text) == [
+        (1, "Asthma", "Episodic wheezing.\nResponds to bronchodilators"),
+        (2, "COPD", None),
+    ]
+
+
+def test_measurements_are_not_items():
+    assert names("1. Hepatomegaly\n3.5 cm mass noted\n2. Cirrhosis") == [(1, "Hepatomegaly"), (2, "Cirrhosis")]
+
+
+def test_ranks_are_kept_as_written():
+    assert names("3. Sepsis\n1. Pneumonia") == [(3, "Sepsis"), (1, "Pneumonia")]
+    assert len(parse_diagnosis_ranks("\n".join(f"{i}. Dx {i}" for i in range(1, 13)))) == 12
+
+
+@pytest.mark.parametrize("text, expected", [
+    ('["Asthma", "COPD: smoker"]', [(1, "Asthma", None), (2, "COPD", "smoker")]),
+    ('```json\n[{"rank": 2, "diagnosis": "COPD", "reasoning": "smoker"}, {"name": "Asthma"}]\n```',
+     [(2, "COPD", "smoker"), (2, "Asthma", None)]),
+    ('{"diagnoses": [{"disease": "Asthma", "rationale": "wheeze"}]}', [(1, "Asthma", "wheeze")]),
+])
+def test_inline_json(text, expected):
+    assert parse_diagnosis_ranks(text) == expected
+
+
+def test_invalid_json_falls_back_to_text():
+    assert names('[not json\n1. Asthma') == [(1, "Asthma")]
+
+
+def test_text_without_a_list():
+    assert parse_diagnosis_ranks("Asthma: likely\nGiven the wheezing") == [(1, "Asthma", "likely\nGiven the wheezing")]
+    assert parse_diagnosis_ranks("") == []
+    assert parse_diagnosis_ranks(None) == []
+    assert parse_diagnosis_ranks("  \n ") == []
+
+
+def test_parse_diagnosis_text_returns_first_rank():
+    assert parse_diagnosis_text("1. Asthma: wheeze\n2. COPD") == (1, "Asthma", "wheeze")
+    assert parse_diagnosis_text("") == (None, None, None)
+
+
+@pytest.mark.parametrize("dirname, expected", [
+    ("gpt4o_diagnosis", ("gpt4o", "standard")),
+    ("gpt4o_diagnosis_few_shot", ("gpt4o", "few_shot")),
+    ("results", (None, None)),
+])
+def test_extract_model_prompt(dirname, expected):
+    assert extract_model_prompt(dirname) == expected
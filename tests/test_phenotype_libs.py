@@ -0,0 +1,60 @@
+import os
+
+import pytest
+
+from hoarder29.libs.phenotype_libs import parse_code, case_code_row, iter_jsonl_batches, CASE_FILE_TEMPLATE
+
+HMS_JSONL = os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', 'data', 'ramedis_paper', 'data', 'HMS.jsonl')
+
+
+@pytest.mark.parametrize("code, expected", [
+    ("HP:0001252", ("HP", 1252)),
+    (" omim:106300 ", ("OMIM", 106300)),
+    ("ORPHA:91138", ("ORPHA", 91138)),
+    ("MONDO:abc", ("MONDO", None)),
+    ("free text", ("FREE TEXT", None)),
+    (":12", ("", 12)),
+])
+def test_parse_code(code, expected):
+    assert parse_code(code) == expected
+
+
+def test_case_code_row_keeps_phenotype_and_disease_codes_apart():
+    record = {
+        "Phenotype": ["HP:0000003", "HP:0000001", "HP:0000001", "HP:abc", "ORPHA:5"],
+        "RareDisease": ["OMIM:106300", "ORPHA:91138", "HP:0000002", "MONDO:1"],
+        "Department": "Neurology",
+    }
+    assert case_code_row(record, "HMS", 4) == {
+        "phenotype_ids": [1, 3],
+        "other_phenotype_codes": ["HP:abc", "ORPHA:5"],
+        "omim_ids": [106300],
+        "orpha_ids": [91138],
+        "other_disease_codes": ["HP:0000002", "MONDO:1"],
+        "dataset": "HMS",
+        "case_index": 4,
+        "department": "Neurology",
+    }
+
+
+def test_case_code_row_of_an_empty_case():
+    row = case_code_row({"Phenotype": None}, "HMS", 0)
+    assert row["phenotype_ids"] == [] and row["omim_ids"] == [] and row["other_disease_codes"] == []
+    assert row["department"] is None
+
+
+def test_iter_jsonl_batches(tmp_path):
+    batches = list(iter_jsonl_batches(HMS_JSONL, batch_size=25))
+    records = [item for batch in batches for item in batch]
+    assert [len(batch) for batch in batches] == [25, 25, 25, 13]
+    assert [index for index, _ in records] == list(range(88))
+    assert case_code_row(records[0][1], "HMS", 0)["omim_ids"] == [106300]
+
+    # Blank and broken lines are skipped, line indices stay those of the file
+    path = tmp_path / "cases.jsonl"
+    path.write_text('{"Phenotype": []}\n\n{broken\n{"Phenotype": ["HP:1"]}\n', encoding="utf-8")
+    assert [index for batch in iter_jsonl_batches(str(path)) for index, _ in batch] == [0, 3]
+
+
+def test_case_file_template():
+    assert CASE_FILE_TEMPLATE.format(index=3) == "patient_3.json"
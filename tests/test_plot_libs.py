@@ -0,0 +1,69 @@
+import os
+
+import pandas as pd
+import pytest
+
+pytest.importorskip("matplotlib")
+
+from libs import plot_libs
+from libs.plot_libs import render_performance_figure, render_figure_set, get_model_positions
+
+
+@pytest.fixture
+def performance_df():
+    return pd.DataFrame({
+        "model_name": ["b-model", "a-model", "b-model", "a-model"],
+        "prompt_name": ["standard", "standard", "few_shot", "few_shot"],
+        "mean": [2.1, 3.4, 4.8, 1.3],
+        "weighted_mean": [1.9, 3.0, 4.2, 1.2],
+        "penalized_mean": [0.6, 0.2, -0.3, 0.9],
+        "penalized_weighted_mean": [0.7, 0.3, -0.1, 0.95],
+        "severity": ["mild", "mild", "severe", "severe"],
+    })
+
+
+@pytest.fixture
+def rendered_axes(monkeypatch):
+    """Keep the rendered figures open and return their main axes."""
+    figures = []
+    monkeypatch.setattr(plot_libs.plt, "close", figures.append)
+    return lambda: figures[-1].axes[0]
+
+
+@pytest.mark.parametrize("style", ["cartesian", "legend"])
+@pytest.mark.parametrize("metric", ["mean", "weighted_mean"])
+def test_rank_means_are_inside_the_y_range(tmp_path, performance_df, rendered_axes, style, metric):
+    path = render_performance_figure(performance_df, str(tmp_path / "figure.png"), metric=metric, style=style, dpi=20)
+    assert os.path.getsize(path) > 0
+
+    y_low, y_high = rendered_axes().get_ylim()
+    assert y_low < performance_df[metric].min()
+    assert y_high > performance_df[metric].max()
+
+
+def test_penalized_metrics_keep_a_fixed_y_range(tmp_path, performance_df, rendered_axes):
+    render_performance_figure(performance_df, str(tmp_path / "figure.png"), metric="penalized_mean", dpi=20)
+    assert rendered_axes().get_ylim() == (-1, 1)
+
+
+def test_cartesian_x_axis_outside_the_y_range(tmp_path, performance_df, rendered_axes):
+    render_performance_figure(performance_df, str(tmp_path / "figure.png"), metric="mean", dpi=20)
+    assert rendered_axes().spines["bottom"].get_position() == ("axes", 0)
+
+    render_performance_figure(performance_df, str(tmp_path / "figure.png"), metric="penalized_mean", dpi=20)
+    assert rendered_axes().spines["bottom"].get_position() == "zero"
+
+
+def test_model_positions(performance_df):
+    assert list(get_model_positions(performance_df)) == ["a-model", "b-model"]
+    assert list(get_model_positions(performance_df, sort_models="appearance")) == ["b-model", "a-model"]
+
+
+def test_render_figure_set_per_stratum(tmp_path, performance_df):
+    paths = render_figure_set(performance_df, str(tmp_path), metrics=["mean", "penalized_mean"],
+                              stratum_column="severity", workers=1, dpi=20)
+    assert sorted(os.path.basename(path) for path in paths) == [
+        "mean_severity_mild.png", "mean_severity_severe.png",
+        "penalized_mean_severity_mild.png", "penalized_mean_severity_severe.png",
+    ]
+    assert all(os.path.getsize(path) > 0 for path in paths)
@@ -0,0 +1,63 @@
+import io
+import json
+
+from libs.progress_libs import ProgressReporter, estimate_tokens, format_duration
+
+
+def test_estimate_tokens_and_format_duration():
+    assert estimate_tokens(None) == 0
+    assert estimate_tokens("abc") == 1
+    assert estimate_tokens("x" * 400) == 100
+    assert format_duration(None) == "?"
+    assert format_duration(5.9) == "5s"
+    assert format_duration(245) == "4m05s"
+    assert format_duration(3 * 3600 + 7 * 60) == "3h07m"
+
+
+def test_counts_in_flight_and_eta():
+    stream = io.StringIO()
+    progress = ProgressReporter("judge", total=10, interval=0, stream=stream, events_path="")
+    progress.start_item()
+    progress.start_item()
+    progress.finish_item(tokens=50)
+    progress.finish_item(error=True)
+    progress.update(2)
+
+    snapshot = progress.snapshot()
+    assert (snapshot["done"], snapshot["errors"], snapshot["in_flight"]) == (4, 1, 0)
+    assert snapshot["error_rate"] == 0.25
+    assert snapshot["eta"] is not None and snapshot["eta"] >= 0
+    assert "[judge] 4/10 (40%)" in stream.getvalue()
+
+
+def test_events_and_colliding_extra_fields(tmp_path):
+    events_path = tmp_path / "events.ndjson"
+    extra = lambda: {"in_flight": 7, "concurrency": 3}
+    stream = io.StringIO()
+    progress = ProgressReporter("judge", interval=0, stream=stream, events_path=str(events_path),
+                                extra=extra, extra_prefix="limiter_")
+    progress.start_item()
+    progress.finish_item()
+    final = progress.close()
+
+    # The reporter's in-flight count is not overwritten by the extra field
+    assert final["in_flight"] == 0
+    assert final["limiter_in_flight"] == 7
+    assert final["concurrency"] == 3
+    assert "concurrency 3" in stream.getvalue()
+
+    events = [json.loads(line) for line in events_path.read_text(encoding="utf-8").splitlines()]
+    assert [event["event"] for event in events] == ["start", "progress", "done"]
+    assert events[-1]["done"] == 1 and events[-1]["limiter_in_flight"] == 7
+
+
+def test_output_is_throttled_and_can_be_disabled():
+    stream = io.StringIO()
+    progress = ProgressReporter("parse", interval=3600, stream=stream, events_path="")
+    for _ in range(100):
+        progress.update()
+    assert stream.getvalue().count("\n") == 1
+
+    silent = io.StringIO()
+    ProgressReporter("parse", stream=silent, enabled=False).close()
+    assert silent.getvalue() == ""
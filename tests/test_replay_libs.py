@@ -0,0 +1,32 @@
+import json
+
+from bench29.libs.replay_libs import load_failed_items, count_error_classes
+
+
+def test_load_failed_items_skips_later_successes(tmp_path):
+    summary = {"results": [
+        {"diagnosis_id": 1, "status": "error", "error": "Error code: 429", "error_class": "overload"},
+        {"diagnosis_id": 2, "status": "success"},
+        {"diagnosis_id": 3, "status": "worker_error", "error": "boom"},
+        {"diagnosis_id": 4, "status": "error", "error_class": "parse"},
+        {"diagnosis_id": 4, "status": "success"},
+        {"status": "error"},
+    ]}
+    path = tmp_path / "severity_summary.json"
+    path.write_text(json.dumps(summary), encoding="utf-8")
+
+    failed = load_failed_items(str(path))
+    assert failed == {
+        1: {"status": "error", "error": "Error code: 429", "error_class": "overload"},
+        3: {"status": "worker_error", "error": "boom", "error_class": "unknown"},
+    }
+
+
+def test_count_error_classes_most_frequent_first():
+    failures = {
+        1: {"error_class": "parse"},
+        2: {"error_class": "overload"},
+        3: {"error_class": "overload"},
+    }
+    assert list(count_error_classes(failures).items()) == [("overload", 2), ("parse", 1)]
+    assert count_error_classes({}) == {}
@@ -0,0 +1,109 @@
+import argparse
+import json
+from types import SimpleNamespace
+
+import pytest
+
+from bench29.libs.shard_libs import (
+    parse_shard, shard_argument, get_shard_arg, shard_of, filter_shard, load_shard, shard_suffix,
+    get_checkpoint_path, load_checkpoint, append_checkpoint, merge_shard_summaries,
+)
+
+
+def test_parse_shard():
+    assert parse_shard("0/4") == (0, 4)
+    assert parse_shard("3/4") == (3, 4)
+    assert parse_shard(None) is None
+    assert parse_shard("") is None
+    for spec in ("4/4", "-1/4", "0/0", "1", "a/b", "1/2/3"):
+        with pytest.raises(ValueError):
+            parse_shard(spec)
+    with pytest.raises(argparse.ArgumentTypeError):
+        shard_argument("5/2")
+
+
+def test_get_shard_arg_ignores_other_arguments():
+    assert get_shard_arg(["--model", "gpt4o", "--shard", "1/3"]) == (1, 3)
+    assert get_shard_arg(["--model", "gpt4o"]) is None
+
+
+def test_shards_are_stable_disjoint_and_complete():
+    items = [SimpleNamespace(id=i) for i in range(1000)]
+    shards = [filter_shard(items, (index, 4)) for index in range(4)]
+
+    ids = sorted(item.id for shard in shards for item in shard)
+    assert ids == list(range(1000))
+    assert all(150 < len(shard) < 350 for shard in shards)
+    # Fixed hash values, the same on every process and machine
+    assert [shard_of(i, 4) for i in range(8)] == [1, 2, 0, 1, 2, 0, 0, 2]
+    assert filter_shard(items, None) is items
+
+
+
+def test_load_shard_reads_only_the_shard_rows(bench29_session):
+    from sqlalchemy import event
+    from db.bench29.bench29_models import CasesBench
+
+    session = bench29_session
+    session.add_all([CasesBench(id=i, source_file_path=f"patient_{i}.json") for i in range(8)])
+    session.commit()
+    query = session.query(CasesBench).filter(CasesBench.id != 3)
+
+    statements = []
+    event.listen(session.get_bind(), "before_cursor_execute",
+                 lambda conn, cursor, statement, parameters, context, executemany: statements.append(statement))
+
+    # Shard 0/4 of ids 0..7 is 2, 5 and 6; only those full rows are loaded
+    cases = load_shard(query, (0, 4), CasesBench.id, batch_size=2)
+    id_scan, *batches = statements
+    assert "source_file_path" not in id_scan and len(batches) == 2
+    assert [case.id for case in cases] == [2, 5, 6]
+    assert [case.id for case in cases] == [case.id for case in filter_shard(query.order_by(CasesBench.id).all(), (0, 4))]
+
+    # The limit applies within the shard, without sharding it applies to the query
+    assert [case.id for case in load_shard(query, (0, 4), CasesBench.id, limit=2)] == [2, 5]
+    assert len(load_shard(query, None, CasesBench.id, limit=5)) == 5
+
+def test_shard_file_names(tmp_path):
+    assert shard_suffix(None) == ""
+    assert shard_suffix((1, 4)) == "_shard1of4"
+    assert get_checkpoint_path(str(tmp_path), (1, 4)) == str(tmp_path / "severity_progress_shard1of4.jsonl")
+    assert get_checkpoint_path(str(tmp_path), name="relationship") == str(tmp_path / "relationship_progress.jsonl")
+
+
+def test_checkpoint_round_trip(tmp_path):
+    path = str(tmp_path / "progress.jsonl")
+    assert load_checkpoint(path) == set()
+
+    append_checkpoint(path, {"diagnosis_id": 1})
+    append_checkpoint(path, {"diagnosis_id": 2, "status": "error"})
+    append_checkpoint(path, {"diagnosis_id": 3, "status": "worker_error"})
+    append_checkpoint(path, {"diagnosis_id": 4, "status": "deduplicated"})
+    with open(path, 'a', encoding='utf-8') as f:
+        f.write('{"diagnosis_id": 5, "sta')
+
+    assert load_checkpoint(path) == {1, 4}
+
+
+def test_merge_shard_summaries_prefers_successes(tmp_path):
+    summaries = [
+        {"shard": "0/2", "model_alias": "gpt4o", "total_diagnoses": 2,
+         "dedup": {"total_rows": 2, "unique_inputs": 2, "calls_saved": 0},
+         "results": [{"diagnosis_id": 1, "status": "error"}, {"diagnosis_id": 2, "status": "success"}]},
+        {"shard": "1/2", "total_diagnoses": 2,
+         "dedup": {"total_rows": 3, "unique_inputs": 2, "calls_saved": 1},
+         "results": [{"diagnosis_id": 1, "status": "success"}, {"diagnosis_id": 3, "status": "error"}]},
+    ]
+    paths = []
+    for i, summary in enumerate(summaries):
+        path = tmp_path / f"summary_{i}.json"
+        path.write_text(json.dumps(summary), encoding="utf-8")
+        paths.append(str(path))
+
+    merged = merge_shard_summaries(paths)
+    assert merged["shards"] == ["0/2", "1/2"]
+    assert merged["model_alias"] == "gpt4o"
+    assert merged["total_diagnoses"] == 4
+    assert merged["dedup"] == {"total_rows": 5, "unique_inputs": 4, "calls_saved": 1}
+    assert {r["diagnosis_id"]: r["status"] for r in merged["results"]} == {1: "success", 2: "success", 3: "error"}
+    assert (merged["successful"], merged["errors"]) == (2, 1)
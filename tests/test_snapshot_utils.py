@@ -0,0 +1,132 @@
+import datetime
+import decimal
+
+import pytest
+
+pa = pytest.importorskip("pyarrow")
+
+from db.utils.snapshot_utils import (
+    export_table, read_snapshot_table, snapshot_rank_counts, snapshot_case_ranks,
+    snapshot_performance_frame, PARTITION_COLUMNS,
+)
+from libs.math_libs import rescaled_penalized_weighted_stats
+
+
+class FakeResult:
+    """CursorResult stand-in: Postgres column types and rows in fixed batches."""
+
+    def __init__(self, description, batches):
+        self.cursor = type("Cursor", (), {"description": description})()
+        self.batches = batches
+        self.closed = False
+
+    def keys(self):
+        return [column[0] for column in self.cursor.description]
+
+    def partitions(self, size):
+        return iter(self.batches)
+
+    def close(self):
+        self.closed = True
+
+
+class FakeSession:
+    def __init__(self, results):
+        self.results = dict(results)
+
+    def connection(self):
+        return self
+
+    def execution_options(self, **options):
+        return self
+
+    def execute(self, query):
+        return self.results[str(query)]
+
+
+def column(name, type_code):
+    return (name, type_code, None, None, None, None, None)
+
+
+ANALYSIS_DESCRIPTION = [
+    column("id", 23), column("cases_bench_id", 23), column("predicted_rank", 23),
+    column("score", 1700), column("meta_data", 3802), column("created", 1114),
+    column("model_id", 23), column("prompt_id", 23),
+]
+
+
+@pytest.mark.parametrize("partition_cols", [None, PARTITION_COLUMNS])
+def test_export_keeps_types_when_the_first_batch_is_null(tmp_path, partition_cols):
+    created = datetime.datetime(2024, 5, 1, 10, 0)
+    batches = [
+        [(1, 10, None, None, None, None, 1, 1)],
+        [(2, 11, 3, decimal.Decimal("0.5"), {"k": [1]}, created, 1, 2),
+         (3, 12, 1, decimal.Decimal("2"), ["a"], created, 2, 1)],
+    ]
+    result = FakeResult(ANALYSIS_DESCRIPTION, batches)
+    session = FakeSession({"SELECT 1": result})
+
+    assert export_table(session, "llm_analysis", "SELECT 1", str(tmp_path), partition_cols=partition_cols) == 3
+    assert result.closed
+
+    df = read_snapshot_table(str(tmp_path), "llm_analysis").sort_values("id").reset_index(drop=True)
+    assert df["id"].tolist() == [1, 2, 3]
+    assert df["predicted_rank"].isna().tolist() == [True, False, False]
+    assert df["predicted_rank"].dropna().tolist() == [3, 1]
+    assert df["score"].dropna().tolist() == [0.5, 2.0]
+    assert df["meta_data"].tolist()[1:] == ['{"k": [1]}', '["a"]']
+    assert df["created"].dropna().tolist() == [created, created]
+
+
+def test_export_replaces_the_previous_snapshot(tmp_path):
+    description = [column("id", 23), column("name", 25)]
+    for rows in ([(1, "a"), (2, "b")], [(3, "c")]):
+        session = FakeSession({"SELECT 1": FakeResult(description, [rows])})
+        export_table(session, "models", "SELECT 1", str(tmp_path))
+
+    assert read_snapshot_table(str(tmp_path), "models").to_dict("records") == [{"id": 3, "name": "c"}]
+
+
+@pytest.fixture
+def snapshot_dir(tmp_path):
+    # Model 1 ranked case 10 twice
+    analysis = [
+        (1, 10, 1, None, None, None, 1, 1),
+        (2, 10, 3, None, None, None, 1, 1),
+        (3, 11, 2, None, None, None, 1, 1),
+        (4, 12, None, None, None, None, 1, 1),
+        (5, 10, 5, None, None, None, 2, 1),
+        (6, 11, 1, None, None, None, 2, 1),
+    ]
+    session = FakeSession({
+        "analysis": FakeResult(ANALYSIS_DESCRIPTION, [analysis]),
+        "models": FakeResult([column("id", 23), column("name", 25), column("alias", 25)], [[(1, "gpt-4o", "g"), (2, "llama", "l")]]),
+        "prompts": FakeResult([column("id", 23), column("alias", 25)], [[(1, "standard")]]),
+    })
+    export_table(session, "llm_analysis", "analysis", str(tmp_path), partition_cols=PARTITION_COLUMNS)
+    export_table(session, "models", "models", str(tmp_path))
+    export_table(session, "prompts", "prompts", str(tmp_path))
+    return str(tmp_path)
+
+
+def test_snapshot_rank_counts_and_case_ranks(snapshot_dir):
+    assert sorted(snapshot_rank_counts(snapshot_dir)) == [
+        ("gpt-4o", "g", "standard", 1, 1),
+        ("gpt-4o", "g", "standard", 2, 1),
+        ("gpt-4o", "g", "standard", 3, 1),
+        ("llama", "l", "standard", 1, 1),
+        ("llama", "l", "standard", 5, 1),
+    ]
+
+    case_ranks = snapshot_case_ranks(snapshot_dir)
+    assert {case: sorted(ranks) for case, ranks in case_ranks[("gpt-4o", "g", "standard")].items()} == {10: [1, 3], 11: [2]}
+    assert case_ranks[("llama", "l", "standard")] == {10: [5], 11: [1]}
+
+
+def test_snapshot_performance_frame(snapshot_dir):
+    weights = {1: 5, 2: 4, 3: 3, 4: 2, 5: 1}
+    frame = snapshot_performance_frame(snapshot_dir, weights).set_index("model_name")
+
+    expected = rescaled_penalized_weighted_stats([1, 3, 2], weights)
+    assert frame.loc["gpt-4o", "sample_count"] == 3
+    assert frame.loc["gpt-4o", ["mean", "weighted_mean", "penalized_mean", "penalized_weighted_mean"]].tolist() == pytest.approx(expected)
@@ -0,0 +1,194 @@
+import itertools
+
+import numpy as np
+import pytest
+
+from libs.math_libs import rescaled_penalized_weighted_stats, histogram_stats, weight_values, sweep_histogram_stats
+from libs.stats_libs import (
+    METRIC_NAMES, bootstrap_group_stats, bootstrap_stats, pairwise_tests,
+    holm_correction, benjamini_hochberg, paired_permutation_test, paired_bootstrap_test,
+    sample_weight_vectors, leaderboard_order_changes,
+)
+
+WEIGHTS = {1: 5, 2: 4, 3: 3, 4: 2, 5: 1}
+RANKS = [1, 2, 1, 5, 3, 1, 4, 2, 2, 1, 5, 3]
+
+
+def test_bootstrap_estimates_match_scalar_functions():
+    result = bootstrap_group_stats(RANKS, WEIGHTS, n_resamples=500, seed=1)
+    expected = rescaled_penalized_weighted_stats(RANKS, WEIGHTS)
+
+    for name, value in zip(METRIC_NAMES, expected):
+        assert result[name]["estimate"] == pytest.approx(value)
+        assert result[name]["ci_low"] <= result[name]["ci_high"]
+        assert result[name]["std"] > 0
+
+
+def test_bootstrap_without_resamples_or_cases():
+    result = bootstrap_group_stats(RANKS, n_resamples=0)
+    assert result["mean"]["estimate"] == pytest.approx(np.mean(RANKS))
+    assert np.isnan(result["mean"]["ci_low"])
+
+    empty = bootstrap_group_stats([np.nan], n_resamples=100)
+    assert empty["mean"]["estimate"] == 0
+
+
+def test_bootstrap_chunks_and_workers_do_not_change_results():
+    a = bootstrap_group_stats(RANKS, WEIGHTS, n_resamples=300, seed=7, chunk_size=1000)
+    b = bootstrap_group_stats(RANKS, WEIGHTS, n_resamples=300, seed=7, chunk_size=1000)
+    assert a == b
+
+    groups = {("m1", "p1"): RANKS, ("m2", "p1"): RANKS[::-1][:7]}
+    inline = bootstrap_stats(groups, WEIGHTS, n_resamples=200, seed=3, workers=1)
+    pooled = bootstrap_stats(groups, WEIGHTS, n_resamples=200, seed=3, workers=2)
+    assert inline == pooled
+
+
+def test_bootstrap_resamples_cases_with_all_their_rows():
+    # Case 0 was analysed 30 times, the other 19 cases once
+    cases = [[5] * 30] + [[1]] * 19
+    rows = [rank for case in cases for rank in case]
+
+    by_case = bootstrap_group_stats(cases, n_resamples=2000, seed=0)["mean"]
+    by_row = bootstrap_group_stats(rows, n_resamples=2000, seed=0)["mean"]
+
+    # Same estimate over all rows, but drawing case 0 as a whole widens the interval
+    assert by_case["estimate"] == pytest.approx(by_row["estimate"]) == pytest.approx(sum(rows) / len(rows))
+    assert by_case["ci_high"] - by_case["ci_low"] > 2 * (by_row["ci_high"] - by_row["ci_low"])
+    assert by_case["std"] > 3 * by_row["std"]
+
+
+def test_pairwise_tests_keep_every_row_of_a_case():
+    # Case "c1" was diagnosed twice by model A
+    case_ranks = {
+        "A": {"c1": [1, 3], "c2": [2], "c3": 1},
+        "B": {"c1": 2, "c2": 5, "c3": 4, "c4": 1},
+    }
+    result = pairwise_tests(case_ranks, WEIGHTS, metric="mean", n_iterations=200, workers=1)
+
+    # Only the shared cases c1-c3 are compared, with both rows of c1
+    expected = rescaled_penalized_weighted_stats([1, 3, 2, 1])[0] - rescaled_penalized_weighted_stats([2, 5, 4])[0]
+    assert result["keys"] == ["A", "B"]
+    assert result["difference"][0, 1] == pytest.approx(expected)
+    assert result["difference"][1, 0] == pytest.approx(-expected)
+
+
+def test_holm_correction_known_values():
+    adjusted = holm_correction([0.01, 0.04, 0.03, 0.005])
+    assert adjusted == pytest.approx([0.03, 0.06, 0.06, 0.02])
+    assert holm_correction([0.5, 0.9]) == pytest.approx([1.0, 1.0])
+
+
+def test_benjamini_hochberg_known_values():
+    adjusted = benjamini_hochberg([0.01, 0.04, 0.03, 0.005])
+    assert adjusted == pytest.approx([0.02, 0.04, 0.04, 0.02])
+    assert benjamini_hochberg([0.2, 0.9]) == pytest.approx([0.4, 0.9])
+
+
+def exact_permutation_p_value(ranks_a, ranks_b, metric_index):
+    """Two-sided p-value over all 2^n swaps of the paired ranks."""
+    observed = abs(rescaled_penalized_weighted_stats(ranks_a, WEIGHTS)[metric_index]
+                   - rescaled_penalized_weighted_stats(ranks_b, WEIGHTS)[metric_index])
+    extreme = 0
+    swaps = list(itertools.product([False, True], repeat=len(ranks_a)))
+    for swap in swaps:
+        a = [b_ if s else a_ for a_, b_, s in zip(ranks_a, ranks_b, swap)]
+        b = [a_ if s else b_ for a_, b_, s in zip(ranks_a, ranks_b, swap)]
+        difference = (rescaled_penalized_weighted_stats(a, WEIGHTS)[metric_index]
+                      - rescaled_penalized_weighted_stats(b, WEIGHTS)[metric_index])
+        extreme += abs(difference) >= observed - 1e-12
+    return extreme / len(swaps)
+
+
+@pytest.mark.parametrize("metric", ["mean", "penalized_weighted_mean"])
+def test_permutation_test_matches_exact_enumeration(metric):
+    ranks_a = [1, 2, 1, 3, 1, 2, 1]
+    ranks_b = [2, 2, 4, 3, 1, 5, 2]
+    result = paired_permutation_test(ranks_a, ranks_b, WEIGHTS, metric, n_permutations=20000, seed=0)
+
+    expected = rescaled_penalized_weighted_stats(ranks_a, WEIGHTS)[METRIC_NAMES.index(metric)] - \
+        rescaled_penalized_weighted_stats(ranks_b, WEIGHTS)[METRIC_NAMES.index(metric)]
+    assert result["n_cases"] == 7
+    assert result["difference"] == pytest.approx(expected)
+    assert result["p_value"] == pytest.approx(exact_permutation_p_value(ranks_a, ranks_b, METRIC_NAMES.index(metric)), abs=0.02)
+
+
+def test_paired_tests_on_identical_and_separated_groups():
+    same = paired_permutation_test(RANKS, RANKS, WEIGHTS, n_permutations=500, seed=0)
+    assert same["difference"] == 0
+    assert same["p_value"] == 1
+
+    best, worst = [1] * 40, [5] * 40
+    permutation = paired_permutation_test(best, worst, WEIGHTS, n_permutations=999, seed=0)
+    assert permutation["p_value"] == pytest.approx(1 / 1000)
+
+    bootstrap = paired_bootstrap_test(best, [5] * 20 + [1] * 20, WEIGHTS, "mean", n_resamples=2000, seed=0)
+    assert bootstrap["difference"] == pytest.approx(-2)
+    assert bootstrap["ci_low"] <= -2 <= bootstrap["ci_high"]
+    assert bootstrap["p_value"] < 0.01
+
+
+def test_pairwise_tests_correction_and_validation():
+    case_ranks = {
+        "A": {i: 1 for i in range(30)},
+        "B": {i: 5 for i in range(30)},
+        "C": {i: 1 + i % 2 for i in range(30)},
+        "D": {"other": 1},
+    }
+    result = pairwise_tests(case_ranks, WEIGHTS, n_iterations=500, correction="holm", workers=1)
+
+    # D shares no cases with the other groups
+    assert np.isnan(result["p_value"][0, 3])
+    assert np.isnan(result["p_value"][1, 1])
+    assert result["p_value"][0, 1] == result["p_value"][1, 0]
+
+    raw = [result["p_value"][0, 1], result["p_value"][0, 2], result["p_value"][1, 2]]
+    adjusted = [result["p_adjusted"][0, 1], result["p_adjusted"][0, 2], result["p_adjusted"][1, 2]]
+    assert adjusted == pytest.approx(holm_correction(raw))
+
+    with pytest.raises(ValueError):
+        pairwise_tests(case_ranks, method="wilcoxon")
+    with pytest.raises(ValueError):
+        pairwise_tests(case_ranks, correction="bonferroni")
+
+
+def test_sweep_matches_histogram_stats_per_weight_vector():
+    rank_values = [1, 2, 3, 5]
+    counts = np.array([[3, 1, 0, 2], [0, 2, 2, 0], [1, 0, 0, 5]])
+    weight_matrix = sample_weight_vectors(WEIGHTS, rank_values, n_vectors=4, seed=0)
+    alphas = [0.5, 0.657]
+
+    weighted_means, penalized = sweep_histogram_stats(rank_values, counts, weight_matrix, alphas)
+    assert weighted_means.shape == (4, 3)
+    assert penalized.shape == (2, 4, 3)
+
+    for s, vector in enumerate(weight_matrix):
+        weights = dict(zip(rank_values, vector))
+        for a, alpha in enumerate(alphas):
+            _, weighted, _, penalized_weighted = histogram_stats(rank_values, counts, weights, alpha)
+            assert weighted_means[s] == pytest.approx(weighted)
+            assert penalized[a, s] == pytest.approx(penalized_weighted)
+
+
+def test_sample_weight_vectors_starts_with_normalized_base():
+    vectors = sample_weight_vectors(WEIGHTS, [1, 2, 3], n_vectors=10, seed=0)
+    assert vectors.shape == (10, 3)
+    assert vectors[0] == pytest.approx(weight_values([1, 2, 3], WEIGHTS) / 12)
+    assert vectors.sum(axis=1) == pytest.approx(np.ones(10))
+
+    with pytest.raises(ValueError):
+        sample_weight_vectors({9: 1}, [1, 2, 3])
+
+
+def test_leaderboard_order_changes():
+    baseline = np.array([0.9, 0.5, 0.7])
+    scores = np.array([[0.9, 0.5, 0.7], [0.6, 0.8, 0.7]])
+    changes = leaderboard_order_changes(scores, baseline, top_k=2)
+
+    assert changes["spearman"] == pytest.approx([1.0, -1.0])
+    assert changes["top1_changed"].tolist() == [False, True]
+    assert changes["top_k_overlap"] == pytest.approx([1.0, 0.5])
+    assert changes["max_shift"].tolist() == [0, 2]
+    assert changes["baseline_position"].tolist() == [1, 3, 2]
+    assert changes["best_position"].tolist() == [1, 1, 2]
+    assert changes["first_fraction"] == pytest.approx([0.5, 0.5, 0.0])
@@ -0,0 +1,31 @@
+from db.bench29.bench29_models import CasesBench, LlmDifferentialDiagnosis, DifferentialDiagnosis2Rank
+from db.db_queries_bench29 import iter_unranked_diagnoses, diagnosis_rank_row
+
+
+def test_iter_unranked_diagnoses_is_an_anti_join(bench29_session):
+    session = bench29_session
+    session.add(CasesBench(id=1, source_file_path="patient_0.json"))
+    texts = {10: "1. Asthma", 11: "1. COPD", 12: None, 13: "", 14: "1. Sepsis", 15: "1. Gout"}
+    for diagnosis_id, text in texts.items():
+        prompt_id = 2 if diagnosis_id == 15 else 1
+        session.add(LlmDifferentialDiagnosis(id=diagnosis_id, cases_bench_id=1, model_id=1, prompt_id=prompt_id, diagnosis=text))
+    session.add(DifferentialDiagnosis2Rank(**diagnosis_rank_row(1, 11, 1, "COPD")))
+    session.commit()
+
+    batches = list(iter_unranked_diagnoses(session, batch_size=2))
+    assert batches == [[(10, 1, "1. Asthma"), (14, 1, "1. Sepsis")], [(15, 1, "1. Gout")]]
+
+    assert [row for batch in iter_unranked_diagnoses(session, prompt_id=1) for row in batch] == \
+        [(10, 1, "1. Asthma"), (14, 1, "1. Sepsis")]
+    assert [row for batch in iter_unranked_diagnoses(session, limit=1) for row in batch] == [(10, 1, "1. Asthma")]
+    assert list(iter_unranked_diagnoses(session, model_id=2)) == []
+
+
+def test_diagnosis_rank_row():
+    assert diagnosis_rank_row(1, 10, 2, "COPD", "smoker") == {
+        "cases_bench_id": 1,
+        "differential_diagnosis_id": 10,
+        "rank_position": 2,
+        "predicted_diagnosis": "COPD",
+        "reasoning": "smoker",
+    }